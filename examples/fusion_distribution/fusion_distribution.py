@@ -1,3 +1,4 @@
+import os
 import sys
 import numpy as np
 import time
@@ -45,8 +46,9 @@ tmax = 1e-2  # Time for integration
 ns_interp = resolution
 ntheta_interp = resolution
 nzeta_interp = resolution
+nthreads = int(os.environ.get("OMP_NUM_THREADS", 1))  # Number of threads per MPI rank for tracing
 
-sys.stdout = open(f"stdout_{nParticles}_{resolution}_{comm_size}.txt", "a", buffering=1)
+sys.stdout = open(f"stdout_{nParticles}_{resolution}_{comm_size}_{nthreads}.txt", "a", buffering=1)
 
 ## Setup radial interpolation
 bri = BoozerRadialInterpolant(boozmn_filename, order, no_K=True, comm=comm)
@@ -101,6 +103,7 @@ res_tys, res_zeta_hits = trace_particles_boozer(
     forget_exact_path=True,
     abstol=abstol,
     reltol=reltol,
+    nthreads=nthreads,
 )
 
 time2 = time.time()
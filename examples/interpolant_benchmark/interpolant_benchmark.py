@@ -0,0 +1,61 @@
+import time
+import numpy as np
+
+import simsoptpp as sopp
+
+# Micro-benchmark of the evaluation of RegularGridInterpolant3D. For each degree,
+# the interpolant is evaluated at random points with the kernels specialized for
+# degrees 1 to 5 and with the kernel for arbitrary degree.
+
+value_size = 7  # modB, its derivatives, K and its derivatives, as used in tracing
+n_interp = 16  # Number of cells in each direction
+nsamples = 200000  # Number of points to evaluate at
+repeats = 5  # The best of these many runs is reported
+
+srange = (0, 1, n_interp)
+thetarange = (0, np.pi, n_interp)
+zetarange = (0, 2*np.pi, n_interp)
+
+
+def fun(s, theta, zeta):
+    s = np.asarray(s)[:, None]
+    theta = np.asarray(theta)[:, None]
+    zeta = np.asarray(zeta)[:, None]
+    ls = np.arange(1, value_size+1)[None, :]
+    res = (1 + s**ls) * np.cos(ls*theta - zeta) * np.sin(theta + ls*zeta)
+    return np.ascontiguousarray(res).flatten()
+
+
+np.random.seed(0)
+stz = np.zeros((nsamples, 3))
+stz[:, 0] = np.random.uniform(srange[0], srange[1], size=nsamples)
+stz[:, 1] = np.random.uniform(thetarange[0], thetarange[1], size=nsamples)
+stz[:, 2] = np.random.uniform(zetarange[0], zetarange[1], size=nsamples)
+res = np.zeros((nsamples, value_size))
+
+
+def evaluations_per_second(interpolant):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        interpolant.evaluate_batch(stz, res)
+        times.append(time.perf_counter() - t0)
+    return nsamples/min(times)
+
+
+print(f"value_size = {value_size}, {nsamples} evaluations, best of {repeats}")
+print(f"{'degree':>6} {'generic [evals/s]':>18} {'specialized [evals/s]':>22} {'speedup':>8} {'max diff':>10}")
+for degree in [1, 2, 3, 4, 5]:
+    rule = sopp.UniformInterpolationRule(degree)
+    interpolant = sopp.RegularGridInterpolant3D(rule, srange, thetarange, zetarange, value_size, True)
+    interpolant.interpolate_batch(fun)
+
+    interpolant.specialized_kernels = False
+    rate_generic = evaluations_per_second(interpolant)
+    res_generic = res.copy()
+
+    interpolant.specialized_kernels = True
+    rate_specialized = evaluations_per_second(interpolant)
+    max_diff = np.max(np.abs(res - res_generic))
+
+    print(f"{degree:>6} {rate_generic:>18.3e} {rate_specialized:>22.3e} {rate_specialized/rate_generic:>8.2f} {max_diff:>10.1e}")
@@ -81,6 +81,7 @@ for i in range(len(resolutions)):
         ns_interp=ns_interp,
         ntheta_interp=ntheta_interp,
         nzeta_interp=nzeta_interp,
+        comm=comm,
     )
     
     points = initialize_position_uniform_vol(field, nParticles, comm=comm, seed=0)
@@ -9,11 +9,14 @@ module load python cray-hdf5/1.14.3.1 cray-netcdf/4.9.0.13
 conda activate firm3d # Change to the name of your environment
 srun -n 128 -c 1 --chdir=fusion_distribution python -u fusion_distribution.py
 srun -n 128 -c 1 --chdir=fusion_distribution_perturbed python -u fusion_distribution_perturbed.py
+srun -n 1 -c 1 --chdir=interpolant_benchmark python -u interpolant_benchmark.py
 srun -n 128 -c 1 --chdir=passing_frequencies python -u passing_frequencies.py
 srun -n 128 -c 1 --chdir=passing_map_perturbed_QA python -u passing_map_perturbed.py
 srun -n 128 -c 1 --chdir=passing_map_perturbed_QH python -u passing_map_perturbed.py
 srun -n 128 -c 1 --chdir=passing_map_unperturbed python -u passing_map.py
 srun -n 128 -c 1 --chdir=plot_trajectory python -u plot_trajectory.py
+srun -n 1 -c 1 --chdir=tracing_benchmark python -u tracing_benchmark.py
+OMP_NUM_THREADS=8 srun -n 16 -c 8 --chdir=threads_vs_mpi python -u threads_vs_mpi.py
 srun -n 128 -c 1 --chdir=tracing_with_AE python -u tracing_with_AE.py
 srun -n 128 -c 1 --chdir=trapped_frequencies python -u trapped_frequencies.py
 srun -n 128 -c 1 --chdir=trapped_map python -u trapped_map.py
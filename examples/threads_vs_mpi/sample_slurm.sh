@@ -0,0 +1,16 @@
+#!/bin/bash
+#SBATCH --nodes=1
+#SBATCH --time=0:30:00
+#SBATCH --constraint=cpu
+#SBATCH --qos=debug
+#SBATCH --account=m4680 # Change to your account number
+
+module load python cray-hdf5/1.14.3.1 cray-netcdf/4.9.0.13
+conda activate firm3d # Change to the name of your environment
+export OMP_PLACES=cores
+export OMP_PROC_BIND=close
+# The same 128 cores, split between MPI ranks and OpenMP threads
+for nthreads in 1 8 32 128; do
+    export OMP_NUM_THREADS=$nthreads
+    srun -n $((128 / nthreads)) -c $nthreads --cpu-bind=cores python -u threads_vs_mpi.py
+done
@@ -0,0 +1,115 @@
+import os
+import resource
+import time
+import numpy as np
+
+from simsopt.field.boozermagneticfield import (
+    BoozerRadialInterpolant,
+    InterpolatedBoozerField,
+)
+from simsopt.field.tracing import (
+    trace_particles_boozer,
+    MaxToroidalFluxStoppingCriterion,
+)
+from simsopt.field.tracing_helpers import (
+    initialize_position_profile,
+    initialize_velocity_uniform,
+)
+from simsopt.util.constants import (
+    ALPHA_PARTICLE_MASS,
+    ALPHA_PARTICLE_CHARGE,
+    FUSION_ALPHA_PARTICLE_ENERGY,
+)
+from simsopt.util.functions import proc0_print
+
+try:
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+    comm_size = comm.size
+except ImportError:
+    comm = None
+    comm_size = 1
+
+# Comparison of the two ways of using the cores of a node for tracing: MPI ranks
+# with one thread each, which each hold a copy of the interpolation tables, and
+# fewer ranks with several OpenMP threads each, which share the tables of their
+# rank. The same fusion birth distribution as in examples/fusion_distribution is
+# traced for a shorter time, and the tracing time and the peak memory summed
+# over the ranks are appended to threads_vs_mpi.txt, one line per configuration.
+
+resolution = 48  # Resolution for field interpolation
+nParticles = 1280  # Number of particles to trace
+reltol = 1e-8  # Relative tolerance for the ODE solver
+abstol = 1e-8  # Absolute tolerance for the ODE solver
+order = 3  # Order for radial interpolation
+degree = 3  # Degree for 3d interpolation
+boozmn_filename = "../inputs/boozmn_aten_rescaled.nc"
+tmax = 1e-3  # Time for integration
+nthreads = int(os.environ.get("OMP_NUM_THREADS", 1))  # Number of threads per MPI rank for tracing
+
+## Setup radial and 3d interpolation
+bri = BoozerRadialInterpolant(boozmn_filename, order, no_K=True, comm=comm)
+field = InterpolatedBoozerField(
+    bri,
+    degree,
+    ns_interp=resolution,
+    ntheta_interp=resolution,
+    nzeta_interp=resolution,
+)
+
+# Fusion birth distribution, see examples/fusion_distribution
+nD = lambda s: (1 - s**5)  # Normalized density
+nT = nD
+T = lambda s: 11.5 * (1 - s)  # Temperature in keV
+
+
+def sigmav(T):
+    if T > 0:
+        return T ** (-2 / 3) * np.exp(-19.94 * T ** (-1 / 3))
+    else:
+        return 0
+
+
+reactivity = lambda s: nD(s) * nT(s) * sigmav(T(s))
+
+np.random.seed(0)
+points = initialize_position_profile(field, nParticles, reactivity, comm=comm)
+vpar0 = np.sqrt(2 * FUSION_ALPHA_PARTICLE_ENERGY / ALPHA_PARTICLE_MASS)
+vpar_init = initialize_velocity_uniform(vpar0, nParticles, comm=comm)
+
+if comm is not None:
+    comm.Barrier()
+t0 = time.perf_counter()
+res_tys, res_hits = trace_particles_boozer(
+    field,
+    points,
+    vpar_init,
+    tmax=tmax,
+    mass=ALPHA_PARTICLE_MASS,
+    charge=ALPHA_PARTICLE_CHARGE,
+    comm=comm,
+    Ekin=FUSION_ALPHA_PARTICLE_ENERGY,
+    stopping_criteria=[MaxToroidalFluxStoppingCriterion(1.0)],
+    forget_exact_path=True,
+    abstol=abstol,
+    reltol=reltol,
+    nthreads=nthreads,
+)
+if comm is not None:
+    comm.Barrier()
+elapsed = time.perf_counter() - t0
+
+# ru_maxrss is in kB on Linux
+memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024**2
+if comm is not None:
+    memory = comm.allreduce(memory)
+nlost = sum(len(hits) > 0 for hits in res_hits)
+
+line = (f"{comm_size:>6} {nthreads:>8} {elapsed:>12.2f} {nParticles/elapsed:>14.1f} "
+        f"{memory:>12.2f} {nlost:>6}")
+proc0_print(f"{'ranks':>6} {'threads':>8} {'time [s]':>12} {'particles/s':>14} {'memory [GB]':>12} {'lost':>6}")
+proc0_print(line)
+if comm is None or comm.rank == 0:
+    with open("threads_vs_mpi.txt", "a") as f:
+        f.write(line + "\n")
@@ -0,0 +1,84 @@
+import time
+import numpy as np
+
+from simsopt.field.boozermagneticfield import (
+    BoozerRadialInterpolant,
+    InterpolatedBoozerField,
+)
+from simsopt.field.tracing import (
+    trace_particles_boozer,
+    IterationStoppingCriterion,
+    MaxToroidalFluxStoppingCriterion,
+)
+from simsopt.field.tracing_helpers import initialize_position_uniform_surf
+from simsopt.util.constants import PROTON_MASS, ELEMENTARY_CHARGE, ONE_EV
+
+# Micro-benchmark of the guiding center tracer. Particles are traced for a fixed
+# number of steps in the vacuum QA configuration of Landreman & Paul (2021), and
+# the number of steps per second is reported with and without planes for which
+# the tracer has to check for crossings after every step.
+
+boozmn_filename = "../../tests/test_files/boozmn_LandremanPaul2021_QA_lowres.nc"
+resolution = 24  # Resolution for field interpolation
+order = 3  # Order for radial interpolation
+degree = 3  # Degree for 3d interpolation
+nParticles = 50  # Number of particles to trace
+nsteps = 2000  # Number of steps per particle
+repeats = 3  # The best of these many runs is reported
+Ekin = 1e4 * ONE_EV  # Particles with low energy, which stay confined
+
+## Setup radial and 3d interpolation
+bri = BoozerRadialInterpolant(boozmn_filename, order, no_K=True)
+field = InterpolatedBoozerField(
+    bri,
+    degree,
+    ns_interp=resolution,
+    ntheta_interp=resolution,
+    nzeta_interp=resolution,
+)
+
+np.random.seed(0)
+points = initialize_position_uniform_surf(field, nParticles, 0.3, seed=0)
+vtotal = np.sqrt(2 * Ekin / PROTON_MASS)
+vpar_init = np.random.uniform(-vtotal, vtotal, size=(nParticles,))
+
+# The tracing of each particle stops after nsteps + 1 steps by the first criterion
+stopping_criteria = [IterationStoppingCriterion(nsteps), MaxToroidalFluxStoppingCriterion(1.0)]
+
+
+def steps_per_second(**kwargs):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        res_tys, res_hits = trace_particles_boozer(
+            field,
+            points,
+            vpar_init,
+            tmax=1.0,
+            mass=PROTON_MASS,
+            charge=ELEMENTARY_CHARGE,
+            Ekin=Ekin,
+            mode="gc_vac",
+            stopping_criteria=stopping_criteria,
+            forget_exact_path=True,
+            **kwargs,
+        )
+        times.append(time.perf_counter() - t0)
+    # Only count the particles that took all steps
+    ncomplete = sum(len(hits) > 0 and hits[-1, 1] == -1 for hits in res_hits)
+    return ncomplete * (nsteps + 1) / min(times), ncomplete
+
+
+# Trace once so that the interpolants are built before timing
+trace_particles_boozer(field, points[:1, :], vpar_init[:1], tmax=1e-6, mass=PROTON_MASS,
+                       charge=ELEMENTARY_CHARGE, Ekin=Ekin, mode="gc_vac")
+
+print(f"{nParticles} particles, {nsteps} steps each, best of {repeats}")
+print(f"{'planes':>22} {'steps/s':>10} {'complete':>9}")
+for name, kwargs in [
+    ("none", dict()),
+    ("zeta", dict(zetas=[0])),
+    ("zeta, theta and vpar", dict(zetas=[0], thetas=[0], vpars=[0], axis=0)),
+]:
+    rate, ncomplete = steps_per_second(**kwargs)
+    print(f"{name:>22} {rate:>10.3e} {ncomplete:>9}")
@@ -193,7 +193,90 @@ def parallel_loop_bounds(comm, n):
         assert idxs[0] == 0
         assert idxs[-1] == n
         return idxs[comm.rank], idxs[comm.rank+1]
-    
+
+
+def parallel_loop_chunks(comm, n, chunk_size):
+    """
+    Hand out the array [0, 1, ..., n-1] across an mpi communicator in chunks of
+    ``chunk_size`` on demand. This is a generator that yields the bounds
+    ``(first, last)`` of the next chunk that no rank has taken yet, so ranks
+    that finish their chunks early take more of them. Rank 0 only hands out the
+    chunks and yields none: it answers the requests of the other ranks until
+    each of them has been told that no chunks are left. A counter in an MPI
+    window that every rank advances itself would let rank 0 work as well, but a
+    passive-target update of a window on a rank that is busy outside of MPI,
+    e.g. in a long call into C++, often makes no progress until that rank calls
+    into MPI again, unless the MPI library runs an asynchronous progress thread.
+
+    Every rank has to exhaust the generator. If a rank raises an exception while
+    it works on a chunk and stops asking for chunks, rank 0 waits for it forever,
+    so the exception should be fatal to the whole program, e.g. by calling
+    ``comm.Abort()``.
+    """
+    assert chunk_size >= 1
+    if comm is None or comm.size == 1:
+        for first in range(0, n, chunk_size):
+            yield first, min(first + chunk_size, n)
+        return
+
+    from mpi4py import MPI
+    tag = 7391
+    chunk = np.zeros((2,), dtype=np.int64)
+    if comm.rank == 0:
+        request = np.zeros((1,), dtype=np.int64)
+        status = MPI.Status()
+        first = 0
+        nworkers = comm.size - 1
+        while nworkers > 0:
+            comm.Recv(request, source=MPI.ANY_SOURCE, tag=tag, status=status)
+            if first < n:
+                chunk[:] = first, min(first + chunk_size, n)
+                first += chunk_size
+            else:
+                # a chunk with first == -1 tells the rank to stop
+                chunk[:] = -1, -1
+                nworkers -= 1
+            comm.Send(chunk, dest=status.Get_source(), tag=tag)
+        return
+
+    request = np.zeros((1,), dtype=np.int64)
+    while True:
+        comm.Send(request, dest=0, tag=tag)
+        comm.Recv(chunk, source=0, tag=tag)
+        if chunk[0] < 0:
+            return
+        yield int(chunk[0]), int(chunk[1])
+
+
+def gather_rows(comm, rows, root=None):
+    """
+    Concatenate the arrays ``rows`` of all ranks of an mpi communicator along
+    their first axis, in the order of the ranks. The arrays need to have the same
+    dtype and the same shape apart from the first axis. They are exchanged as flat
+    buffers with a single ``Allgatherv``, so the result is on every rank, or with
+    a single ``Gatherv`` if ``root`` is given, in which case the other ranks
+    receive ``None``.
+    """
+    rows = np.ascontiguousarray(rows)
+    if comm is None:
+        return rows
+    counts = np.empty((comm.size,), dtype=np.int64)
+    comm.Allgather(np.array([rows.size], dtype=np.int64), counts)
+    displs = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rowsize = int(np.prod(rows.shape[1:]))
+    shape = (int(np.sum(counts)) // max(rowsize, 1),) + rows.shape[1:]
+    if root is None:
+        gathered = np.empty(shape, dtype=rows.dtype)
+        comm.Allgatherv(rows, [gathered, (counts, displs)])
+        return gathered
+    if comm.rank == root:
+        gathered = np.empty(shape, dtype=rows.dtype)
+        comm.Gatherv(rows, [gathered, (counts, displs)], root=root)
+        return gathered
+    comm.Gatherv(rows, None, root=root)
+    return None
+
+
 def align_and_pad(array, alignment=ALIGNMENT, dtype=np.dtype(np.float64)): 
     dims = array.ndim
     assert dims <= 2
@@ -1,5 +1,5 @@
 import simsoptpp as sopp
-from scipy.interpolate import InterpolatedUnivariateSpline
+from scipy.interpolate import InterpolatedUnivariateSpline, UnivariateSpline
 import numpy as np
 from booz_xform import Booz_xform
 from .._core.util import (
@@ -8,7 +8,11 @@ from .._core.util import (
     allocate_aligned_and_padded_array,
 )
 from ..saw.ae3d import AE3DEigenvector
+import hashlib
+import json
 import os.path
+import shutil
+import uuid
 import warnings
 
 __all__ = [
@@ -26,6 +30,57 @@ try:
 except ImportError as e:
     MPI = None
 
+# Quantities of InterpolatedBoozerField with a 3D interpolant, see InterpolatedBoozerField.save
+_INTERPOLANT_NAMES = [
+    "modB", "dmodBdtheta", "dmodBdzeta", "dmodBds", "modB_derivs",
+    "K", "dKdtheta", "dKdzeta", "K_derivs",
+    "R", "dRdtheta", "dRdzeta", "dRds", "R_derivs",
+    "Z", "dZdtheta", "dZdzeta", "dZds", "Z_derivs",
+    "nu", "dnudtheta", "dnudzeta", "dnuds", "nu_derivs",
+    "tracing",
+]
+# Quantities of InterpolatedBoozerField that share the radial interpolant of the flux functions
+_FLUXFUNCTION_NAMES = ["psip", "G", "I", "iota", "dGds", "dIds", "diotads"]
+# The attributes of BoozerRadialInterpolant with the radial splines of the Fourier
+# modes of a quantity.
+_MODE_SPLINE_NAMES = [
+    "bmnc_splines", "dbmncds_splines", "rmnc_splines", "drmncds_splines",
+    "zmns_splines", "dzmnsds_splines", "numns_splines", "dnumnsds_splines",
+    "kmns_splines", "mn_factor_splines", "d_mn_factor_splines",
+    "bmns_splines", "dbmnsds_splines", "rmns_splines", "drmnsds_splines",
+    "zmnc_splines", "dzmncds_splines", "numnc_splines", "dnumncds_splines",
+    "kmnc_splines",
+]
+# The Fourier series of BoozerRadialInterpolant, with the prefixes of the
+# attributes with the radial splines of the stellarator symmetric and asymmetric
+# harmonics.
+_FOURIER_FAMILIES = {
+    "modB": ("bmnc", "bmns"),
+    "R": ("rmnc", "rmns"),
+    "Z": ("zmns", "zmnc"),
+    "nu": ("numns", "numnc"),
+    "K": ("kmns", "kmnc"),
+}
+# The quantities of BoozerRadialInterpolant given by a Fourier series, with the
+# series and the variable of the derivative, if any.
+_FOURIER_QUANTITIES = {
+    "modB": ("modB", None), "dmodBdtheta": ("modB", "theta"),
+    "dmodBdzeta": ("modB", "zeta"), "dmodBds": ("modB", "s"),
+    "R": ("R", None), "dRdtheta": ("R", "theta"), "dRdzeta": ("R", "zeta"), "dRds": ("R", "s"),
+    "Z": ("Z", None), "dZdtheta": ("Z", "theta"), "dZdzeta": ("Z", "zeta"), "dZds": ("Z", "s"),
+    "nu": ("nu", None), "dnudtheta": ("nu", "theta"), "dnudzeta": ("nu", "zeta"), "dnuds": ("nu", "s"),
+    "K": ("K", None), "dKdtheta": ("K", "theta"), "dKdzeta": ("K", "zeta"),
+}
+# The attributes of BoozerRadialInterpolant that are computed on rank 0 of comm and
+# broadcast to the other ranks.
+_STATE_NAMES = [
+    "psi0", "nfp", "mpol", "ntor", "asym", "xm_b", "xn_b", "s_half_ext",
+    "psip_spline", "G_spline", "I_spline", "dGds_spline", "dIds_spline",
+    "iota_spline", "diotads_spline",
+] + _MODE_SPLINE_NAMES
+_TABLES_MAGIC = b"IBFTABLE"
+_TABLES_ALIGNMENT = 64
+
 
 class BoozerMetric:
     r"""
@@ -400,6 +455,15 @@ class BoozerMagneticField(sopp.BoozerMagneticField):
         self._dZdtheta_impl(np.reshape(Z_derivs[:, 1], (len(Z_derivs[:, 0]), 1)))
         self._dZdzeta_impl(np.reshape(Z_derivs[:, 2], (len(Z_derivs[:, 0]), 1)))
 
+    def content_hash(self):
+        r"""
+        Returns a hash of the data that determines the field, which is used by
+        :meth:`InterpolatedBoozerField.cache_key` to identify the field, or ``None``
+        if the field does not provide one. In this case the field is identified by
+        its values at a few points.
+        """
+        return None
+
     def get_covariant_metric(self):
         r"""
         Computes and returns the covariant metric tensor for normalized Boozer coordinates
@@ -582,7 +646,7 @@ class BoozerMagneticField(sopp.BoozerMagneticField):
         return self.get_covariant_metric().to_contravariant()
 
 
-class BoozerAnalytic(BoozerMagneticField):
+class BoozerAnalytic(sopp.BoozerAnalytic, BoozerMagneticField):
     r"""
     Computes a :class:`BoozerMagneticField` based on a first-order expansion in
     distance from the magnetic axis (Landreman & Sengupta, Journal of Plasma
@@ -623,6 +687,10 @@ class BoozerAnalytic(BoozerMagneticField):
         B0z: amplitude of symmetry-breaking perturbation mode
         n: toroidal mode number for the perturbation
         m: poloidal mode bumber for the perturbation
+
+    The field is implemented in C++, so it does not call back into Python during
+    tracing and can be cloned for multithreaded tracing. ``B0z``, ``n`` and ``m``
+    may contain several modes, which are summed at each point.
     """
 
     def __init__(
@@ -645,220 +713,124 @@ class BoozerAnalytic(BoozerMagneticField):
     ):
         assert len(B0z) == len(n)
         assert len(m) == len(n)
-        self.etabar = etabar
-        self.B0 = B0
-        self.B0z = np.array(B0z)
-        self.m = np.array(m, dtype="float")
-        self.n = np.array(n, dtype="float")
-        self.Bbar = Bbar
-        self.N = N
-        self.G0 = G0
-        self.I0 = I0
-        self.I1 = I1
-        self.G1 = G1
-        self.K1 = K1
-        self.iota0 = iota0
-        self.psi0 = psi0
-        self.iota1 = iota1
-        self.set_field_type()
+        # The C++ field is constructed first, since psi0 and field_type are
+        # attributes of it that BoozerMagneticField.__init__ assigns to.
+        sopp.BoozerAnalytic.__init__(
+            self, etabar, B0, N, G0, psi0, iota0, Bbar, I0, G1, I1, K1, iota1,
+            np.asarray(B0z, dtype=float).tolist(),
+            np.asarray(n, dtype=float).tolist(),
+            np.asarray(m, dtype=float).tolist(),
+        )
         BoozerMagneticField.__init__(self, psi0, self.field_type)
 
-    def set_field_type(self):
-        if self.I0 == 0 and self.I1 == 0 and self.G1 == 0 and self.K1 == 0:
-            self.field_type = "vac"
-        elif self.K1 == 0:
-            self.field_type = "nok"
-        else:
-            self.field_type = ""
-
-    def set_etabar(self, etabar):
-        self.etabar = etabar
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_B0(self, B0):
-        self.B0 = B0
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
     def set_B0z(self, B0z):
-        self.B0z = B0z
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_Bbar(self, Bbar):
-        self.Bbar = Bbar
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_N(self, N):
-        self.N = N 
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_G0(self, G0):
-        self.G0 = G0
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_I0(self, I0):
-        self.I0 = I0
-        self.set_field_type()
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_G1(self, G1):
-        self.G1 = G1
-        self.set_field_type()
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_I1(self, I1):
-        self.I1 = I1
-        self.set_field_type()
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_K1(self, K1):
-        self.K1 = K1
-        self.set_field_type()
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_iota0(self, iota0):
-        self.iota0 = iota0
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_iota1(self, iota1):
-        self.iota1 = iota1
-        self.set_points(self.get_points_ref())  # Force cache invalidation
-
-    def set_psi0(self, psi0):
-        self.psi0 = psi0
-        self.set_points(self.get_points_ref())  # Force cache invalidation
+        sopp.BoozerAnalytic.set_B0z(self, np.asarray(B0z, dtype=float).tolist())
 
-    def _psip_impl(self, psip):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        psip[:, 0] = self.psi0 * (s * self.iota0 + s**2 * self.iota1 / 2)
-
-    def _iota_impl(self, iota):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        iota[:, 0] = self.iota0 + self.iota1 * s
-
-    def _diotads_impl(self, diotads):
-        diotads[:, 0] = self.iota1
-
-    def _G_impl(self, G):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        G[:, 0] = self.G0 + s * self.G1
-
-    def _dGds_impl(self, dGds):
-        dGds[:, 0] = self.G1
-
-    def _I_impl(self, I):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        I[:, 0] = self.I0 + s * self.I1
-
-    def _dIds_impl(self, dIds):
-        dIds[:, 0] = self.I1
-
-    def _modB_impl(self, modB):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        modB[:, 0] = self.B0 * (
-            1 + self.etabar * r * np.cos(thetas - self.N * zetas)
-        ) + np.sum(
-            self.B0z[:, None]
-            * np.cos(
-                self.m[:, None] * thetas[None, :]
-                - self.n[:, None] * self.N * zetas[None, :]
-            )
-        )
-
-    def _dmodBds_impl(self, dmodBds):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        # drds = np.zeros_like(s)
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        # drds[s!=0] = 0.5*r[s!=0]*self.psi0/psi[s!=0]
-        if self.etabar != 0:
-            drds = 0.5 * r * self.psi0 / psi
-            dmodBds[:, 0] = (
-                self.B0 * self.etabar * drds * np.cos(thetas - self.N * zetas)
-            )
-        else:
-            dmodBds[:, 0] = 0
-
-    def _dmodBdtheta_impl(self, dmodBdtheta):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        dmodBdtheta[:, 0] = -self.B0 * self.etabar * r * np.sin(
-            thetas - self.N * zetas
-        ) - np.sum(
-            self.B0z[:, None]
-            * self.m[:, None]
-            * np.sin(
-                self.m[:, None] * thetas[None, :]
-                - self.n[:, None] * self.N * zetas[None, :]
-            )
-        )
-
-    def _dmodBdzeta_impl(self, dmodBdzeta):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        dmodBdzeta[:, 0] = self.N * self.B0 * self.etabar * r * np.sin(
-            thetas - self.N * zetas
-        ) + np.sum(
-            self.B0z[:, None]
-            * self.n[:, None]
-            * self.N
-            * np.sin(
-                self.m[:, None] * thetas[None, :]
-                - self.n[:, None] * self.N * zetas[None, :]
-            )
-        )
-
-    def _K_impl(self, K):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        K[:, 0] = self.K1 * r * np.sin(thetas - self.N * zetas)
+    def content_hash(self):
+        r"""
+        Returns a hash of the parameters of the field, see
+        :meth:`BoozerMagneticField.content_hash`.
+        """
+        key = hashlib.sha256()
+        for value in [self.etabar, self.B0, self.N, self.G0, self.psi0, self.iota0, self.Bbar,
+                      self.I0, self.G1, self.I1, self.K1, self.iota1, self.B0z, self.n, self.m]:
+            key.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+            key.update(b"|")
+        return key.hexdigest()
+
+
+def _temporary_path(path):
+    # A unique name for a temporary file next to path, which is renamed to path
+    # once it is complete. Processes on different nodes that share a file system
+    # can have the same pid, so the name contains a random uuid instead.
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def _booz_cache_path(wout_filename, mpol, ntor, cache_dir):
+    # The boozmn file in cache_dir for the transformation of the wout file with
+    # the given resolution on all surfaces, named by a hash of the contents of the
+    # wout file and the parameters of the transformation.
+    key = hashlib.sha256()
+    with open(wout_filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            key.update(chunk)
+    key.update(json.dumps({"mboz": int(mpol), "nboz": int(ntor), "flux": True, "surfaces": "all"},
+                          sort_keys=True).encode())
+    return os.path.join(cache_dir, f"boozmn_{key.hexdigest()}.nc")
+
+
+def _cached_booz_xform(wout_filename, mpol, ntor, verbose, path):
+    # Returns the Booz_xform transformation of the wout file, which is read from
+    # the cache file path, see _booz_cache_path, if it exists, and otherwise
+    # computed and written there. The file is written to a temporary file first
+    # and then renamed, so that other processes never read a partially written file.
+    booz = Booz_xform()
+    booz.verbose = verbose
+    if os.path.exists(path):
+        booz.read_boozmn(path)
+        return booz
+    booz.read_wout(wout_filename, True)
+    booz.mboz = mpol
+    booz.nboz = ntor
+    booz.run()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temporary_path(path)
+    booz.write_boozmn(tmp_path)
+    os.replace(tmp_path, path)
+    return booz
+
+
+class _ModeSplines:
+    r"""
+    The radial splines of all Fourier modes of one quantity. The splines share their
+    knots and degree, and their coefficients are stored in one contiguous array of
+    shape ``(nmodes, ncoef)``, so that all modes are evaluated with one call to
+    :func:`simsoptpp.evaluate_mode_splines`. Indexing with a slice gives the splines
+    of a range of modes, and indexing with an integer the spline of a single mode.
 
-    def _dKdtheta_impl(self, dKdtheta):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        dKdtheta[:, 0] = self.K1 * r * np.cos(thetas - self.N * zetas)
+    Args:
+        splines: list of ``scipy.interpolate.UnivariateSpline`` objects with the same
+            knots and degree, one for each mode.
+    """
 
-    def _dKdzeta_impl(self, dKdzeta):
-        points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        psi = s * self.psi0
-        r = np.sqrt(np.abs(2 * psi / self.Bbar))
-        dKdzeta[:, 0] = -self.N * self.K1 * r * np.cos(thetas - self.N * zetas)
+    def __init__(self, splines, knots=None, coefs=None, degree=None, single=False):
+        if splines is not None:
+            knots, _, degree = splines[0]._eval_args
+            ncoef = len(knots) - degree - 1
+            coefs = np.zeros((len(splines), ncoef))
+            for im, spline in enumerate(splines):
+                t, c, k = spline._eval_args
+                if k != degree or not np.array_equal(t, knots):
+                    raise ValueError("The splines of all modes need to have the same knots and degree.")
+                coefs[im, :] = c[:ncoef]
+            knots = np.ascontiguousarray(knots, dtype=np.float64)
+        self.knots = knots
+        self.coefs = coefs
+        self.degree = degree
+        self.single = single
+
+    def __len__(self):
+        return self.coefs.shape[0]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return _ModeSplines(None, self.knots, self.coefs[idx], self.degree)
+        idx = range(len(self))[idx]
+        return _ModeSplines(None, self.knots, self.coefs[idx:idx + 1], self.degree, single=True)
+
+    def __call__(self, s):
+        s = np.ascontiguousarray(s, dtype=np.float64)
+        res = np.zeros((self.coefs.shape[0], len(s)))
+        sopp.evaluate_mode_splines(res, self.knots, self.coefs, self.degree, s)
+        return res[0] if self.single else res
 
 
 class BoozerRadialInterpolant(BoozerMagneticField):
     r"""
      The magnetic field can be computed at any point in Boozer coordinates using radial spline interpolation
      (``scipy.interpolate.InterpolatedUnivariateSpline``) and an inverse Fourier transform in the two angles.
+     The spline coefficients of all Fourier modes of a quantity are stored in one array, and the
+     splines of all modes are evaluated together in C++ before the inverse Fourier transform.
      If given a `VMEC` output file, performs a Boozer coordinate transformation using ``BOOZXFORM``.
      If given a ``BOOZXFORM`` output file, the Boozer transformation must be performed with all surfaces on the VMEC
      half grid, and with `phip`, `chi`, `pres`, and `phi` saved in the file.
@@ -912,6 +884,16 @@ class BoozerRadialInterpolant(BoozerMagneticField):
         field_type: A string identifying additional assumptions made on the magnetic field. Can be
             ``'vac'``, ``'nok'``, or ``''``.  Be default, this is determined from the options ``enforce_vacuum``
             and ``no_K``.
+        K_cache: If True, the harmonics of :math:`K` are saved to a file next to the
+            boozmn_*.nc file, i.e. ``equil`` or ``boozmn_name``, with the suffix ``_K.npz``
+            and reused by later instances with the same equilibrium and resolution,
+            instead of being computed again. Ignored if there is no boozmn_*.nc
+            file. (defaults to False)
+        booz_cache_dir: (string) If a wout_*.nc file is passed and ``booz_cache_dir`` is not
+            ``None``, the result of ``BOOZXFORM`` is stored in this directory in a boozmn_*.nc
+            file named by a hash of the contents of the wout_*.nc file, ``mpol`` and ``ntor``,
+            and read from there instead of running ``BOOZXFORM`` again if it exists.
+            (defaults to ``None``)
     """
 
     def __init__(
@@ -932,6 +914,8 @@ class BoozerRadialInterpolant(BoozerMagneticField):
         verbose=0,
         no_shear=False,
         field_type=None,
+        K_cache=False,
+        booz_cache_dir=None,
     ):
         self.comm = comm
 
@@ -965,18 +949,32 @@ class BoozerRadialInterpolant(BoozerMagneticField):
             else:
                 self.field_type = ""
 
+        self.K_cache_path = None
+        if isinstance(equil, str) and K_cache:
+            basename = os.path.basename(equil)
+            if basename[:4] == "booz":
+                self.K_cache_path = os.path.splitext(equil)[0] + "_K.npz"
+            elif basename[:4] == "wout" and write_boozmn:
+                self.K_cache_path = os.path.splitext(boozmn_name)[0] + "_K.npz"
+
         if isinstance(equil, str):
             if self.proc0:
                 basename = os.path.basename(equil)
                 if basename[:4] == "wout":
-                    booz = Booz_xform()
-                    booz.read_wout(equil, True)
-                    booz.verbose = verbose
-                    booz.mboz = mpol
-                    booz.nboz = ntor
-                    booz.run()
-                    if write_boozmn:
-                        booz.write_boozmn(boozmn_name)
+                    if booz_cache_dir is not None:
+                        booz_path = _booz_cache_path(equil, mpol, ntor, booz_cache_dir)
+                        booz = _cached_booz_xform(equil, mpol, ntor, verbose, booz_path)
+                        if write_boozmn:
+                            shutil.copyfile(booz_path, boozmn_name)
+                    else:
+                        booz = Booz_xform()
+                        booz.read_wout(equil, True)
+                        booz.verbose = verbose
+                        booz.mboz = mpol
+                        booz.nboz = ntor
+                        booz.run()
+                        if write_boozmn:
+                            booz.write_boozmn(boozmn_name)
                     self.bx = booz
                 elif basename[:4] == "booz":
                     booz = Booz_xform()
@@ -1034,83 +1032,115 @@ class BoozerRadialInterpolant(BoozerMagneticField):
             self.s_half_ext[1:-1] = self.bx.s_b
             self.s_half_ext[-1] = 1
             self.init_splines()
-        else:
-            self.psip_spline = None
-            self.G_spline = None
-            self.I_spline = None
-            self.dGds_spline = None
-            self.dIds_spline = None
-            self.iota_spline = None
-            self.diotads_spline = None
-            self.numns_splines = None
-            self.rmnc_splines = None
-            self.zmns_splines = None
-            self.dnumnsds_splines = None
-            self.drmncds_splines = None
-            self.dzmnsds_splines = None
-            self.bmnc_splines = None
-            self.dbmncds_splines = None
-            self.d_mn_factor_splines = None
-            self.mn_factor_splines = None
-            self.xm_b = None
-            self.xn_b = None
-            self.numnc_splines = None
-            self.rmns_splines = None
-            self.zmnc_splines = None
-            self.dnumncds_splines = None
-            self.drmnsds_splines = None
-            self.dzmncds_splines = None
-            self.bmns_splines = None
-            self.dbmnsds_splines = None
-            self.kmns_splines = None
-            self.kmnc_splines = None
-            self.asym = None
-            self.psi0 = None
-            self.nfp = None
-            self.mpol = None
-            self.ntor = None
-            self.s_half_ext = None
+            self.stack_splines()
         if self.comm is not None:
-            self.psi0 = self.comm.bcast(self.psi0, root=0)
-            self.nfp = self.comm.bcast(self.nfp, root=0)
-            self.mpol = self.comm.bcast(self.mpol, root=0)
-            self.ntor = self.comm.bcast(self.ntor, root=0)
-            self.asym = self.comm.bcast(self.asym, root=0)
-            self.psip_spline = self.comm.bcast(self.psip_spline, root=0)
-            self.G_spline = self.comm.bcast(self.G_spline, root=0)
-            self.I_spline = self.comm.bcast(self.I_spline, root=0)
-            self.dGds_spline = self.comm.bcast(self.dGds_spline, root=0)
-            self.dIds_spline = self.comm.bcast(self.dIds_spline, root=0)
-            self.iota_spline = self.comm.bcast(self.iota_spline, root=0)
-            self.diotads_spline = self.comm.bcast(self.diotads_spline, root=0)
-            self.numns_splines = self.comm.bcast(self.numns_splines, root=0)
-            self.rmnc_splines = self.comm.bcast(self.rmnc_splines, root=0)
-            self.zmns_splines = self.comm.bcast(self.zmns_splines, root=0)
-            self.dnumnsds_splines = self.comm.bcast(self.dnumnsds_splines, root=0)
-            self.drmncds_splines = self.comm.bcast(self.drmncds_splines, root=0)
-            self.dzmnsds_splines = self.comm.bcast(self.dzmnsds_splines, root=0)
-            self.bmnc_splines = self.comm.bcast(self.bmnc_splines, root=0)
-            self.dbmncds_splines = self.comm.bcast(self.dbmncds_splines, root=0)
-            self.d_mn_factor_splines = self.comm.bcast(self.d_mn_factor_splines, root=0)
-            self.mn_factor_splines = self.comm.bcast(self.mn_factor_splines, root=0)
-            self.xm_b = self.comm.bcast(self.xm_b, root=0)
-            self.xn_b = self.comm.bcast(self.xn_b, root=0)
-            self.s_half_ext = self.comm.bcast(self.s_half_ext, root=0)
-            if self.asym:
-                self.numnc_splines = self.comm.bcast(self.numnc_splines, root=0)
-                self.rmns_splines = self.comm.bcast(self.rmns_splines, root=0)
-                self.zmnc_splines = self.comm.bcast(self.zmnc_splines, root=0)
-                self.dnumncds_splines = self.comm.bcast(self.dnumncds_splines, root=0)
-                self.drmnsds_splines = self.comm.bcast(self.drmnsds_splines, root=0)
-                self.dzmncds_splines = self.comm.bcast(self.dzmncds_splines, root=0)
-                self.bmns_splines = self.comm.bcast(self.bmns_splines, root=0)
-                self.dbmnsds_splines = self.comm.bcast(self.dbmnsds_splines, root=0)
+            self._bcast_state(_STATE_NAMES)
 
+        self.stack_splines()
         if not self.no_K:
             self.compute_K()
+            self.stack_splines()
 
         BoozerMagneticField.__init__(self, self.psi0, self.field_type, self.nfp, self.asym==0)
 
+    def stack_splines(self):
+        r"""
+        Replaces the lists with the splines of the Fourier modes of each quantity,
+        e.g. ``bmnc_splines``, by a :class:`_ModeSplines` object that evaluates the
+        splines of all modes in one call. Lists that have already been replaced, or
+        do not exist, are left unchanged.
+        """
+        for name in _MODE_SPLINE_NAMES:
+            splines = getattr(self, name, None)
+            if isinstance(splines, list):
+                setattr(self, name, _ModeSplines(splines))
+        self._evaluate_cache = None
+
+    def content_hash(self):
+        r"""
+        Returns a hash of the radial splines of the flux functions and of the
+        Fourier modes of all quantities, including :math:`K`, :math:`R`,
+        :math:`Z` and :math:`\nu`, and of the mode numbers, see
+        :meth:`BoozerMagneticField.content_hash`. It is the same on all ranks of
+        ``comm``, and computing it does not communicate.
+        """
+        key = hashlib.sha256(json.dumps(
+            [self.field_type, self.helicity_M, self.helicity_N, bool(self.rescale)], default=float).encode())
+        for name in _STATE_NAMES:
+            value = getattr(self, name, None)
+            key.update(name.encode())
+            if isinstance(value, _ModeSplines):
+                arrays = [value.knots, value.coefs, value.degree]
+            elif isinstance(value, UnivariateSpline):
+                arrays = list(value._eval_args)
+            elif value is None:
+                arrays = []
+            else:
+                arrays = [value]
+            for array in arrays:
+                key.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+                key.update(b"|")
+        return key.hexdigest()
+
+    def _bcast_state(self, names):
+        # Broadcasts the given attributes from rank 0 of comm. The knots and
+        # coefficients of all splines and the arrays are packed into one buffer,
+        # which is sent with a single Bcast, and the splines are rebuilt from it on
+        # the other ranks. Other attributes, e.g. scalars, are sent in the small
+        # header, which also describes the layout of the buffer.
+        header = None
+        if self.comm.rank == 0:
+            entries = []
+            blocks = []
+            for name in names:
+                value = getattr(self, name, None)
+                if isinstance(value, _ModeSplines):
+                    entries.append((name, "modes", value.coefs.shape, len(value.knots), value.degree))
+                    blocks += [value.knots, value.coefs.ravel()]
+                elif isinstance(value, UnivariateSpline):
+                    t, c, k = value._eval_args
+                    entries.append((name, "spline", len(t), len(c), k))
+                    blocks += [t, c]
+                elif isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+                    entries.append((name, "array", value.shape, value.dtype.str))
+                    blocks.append(value.ravel())
+                else:
+                    entries.append((name, "object", value))
+            blocks = [np.asarray(block, dtype=np.float64) for block in blocks]
+            header = (entries, sum(block.size for block in blocks))
+        entries, size = self.comm.bcast(header, root=0)
+        if self.comm.rank == 0:
+            buffer = np.concatenate(blocks) if len(blocks) > 0 else np.zeros(0)
+        else:
+            buffer = np.empty(size)
+        self.comm.Bcast([buffer, MPI.DOUBLE], root=0)
+        if self.comm.rank == 0:
+            return
+
+        offset = 0
+
+        def _take(n):
+            nonlocal offset
+            offset += n
+            return buffer[offset - n:offset]
+
+        for entry in entries:
+            name, kind = entry[:2]
+            if kind == "modes":
+                shape, nknots, degree = entry[2:]
+                knots = _take(nknots)
+                coefs = _take(shape[0] * shape[1]).reshape(shape)
+                value = _ModeSplines(None, knots, coefs, degree)
+            elif kind == "spline":
+                nknots, ncoefs, degree = entry[2:]
+                value = InterpolatedUnivariateSpline._from_tck((_take(nknots), _take(ncoefs), degree))
+            elif kind == "array":
+                shape, dtype = entry[2:]
+                value = _take(int(np.prod(shape))).astype(dtype).reshape(shape)
+            else:
+                value = entry[2]
+            setattr(self, name, value)
+
     def init_splines(self):
         self.xm_b = self.bx.xm_b
         self.xn_b = self.bx.xn_b
@@ -1442,133 +1472,97 @@ class BoozerRadialInterpolant(BoozerMagneticField):
         thetas = thetas.flatten()
         zetas = zetas.flatten()
 
-        if self.comm is not None:
-            size = self.comm.size
-            rank = self.comm.rank
-
-            angle_idxs = np.array([i * len(thetas) // size for i in range(size + 1)])
-            first, last = angle_idxs[rank], angle_idxs[rank + 1]
+        # The harmonics on the extended half grid, with shape (ns, nmodes) padded
+        # to the simd width. The splines of all modes are evaluated together.
+        nmodes = len(self.xm_b)
+        mn_factor = self.mn_factor_splines(self.s_half_ext)
+        d_mn_factor = self.d_mn_factor_splines(self.s_half_ext)
+        half = {}
+        harmonics = ["bmnc", "rmnc", "zmns", "numns"]
+        if self.asym:
+            harmonics += ["bmns", "rmns", "zmnc", "numnc"]
+        for harmonic in harmonics:
+            values = getattr(self, harmonic + "_splines")(self.s_half_ext) / mn_factor
+            half[harmonic] = align_and_pad(values.T)
+            if harmonic[0] != "b":
+                dvalues = (getattr(self, "d" + harmonic + "ds_splines")(self.s_half_ext) - values * d_mn_factor) / mn_factor
+                half["d" + harmonic + "ds"] = align_and_pad(dvalues.T)
+        G_half = self.G_spline(self.s_half_ext)
+        I_half = self.I_spline(self.s_half_ext)
+        iota_half = self.iota_spline(self.s_half_ext)
 
+        key = None
+        if self.K_cache_path is not None:
+            key = hashlib.sha256(json.dumps([ntheta, nzeta, int(self.nfp), float(self.psi0), bool(self.asym)]).encode())
+            for array in [self.xm_b, self.xn_b, G_half, I_half, iota_half] + [half[name] for name in sorted(half)]:
+                key.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+            key = key.hexdigest()
+            cached = self._load_K_cache(key) if self.proc0 else None
+            if self.comm is not None:
+                cached = self.comm.bcast(cached, root=0)
+        if key is None or cached is None:
+            kmns, kmnc = self._compute_kmns_kmnc(half, G_half, I_half, iota_half, thetas, zetas)
+            kmns = kmns[:, :nmodes] * dtheta * dzeta * self.nfp / self.psi0
             if self.asym:
-                kmnc_buffer = allocate_aligned_and_padded_array(
-                    (len(self.s_half_ext), len(self.xm_b))
-                )
-            kmns_buffer = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            thetas = thetas[first:last]
-            zetas = zetas[first:last]
+                kmnc = kmnc[:, :nmodes] * dtheta * dzeta * self.nfp / self.psi0
+            if key is not None and self.proc0:
+                self._save_K_cache(key, kmns, kmnc)
+        else:
+            kmns, kmnc = cached
 
-        dzmnsds_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        drmncds_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        dnumnsds_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        bmnc_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        rmnc_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        zmns_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        numns_half = allocate_aligned_and_padded_array(
-            (len(self.s_half_ext), len(self.xm_b))
-        )
-        kmns = allocate_aligned_and_padded_array((len(self.s_half_ext), len(self.xm_b)))
-        if self.asym:
-            dzmncds_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            drmnsds_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            dnumncds_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            bmns_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            rmns_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            zmnc_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            numnc_half = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
-            kmnc = allocate_aligned_and_padded_array(
-                (len(self.s_half_ext), len(self.xm_b))
-            )
+        if self.proc0:
+            kmns_half = mn_factor.T * kmns
+            if self.enforce_qs:
+                kmns_half[:, self.helicity_M * self.xn_b != self.helicity_N * self.xm_b] = 0
+            self.kmns_splines = [
+                InterpolatedUnivariateSpline(self.s_half_ext, kmns_half[:, im], k=self.order)
+                for im in range(nmodes)
+            ]
 
-        for im in range(len(self.xm_b)):
-            mn_factor = self.mn_factor_splines[im](self.s_half_ext)
-            d_mn_factor = self.d_mn_factor_splines[im](self.s_half_ext)
-            bmnc_half[:, im] = self.bmnc_splines[im](self.s_half_ext) / mn_factor
-            rmnc_half[:, im] = self.rmnc_splines[im](self.s_half_ext) / mn_factor
-            zmns_half[:, im] = self.zmns_splines[im](self.s_half_ext) / mn_factor
-            numns_half[:, im] = self.numns_splines[im](self.s_half_ext) / mn_factor
-            dnumnsds_half[:, im] = (
-                self.dnumnsds_splines[im](self.s_half_ext)
-                - numns_half[:, im] * d_mn_factor
-            ) / mn_factor
-            drmncds_half[:, im] = (
-                self.drmncds_splines[im](self.s_half_ext)
-                - rmnc_half[:, im] * d_mn_factor
-            ) / mn_factor
-            dzmnsds_half[:, im] = (
-                self.dzmnsds_splines[im](self.s_half_ext)
-                - zmns_half[:, im] * d_mn_factor
-            ) / mn_factor
             if self.asym:
-                bmns_half[:, im] = self.bmns_splines[im](self.s_half_ext) / mn_factor
-                rmns_half[:, im] = self.rmns_splines[im](self.s_half_ext) / mn_factor
-                zmnc_half[:, im] = self.zmnc_splines[im](self.s_half_ext) / mn_factor
-                numnc_half[:, im] = self.numnc_splines[im](self.s_half_ext) / mn_factor
-                dnumncds_half[:, im] = (
-                    self.dnumncds_splines[im](self.s_half_ext)
-                    - numnc_half[:, im] * d_mn_factor
-                ) / mn_factor
-                drmnsds_half[:, im] = (
-                    self.drmnsds_splines[im](self.s_half_ext)
-                    - rmns_half[:, im] * d_mn_factor
-                ) / mn_factor
-                dzmncds_half[:, im] = (
-                    self.dzmncds_splines[im](self.s_half_ext)
-                    - zmnc_half[:, im] * d_mn_factor
-                ) / mn_factor
+                kmnc_half = mn_factor.T * kmnc
+                if self.enforce_qs:
+                    kmnc_half[:, self.helicity_M * self.xn_b != self.helicity_N * self.xm_b] = 0
+                self.kmnc_splines = [
+                    InterpolatedUnivariateSpline(self.s_half_ext, kmnc_half[:, im], k=self.order)
+                    for im in range(nmodes)
+                ]
 
-        G_half = self.G_spline(self.s_half_ext)
-        I_half = self.I_spline(self.s_half_ext)
-        iota_half = self.iota_spline(self.s_half_ext)
+            self.stack_splines()
+        if self.comm is not None:
+            self._bcast_state(["kmns_splines", "kmnc_splines"])
 
+    def _compute_kmns_kmnc(self, half, G_half, I_half, iota_half, thetas, zetas):
+        # Computes the unnormalized harmonics of K with the padded shape of the
+        # harmonics in half. The angle points are split over the ranks of comm.
+        if self.comm is not None:
+            first, last = parallel_loop_bounds(self.comm, len(thetas))
+            thetas = thetas[first:last]
+            zetas = zetas[first:last]
+        shape = half["rmnc"].shape
         xm_b = align_and_pad(self.xm_b)
         xn_b = align_and_pad(self.xn_b)
-
+        kmns = allocate_aligned_and_padded_array(shape)
+        kmnc = None
         if self.asym:
+            kmnc = allocate_aligned_and_padded_array(shape)
             sopp.compute_kmnc_kmns(
                 kmnc,
                 kmns,
-                rmnc_half,
-                drmncds_half,
-                zmns_half,
-                dzmnsds_half,
-                numns_half,
-                dnumnsds_half,
-                bmnc_half,
-                rmns_half,
-                drmnsds_half,
-                zmnc_half,
-                dzmncds_half,
-                numnc_half,
-                dnumncds_half,
-                bmns_half,
+                half["rmnc"],
+                half["drmncds"],
+                half["zmns"],
+                half["dzmnsds"],
+                half["numns"],
+                half["dnumnsds"],
+                half["bmnc"],
+                half["rmns"],
+                half["drmnsds"],
+                half["zmnc"],
+                half["dzmncds"],
+                half["numnc"],
+                half["dnumncds"],
+                half["bmns"],
                 iota_half,
                 G_half,
                 I_half,
@@ -1577,18 +1571,16 @@ class BoozerRadialInterpolant(BoozerMagneticField):
                 thetas,
                 zetas,
             )
-
-            kmnc = kmnc * dtheta * dzeta * self.nfp / self.psi0
         else:
             sopp.compute_kmns(
                 kmns,
-                rmnc_half,
-                drmncds_half,
-                zmns_half,
-                dzmnsds_half,
-                numns_half,
-                dnumnsds_half,
-                bmnc_half,
+                half["rmnc"],
+                half["drmncds"],
+                half["zmns"],
+                half["dzmnsds"],
+                half["numns"],
+                half["dnumnsds"],
+                half["bmnc"],
                 iota_half,
                 G_half,
                 I_half,
@@ -1597,463 +1589,92 @@ class BoozerRadialInterpolant(BoozerMagneticField):
                 thetas,
                 zetas,
             )
-        kmns = kmns * dtheta * dzeta * self.nfp / self.psi0
         if self.comm is not None:
-            if self.asym:
-                self.comm.Allreduce([kmnc, MPI.DOUBLE], kmnc_buffer, op=MPI.SUM)
-                kmnc = kmnc_buffer
+            kmns_buffer = np.zeros(shape)
             self.comm.Allreduce([kmns, MPI.DOUBLE], kmns_buffer, op=MPI.SUM)
             kmns = kmns_buffer
-        if self.proc0:
-            self.kmns_splines = []
-            for im in range(len(self.xm_b)):
-                if (self.enforce_qs and (self.helicity_M *self.xn_b[im] != self.helicity_N * self.xm_b[im])):
-                    self.kmns_splines.append(
-                        InterpolatedUnivariateSpline(
-                            self.s_half_ext, 0 * kmns[:, im], k=self.order
-                        )
-                    )
-                else:
-                    self.kmns_splines.append(
-                        InterpolatedUnivariateSpline(
-                            self.s_half_ext,
-                            self.mn_factor_splines[im](self.s_half_ext) * kmns[:, im],
-                            k=self.order,
-                        )
-                    )
-
             if self.asym:
-                self.kmnc_splines = []
-                for im in range(len(self.xm_b)):
-                    if (self.enforce_qs and (self.helicity_M *self.xn_b[im] != self.helicity_N * self.xm_b[im])):
-                        self.kmnc_splines.append(
-                            InterpolatedUnivariateSpline(
-                                self.s_half_ext, 0 * kmnc[:, im], k=self.order
-                            )
-                        )
-                    else:
-                        self.kmnc_splines.append(
-                            InterpolatedUnivariateSpline(
-                                self.s_half_ext,
-                                self.mn_factor_splines[im](self.s_half_ext)
-                                * kmnc[:, im],
-                                k=self.order,
-                            )
-                        )
-
-        if self.comm is not None:
-            self.kmns_splines = self.comm.bcast(self.kmns_splines, root=0)
-            if self.asym:
-                self.kmnc_splines = self.comm.bcast(self.kmnc_splines, root=0)
+                kmnc_buffer = np.zeros(shape)
+                self.comm.Allreduce([kmnc, MPI.DOUBLE], kmnc_buffer, op=MPI.SUM)
+                kmnc = kmnc_buffer
+        return kmns, kmnc
+
+    def _load_K_cache(self, key):
+        # Returns (kmns, kmnc) from the cache file if it was written for the same
+        # inputs, and None otherwise.
+        try:
+            with np.load(self.K_cache_path) as data:
+                if str(data["key"]) != key:
+                    return None
+                return data["kmns"], (data["kmnc"] if self.asym else None)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save_K_cache(self, key, kmns, kmnc):
+        arrays = {"key": np.array(key), "kmns": kmns}
+        if kmnc is not None:
+            arrays["kmnc"] = kmnc
+        tmp_path = _temporary_path(self.K_cache_path)
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.K_cache_path)
 
     def _K_impl(self, K):
-        K[:, 0] = 0.0
-        if self.no_K:
-            return
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return self.kmns_splines[im](s) / self.mn_factor_splines[im](s)
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(K[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return self.kmnc_splines[im](s) / self.mn_factor_splines[im](s)
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(K[:, 0], _harmonics, inverse_fourier)
+        K[:, 0] = self._evaluate_cached("K")
 
     def _dKdtheta_impl(self, dKdtheta):
-        dKdtheta[:, 0] = 0.0
-        if self.no_K:
-            return
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                self.kmns_splines[im](s) * self.xm_b[im] / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dKdtheta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    -self.kmnc_splines[im](s)
-                    * self.xm_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dKdtheta[:, 0], _harmonics, inverse_fourier)
+        dKdtheta[:, 0] = self._evaluate_cached("dKdtheta")
 
     def _dKdzeta_impl(self, dKdzeta):
-        dKdzeta[:, 0] = 0.0
-        if self.no_K:
-            return
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                -self.kmns_splines[im](s)
-                * self.xn_b[im]
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dKdzeta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    self.kmnc_splines[im](s)
-                    * self.xn_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dKdzeta[:, 0], _harmonics, inverse_fourier)
+        dKdzeta[:, 0] = self._evaluate_cached("dKdzeta")
 
     def _nu_impl(self, nu):
-        nu[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return self.numns_splines[im](s) / self.mn_factor_splines[im](s)
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(nu[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return self.numnc_splines[im](s) / self.mn_factor_splines[im](s)
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(nu[:, 0], _harmonics, inverse_fourier)
+        nu[:, 0] = self._evaluate_cached("nu")
 
     def _dnudtheta_impl(self, dnudtheta):
-        dnudtheta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                self.numns_splines[im](s)
-                * self.xm_b[im]
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dnudtheta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    -self.numnc_splines[im](s)
-                    * self.xm_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dnudtheta[:, 0], _harmonics, inverse_fourier)
+        dnudtheta[:, 0] = self._evaluate_cached("dnudtheta")
 
     def _dnudzeta_impl(self, dnudzeta):
-        dnudzeta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                -self.numns_splines[im](s)
-                * self.xn_b[im]
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dnudzeta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    self.numnc_splines[im](s)
-                    * self.xn_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dnudzeta[:, 0], _harmonics, inverse_fourier)
+        dnudzeta[:, 0] = self._evaluate_cached("dnudzeta")
 
     def _dnuds_impl(self, dnuds):
-        dnuds[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            d_mn_factor = self.d_mn_factor_splines[im](s)
-            mn_factor = self.mn_factor_splines[im](s)
-            return (
-                self.dnumnsds_splines[im](s)
-                - self.numns_splines[im](s) * d_mn_factor / mn_factor
-            ) / mn_factor
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dnuds[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
+        dnuds[:, 0] = self._evaluate_cached("dnuds")
 
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                d_mn_factor = self.d_mn_factor_splines[im](s)
-                mn_factor = self.mn_factor_splines[im](s)
-                return (
-                    self.dnumncds_splines[im](s)
-                    - self.numnc_splines[im](s) * d_mn_factor / mn_factor
-                ) / mn_factor
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dnuds[:, 0], _harmonics, inverse_fourier)
+    def _R_impl(self, R):
+        R[:, 0] = self._evaluate_cached("R")
 
     def _dRdtheta_impl(self, dRdtheta):
-        dRdtheta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                -self.rmnc_splines[im](s)
-                * self.xm_b[im]
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dRdtheta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    self.rmns_splines[im](s)
-                    * self.xm_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dRdtheta[:, 0], _harmonics, inverse_fourier)
+        dRdtheta[:, 0] = self._evaluate_cached("dRdtheta")
 
     def _dRdzeta_impl(self, dRdzeta):
-        dRdzeta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                self.rmnc_splines[im](s) * self.xn_b[im] / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dRdzeta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    -self.rmns_splines[im](s)
-                    * self.xn_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dRdzeta[:, 0], _harmonics, inverse_fourier)
+        dRdzeta[:, 0] = self._evaluate_cached("dRdzeta")
 
     def _dRds_impl(self, dRds):
-        dRds[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            d_mn_factor = self.d_mn_factor_splines[im](s)
-            mn_factor = self.mn_factor_splines[im](s)
-            return (
-                self.drmncds_splines[im](s)
-                - self.rmnc_splines[im](s) * d_mn_factor / mn_factor
-            ) / mn_factor
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dRds[:, 0], _harmonics, inverse_fourier)
+        dRds[:, 0] = self._evaluate_cached("dRds")
 
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                d_mn_factor = self.d_mn_factor_splines[im](s)
-                mn_factor = self.mn_factor_splines[im](s)
-                return (
-                    self.drmnsds_splines[im](s)
-                    - self.rmns_splines[im](s) * d_mn_factor / mn_factor
-                ) / mn_factor
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dRds[:, 0], _harmonics, inverse_fourier)
-
-    def _R_impl(self, R):
-        R[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return self.rmnc_splines[im](s) / self.mn_factor_splines[im](s)
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(R[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return self.rmns_splines[im](s) / self.mn_factor_splines[im](s)
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(R[:, 0], _harmonics, inverse_fourier)
+    def _Z_impl(self, Z):
+        Z[:, 0] = self._evaluate_cached("Z")
 
     def _dZdtheta_impl(self, dZdtheta):
-        dZdtheta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                self.zmns_splines[im](s) * self.xm_b[im] / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dZdtheta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    -self.zmnc_splines[im](s)
-                    * self.xm_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dZdtheta[:, 0], _harmonics, inverse_fourier)
+        dZdtheta[:, 0] = self._evaluate_cached("dZdtheta")
 
     def _dZdzeta_impl(self, dZdzeta):
-        dZdzeta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                -self.zmns_splines[im](s)
-                * self.xn_b[im]
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dZdzeta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    self.zmnc_splines[im](s)
-                    * self.xn_b[im]
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(dZdzeta[:, 0], _harmonics, inverse_fourier)
+        dZdzeta[:, 0] = self._evaluate_cached("dZdzeta")
 
     def _dZds_impl(self, dZds):
-        dZds[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            d_mn_factor = self.d_mn_factor_splines[im](s)
-            mn_factor = self.mn_factor_splines[im](s)
-            return (
-                self.dzmnsds_splines[im](s)
-                - self.zmns_splines[im](s) * d_mn_factor / mn_factor
-            ) / mn_factor
+        dZds[:, 0] = self._evaluate_cached("dZds")
 
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dZds[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                d_mn_factor = self.d_mn_factor_splines[im](s)
-                mn_factor = self.mn_factor_splines[im](s)
-                return (
-                    self.dzmncds_splines[im](s)
-                    - self.zmnc_splines[im](s) * d_mn_factor / mn_factor
-                ) / mn_factor
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dZds[:, 0], _harmonics, inverse_fourier)
-
-    def _Z_impl(self, Z):
-        Z[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return self.zmns_splines[im](s) / self.mn_factor_splines[im](s)
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(Z[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
+    def _modB_impl(self, modB):
+        modB[:, 0] = self._evaluate_cached("modB")
 
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return self.zmnc_splines[im](s) / self.mn_factor_splines[im](s)
+    def _dmodBdtheta_impl(self, dmodBdtheta):
+        dmodBdtheta[:, 0] = self._evaluate_cached("dmodBdtheta")
 
-            inverse_fourier = sopp.inverse_fourier_transform_even
+    def _dmodBdzeta_impl(self, dmodBdzeta):
+        dmodBdzeta[:, 0] = self._evaluate_cached("dmodBdzeta")
 
-            self._compute_impl(Z[:, 0], _harmonics, inverse_fourier)
+    def _dmodBds_impl(self, dmodBds):
+        dmodBds[:, 0] = self._evaluate_cached("dmodBds")
 
     def _psip_impl(self, psip):
         points = self.get_points_ref()
@@ -2097,182 +1718,145 @@ class BoozerRadialInterpolant(BoozerMagneticField):
         us, inv = np.unique(s, return_inverse=True)
         diotads[:] = self.diotads_spline(us)[inv][:, None]
 
-    def _modB_impl(self, modB):
-        modB[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return self.bmnc_splines[im](s) / self.mn_factor_splines[im](s)
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(modB[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return self.bmns_splines[im](s) / self.mn_factor_splines[im](s)
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
-
-            self._compute_impl(modB[:, 0], _harmonics, inverse_fourier)
-
-    def _dmodBdtheta_impl(self, dmodBdtheta):
-        dmodBdtheta[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                -self.xm_b[im]
-                * self.bmnc_splines[im](s)
-                / self.mn_factor_splines[im](s)
-            )
-
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dmodBdtheta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    self.xm_b[im]
-                    * self.bmns_splines[im](s)
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dmodBdtheta[:, 0], _harmonics, inverse_fourier)
+    def evaluate(self, quantities):
+        r"""
+        Evaluates several quantities that are given by a Fourier series in the
+        Boozer angles, e.g. ``modB``, ``dmodBdtheta``, ``R`` or ``dKdzeta``, at the
+        current points in one pass. The radial splines of each set of harmonics are
+        evaluated once at the distinct values of ``s``, and the table of sines and
+        cosines of the Fourier modes is computed once for each point and shared by
+        all quantities, see :func:`simsoptpp.inverse_fourier_transform_terms`. If
+        ``comm`` is not ``None``, the Fourier modes are split over its ranks, and all
+        ranks have to call this method.
 
-    def _dmodBdzeta_impl(self, dmodBdzeta):
-        dmodBdzeta[:, 0] = 0.0
+        Args:
+            quantities: list of the names of the quantities, see
+                ``_FOURIER_QUANTITIES``.
 
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            return (
-                self.xn_b[im] * self.bmnc_splines[im](s) / self.mn_factor_splines[im](s)
+        Returns:
+            A dictionary with the values of each quantity at the points, as an
+            array of shape ``(npoints,)``.
+        """
+        points = self.get_points_ref()
+        npoints = points.shape[0]
+        us, inv = np.unique(points[:, 0], return_inverse=True)
+        modes = slice(*parallel_loop_bounds(self.comm, len(self.xm_b)))
+        terms = self._fourier_terms(quantities, modes, us)
+
+        output = np.zeros((len(quantities), npoints))
+        if len(terms) > 0 and modes.stop > modes.start:
+            sopp.inverse_fourier_transform_terms(
+                output,
+                np.ascontiguousarray(np.stack([coefs.T for _, coefs, _ in terms])),
+                [int(is_odd) for _, _, is_odd in terms],
+                [iq for iq, _, _ in terms],
+                np.ascontiguousarray(self.xm_b[modes], dtype=np.float64),
+                np.ascontiguousarray(self.xn_b[modes], dtype=np.float64),
+                np.ascontiguousarray(points[:, 1]),
+                np.ascontiguousarray(points[:, 2]),
+                inv.astype(np.int64).ravel(),
+                int(self.nfp),
             )
+        if self.comm is not None:
+            recv_buffer = np.zeros(output.shape)
+            self.comm.Allreduce([output, MPI.DOUBLE], recv_buffer, op=MPI.SUM)
+            output = recv_buffer
+        return {quantity: output[iq] for iq, quantity in enumerate(quantities)}
 
-        inverse_fourier = sopp.inverse_fourier_transform_odd
-
-        self._compute_impl(dmodBdzeta[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                return (
-                    -self.xn_b[im]
-                    * self.bmns_splines[im](s)
-                    / self.mn_factor_splines[im](s)
-                )
-
-            inverse_fourier = sopp.inverse_fourier_transform_even
-
-            self._compute_impl(dmodBdzeta[:, 0], _harmonics, inverse_fourier)
-
-    def _dmodBds_impl(self, dmodBds):
-        dmodBds[:, 0] = 0.0
-
-        @self.iterate_and_invert
-        def _harmonics(im, s):
-            mn_factor = self.mn_factor_splines[im](s)
-            d_mn_factor = self.d_mn_factor_splines[im](s)
-            return (
-                self.dbmncds_splines[im](s)
-                - self.bmnc_splines[im](s) * d_mn_factor / mn_factor
-            ) / mn_factor
-
-        inverse_fourier = sopp.inverse_fourier_transform_even
-
-        self._compute_impl(dmodBds[:, 0], _harmonics, inverse_fourier)
-
-        if self.asym:
-
-            @self.iterate_and_invert
-            def _harmonics(im, s):
-                mn_factor = self.mn_factor_splines[im](s)
-                d_mn_factor = self.d_mn_factor_splines[im](s)
-                return (
-                    self.dbmnsds_splines[im](s)
-                    - self.bmns_splines[im](s) * d_mn_factor / mn_factor
-                ) / mn_factor
-
-            inverse_fourier = sopp.inverse_fourier_transform_odd
+    def evaluate_grid(self, quantities, s, ntheta, nzeta):
+        r"""
+        Evaluates several quantities that are given by a Fourier series in the
+        Boozer angles on the tensor grid of the surfaces ``s``, the angles
+        :math:`\theta_j = 2\pi j/n_\theta` and :math:`\zeta_k = 2\pi k/(n_{fp} n_\zeta)`,
+        as used e.g. by :func:`simsopt.field.initialize_position_profile`. The sums
+        over the Fourier modes are computed with a 2D FFT on each surface, which
+        costs :math:`O(n_\theta n_\zeta \log(n_\theta n_\zeta))` instead of
+        :math:`O(n_\theta n_\zeta n_{modes})` operations. Modes that are not resolved
+        by the grid are aliased, so the result agrees with :meth:`evaluate` at the
+        grid points for any grid size. If ``comm`` is not ``None``, the Fourier modes
+        are split over its ranks, and all ranks have to call this method.
 
-            self._compute_impl(dmodBds[:, 0], _harmonics, inverse_fourier)
+        Args:
+            quantities: list of the names of the quantities, see
+                ``_FOURIER_QUANTITIES``.
+            s: array of the values of the normalized toroidal flux of the surfaces.
+            ntheta: number of grid points in :math:`\theta`.
+            nzeta: number of grid points in :math:`\zeta` on one field period.
 
-    def _compute_impl(self, output, harmonics, inverse_fourier):
+        Returns:
+            A dictionary with the values of each quantity on the grid, as an array
+            of shape ``(len(s), ntheta, nzeta)``.
+        """
+        s = np.atleast_1d(np.asarray(s, dtype=np.float64))
+        modes = slice(*parallel_loop_bounds(self.comm, len(self.xm_b)))
+        terms = self._fourier_terms(quantities, modes, s)
+
+        # The sum over the modes at the grid points is the real part of the inverse
+        # DFT of the complex amplitudes, with mode (m, n) at index
+        # (m mod ntheta, -n/nfp mod nzeta).
+        rows = np.rint(self.xm_b[modes]).astype(int) % ntheta
+        cols = (-np.rint(self.xn_b[modes] / self.nfp).astype(int)) % nzeta
+        amplitudes = np.zeros((len(quantities), len(s), ntheta, nzeta), dtype=np.complex128)
+        for iq, coefs, is_odd in terms:
+            np.add.at(amplitudes[iq], (slice(None), rows, cols), (-1j * coefs if is_odd else coefs).T)
+        output = np.ascontiguousarray(np.fft.ifft2(amplitudes, axes=(-2, -1)).real) * (ntheta * nzeta)
         if self.comm is not None:
-            size = self.comm.size
-            rank = self.comm.rank
-
-            mn_idxs = np.array([i * len(self.xm_b) // size for i in range(size + 1)])
-            first_mn, last_mn = mn_idxs[rank], mn_idxs[rank + 1]
             recv_buffer = np.zeros(output.shape)
-        else:
-            first_mn, last_mn = 0, len(self.xm_b)
-
+            self.comm.Allreduce([output, MPI.DOUBLE], recv_buffer, op=MPI.SUM)
+            output = recv_buffer
+        return {quantity: output[iq] for iq, quantity in enumerate(quantities)}
+
+    def _fourier_terms(self, quantities, modes, us):
+        # Returns the Fourier coefficients of the quantities for the given modes at
+        # the radii us, as a list of (index of the quantity, coefficients of shape
+        # (nmodes, len(us)), whether the coefficients multiply sin instead of cos).
+        for quantity in quantities:
+            if quantity not in _FOURIER_QUANTITIES:
+                raise ValueError(f"{quantity} is not given by a Fourier series.")
+        splines = {}
+
+        def _spline(name):
+            if name not in splines:
+                splines[name] = getattr(self, name + "_splines")[modes](us)
+            return splines[name]
+
+        xm = self.xm_b[modes, None]
+        xn = self.xn_b[modes, None]
+        terms = []
+        for iq, quantity in enumerate(quantities):
+            family, deriv = _FOURIER_QUANTITIES[quantity]
+            if family == "K" and self.no_K:
+                continue
+            harmonics = _FOURIER_FAMILIES[family] if self.asym else _FOURIER_FAMILIES[family][:1]
+            for harmonic in harmonics:
+                # e.g. bmnc are the cosine and bmns the sine harmonics
+                is_odd = harmonic.endswith("s")
+                mn_factor = _spline("mn_factor")
+                values = _spline(harmonic) / mn_factor
+                if deriv == "theta":
+                    values = (xm if is_odd else -xm) * values
+                    is_odd = not is_odd
+                elif deriv == "zeta":
+                    values = (-xn if is_odd else xn) * values
+                    is_odd = not is_odd
+                elif deriv == "s":
+                    values = (_spline("d" + harmonic + "ds") - values * _spline("d_mn_factor")) / mn_factor
+                terms.append((iq, values, is_odd))
+        return terms
+
+    def _evaluate_cached(self, quantity):
+        # Evaluates the quantity together with all other quantities of the same
+        # Fourier series, e.g. modB with its derivatives, and keeps the values
+        # until the points change.
         points = self.get_points_ref()
-        s = points[:, 0]
-        thetas = points[:, 1]
-        zetas = points[:, 2]
-        us, inv = np.unique(s, return_inverse=True)
-        if len(s) > 1:
-            padded_thetas = align_and_pad(thetas)
-            padded_zetas = align_and_pad(zetas)
-            padded_buffer = allocate_aligned_and_padded_array(output.shape)
-            chunk_mn = allocate_aligned_and_padded_array((last_mn - first_mn, len(inv)))
-            # release memory manually. maybe not be needed anymore
-            s, thetas, zetas = None, None, None
-            harmonics(us, chunk_mn, inv, 0, last_mn - first_mn, first_mn)
-            xm = self.xm_b[first_mn:last_mn]
-            xn = self.xn_b[first_mn:last_mn]
-        else:
-            padded_thetas = thetas
-            padded_zetas = zetas
-            padded_buffer = np.zeros(output.shape)
-            chunk_mn = allocate_aligned_and_padded_array((last_mn - first_mn,))
-            harmonics(us, chunk_mn, inv, 0, last_mn - first_mn, first_mn)
-            xm = align_and_pad(self.xm_b[first_mn:last_mn])
-            xn = align_and_pad(self.xn_b[first_mn:last_mn])
-
-        inverse_fourier(
-            padded_buffer,
-            chunk_mn,
-            xm,
-            xn,
-            padded_thetas,
-            padded_zetas,
-            self.ntor,
-            self.nfp,
-        )
-        chunk_mn, padded_thetas, padded_zetas = None, None, None
-
-        if self.comm is not None:
-            # In place reduce is slightly slower
-            # self.mpi.comm_world.Allreduce(MPI.IN_PLACE, [padded_buffer[:len(inv)], MPI.DOUBLE], op=MPI.SUM)
-            self.comm.Allreduce(
-                [padded_buffer[: len(inv)], MPI.DOUBLE], recv_buffer, op=MPI.SUM
-            )
-            output += recv_buffer
-        else:
-            output += padded_buffer[: len(inv)]
-
-    def iterate_and_invert(self, func):
-        def _f(us, output, inv, start, end, offset):
-            length = len(inv)
-            if length > 1:
-                for im in range(start, end):
-                    output[im, :length] = func(im + offset, us)[inv]
-            else:
-                for im in range(start, end):
-                    output[im] = func(im + offset, us)[inv]
-
-        return _f
+        cache = self._evaluate_cache
+        if cache is None or not np.array_equal(cache[0], points):
+            cache = self._evaluate_cache = (np.array(points), {})
+        if quantity not in cache[1]:
+            family = _FOURIER_QUANTITIES[quantity][0]
+            group = [q for q, (f, _) in _FOURIER_QUANTITIES.items() if f == family]
+            cache[1].update(self.evaluate(group))
+        return cache[1][quantity]
 
 
 class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField):
@@ -2282,7 +1866,9 @@ class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField)
     polynomial in (s,theta,zeta) of a given degree. The number of nodes in each direction
     are defined by ns_interp, ntheta_interp, and nzeta_interp. It is recommended to use 
     this field representation in the tracing loop due to its speed in comparison to 
-    :class:`BoozerRadialInterpolant`. 
+    :class:`BoozerRadialInterpolant`. The flux functions (psip, G, I, iota and their
+    radial derivatives) only depend on s and are interpolated together on the radial
+    grid alone.
     """
 
     def __init__(
@@ -2299,6 +1885,10 @@ class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField)
         nfp=None,
         stellsym=None,
         initialize=[],
+        pack_tracing_quantities=False,
+        tables_path=None,
+        shared_memory_comm=None,
+        comm=None,
     ):
         r"""
         Args:
@@ -2325,8 +1915,27 @@ class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField)
                       hence it makes sense to use ``thetamin=0`` and ``thetamax=np.pi``. By default
                       this is obtained from field.stellsym. 
             initialize: A list of strings, each of which is the name of a
-                field quantitty, e.g., `modB`, to be initialized when the interpolant is created.
-                By default, this list is determined by field.field_type.
+                field quantitty, e.g., `modB`, to be initialized when the interpolant is created,
+                or `tracing` for the interpolant of the packed tracing quantities, see
+                ``pack_tracing_quantities``. By default, this list is determined by
+                field.field_type.
+            pack_tracing_quantities: If True, tracing uses a single interpolant that
+                packs modB, its derivatives, and (if needed) K and its derivatives,
+                so that a single cell lookup serves all of them. In this case these
+                quantities are not part of the default initialize list, and the
+                packed interpolant is built together with the other tables.
+            tables_path: If given, the interpolation tables are loaded from this file
+                with :meth:`load` if it was saved for the same field and grid, and
+                are otherwise built and saved to this file with :meth:`save`.
+            shared_memory_comm: An MPI communicator. If given, the tables in
+                ``initialize`` are built once per node, distributed over the ranks
+                of the node, and placed in MPI shared memory that all ranks of the
+                node use, see :meth:`share_tables`. The shared memory is freed by
+                :meth:`close`.
+            comm: An MPI communicator. If given, the tables in ``initialize`` are
+                built together by all ranks of ``comm``, each of which evaluates the
+                underlying field on a part of the interpolation nodes, see
+                :meth:`build_tables`.
         """
         field_type = field.field_type.lower()
         assert field_type in ["", "vac", "nok"]
@@ -2358,6 +1967,9 @@ class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField)
                 initialize = initialize_nok
             elif field_type == "":
                 initialize = initialize_gen
+            if pack_tracing_quantities:
+                packed = ["modB", "modB_derivs", "K", "K_derivs"]
+                initialize = [item for item in initialize if item not in packed]
         else:
             if (
                 (field_type == "vac" and (initialize != initialize_vac))
@@ -2421,10 +2033,346 @@ class InterpolatedBoozerField(sopp.InterpolatedBoozerField, BoozerMagneticField)
             stellsym,
             field_type
         )
-
-        if initialize:
+        self.pack_tracing_quantities = pack_tracing_quantities
+        self._field = field
+        self._extrapolate = extrapolate
+        self._interp_nfp = nfp
+        self._interp_stellsym = stellsym
+
+        loaded = False
+        if tables_path is not None and os.path.exists(tables_path):
+            try:
+                self.load(tables_path)
+                loaded = True
+            except ValueError as e:
+                warnings.warn(f"Not using {tables_path}: {e}", RuntimeWarning)
+        # the tables are built and shared collectively, so all ranks have to agree
+        if comm is not None:
+            loaded = all(comm.allgather(loaded))
+        if shared_memory_comm is not None:
+            loaded = all(shared_memory_comm.allgather(loaded))
+
+        self._shared_windows = []
+        if not loaded:
+            tables = []
             for item in initialize:
-                getattr(self, item)()
+                table = "fluxfunctions" if item in _FLUXFUNCTION_NAMES else item
+                if table not in tables:
+                    tables.append(table)
+            if pack_tracing_quantities and "tracing" not in tables:
+                # built now instead of at the start of tracing, so that it is also
+                # shared and saved
+                tables.append("tracing")
+            if comm is not None:
+                self.build_tables(comm, tables)
+            if shared_memory_comm is not None:
+                node_comm = shared_memory_comm.Split_type(MPI.COMM_TYPE_SHARED)
+                if comm is None:
+                    # The ranks build different tables, so the comm of the
+                    # underlying field is not used to split the Fourier modes,
+                    # see build_tables.
+                    field_comm = getattr(field, "comm", None)
+                    if field_comm is not None:
+                        field.comm = None
+                    try:
+                        for idx, table in enumerate(tables):
+                            if idx % node_comm.size == node_comm.rank:
+                                self._build_table(table)
+                    finally:
+                        if field_comm is not None:
+                            field.comm = field_comm
+                self.share_tables(node_comm, tables)
+            elif comm is None:
+                for table in tables:
+                    if table in ("fluxfunctions", "tracing"):
+                        self._build_table(table)
+                self.build_interpolants([table for table in tables if table not in ("fluxfunctions", "tracing")])
+
+        if tables_path is not None and not loaded:
+            # All ranks have the same tables, which are written by one rank
+            if comm is not None:
+                writer = comm.rank == 0
+            elif shared_memory_comm is not None:
+                writer = shared_memory_comm.rank == 0
+            else:
+                writer = True
+            if writer:
+                self.save(tables_path)
+
+    def cache_key(self):
+        r"""
+        Returns a hash that identifies the interpolation tables of this field. It
+        depends on the type and the :meth:`~BoozerMagneticField.content_hash` of
+        the underlying field, on the grid ranges, the interpolation rule and the
+        simd width. If the underlying field does not provide a content hash, its
+        values at a few fixed points are used instead. Computing the key does not
+        communicate, so it can be called on a single rank.
+        """
+        field = self._field
+        params = {
+            "field": type(field).__name__,
+            "field_type": self.field_type,
+            "degree": self.rule.degree,
+            "srange": [float(x) for x in self.s_range],
+            "thetarange": [float(x) for x in self.theta_range],
+            "zetarange": [float(x) for x in self.zeta_range],
+            "extrapolate": bool(self._extrapolate),
+            "nfp": int(self._interp_nfp),
+            "stellsym": bool(self._interp_stellsym),
+            "alignment": sopp.simd_alignment(),
+            "content": field.content_hash(),
+        }
+        key = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+        if params["content"] is not None:
+            return key.hexdigest()
+        s, theta, zeta = np.meshgrid(
+            np.linspace(0.1, 0.9, 4),
+            np.linspace(0.3, 0.3 + 2 * np.pi, 3, endpoint=False),
+            np.linspace(0.2, 0.2 + 2 * np.pi, 3, endpoint=False),
+            indexing="ij",
+        )
+        points = np.ascontiguousarray(np.stack([s.ravel(), theta.ravel(), zeta.ravel()], axis=1))
+        quantities = ["psip", "G", "I", "iota", "modB"]
+        if self.field_type == "":
+            quantities.append("K")
+        # The key is also computed on a single rank, e.g. by save, so the comm
+        # of the underlying field is not used, see build_tables.
+        field_comm = getattr(field, "comm", None)
+        if field_comm is not None:
+            field.comm = None
+        old_points = field.get_points()
+        try:
+            field.set_points(points)
+            for quantity in quantities:
+                key.update(np.ascontiguousarray(getattr(field, quantity)(), dtype=np.float64).tobytes())
+        finally:
+            field.set_points(old_points)
+            if field_comm is not None:
+                field.comm = field_comm
+        return key.hexdigest()
+
+    def save(self, path):
+        r"""
+        Saves the interpolation tables that have been built so far to a file, which
+        can be loaded with :meth:`load` by a field with the same :meth:`cache_key`.
+        The file is written to a temporary file first and then renamed, so that
+        readers never see a partially written file.
+
+        Args:
+            path: the name of the file.
+        """
+        tables = []
+        blocks = []
+        offset = 0
+
+        def add_block(array):
+            nonlocal offset
+            array = np.ascontiguousarray(array)
+            blocks.append((offset, array))
+            block = [offset, array.dtype.str, int(array.size)]
+            offset += -(-array.nbytes // _TABLES_ALIGNMENT) * _TABLES_ALIGNMENT
+            return block
+
+        for name in _INTERPOLANT_NAMES:
+            interp = self.get_interpolant(name)
+            if interp is None:
+                continue
+            tables.append({
+                "name": name,
+                "value_size": interp.value_size,
+                "cell_to_local": add_block(interp.get_cell_to_local()),
+                "local_vals": add_block(interp.get_local_vals()),
+            })
+        interp = self.get_fluxfunction_interpolant()
+        if interp is not None:
+            tables.append({
+                "name": "fluxfunctions",
+                "value_size": interp.value_size,
+                "local_vals": add_block(interp.get_local_vals()),
+            })
+
+        header = json.dumps({"key": self.cache_key(), "tables": tables}).encode()
+        data_offset = -(-(16 + len(header)) // _TABLES_ALIGNMENT) * _TABLES_ALIGNMENT
+        tmp_path = _temporary_path(path)
+        with open(tmp_path, "wb") as f:
+            f.write(_TABLES_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for block_offset, array in blocks:
+                f.seek(data_offset + block_offset)
+                array.tofile(f)
+            f.truncate(data_offset + offset)
+        os.replace(tmp_path, path)
+
+    def load(self, path, mmap=True):
+        r"""
+        Loads interpolation tables saved with :meth:`save`. The loaded tables are
+        used instead of building them from the underlying field, and the
+        tables that were not saved are still built when they are first needed.
+
+        Args:
+            path: the name of the file.
+            mmap: If True, the tables are memory mapped read-only instead of being
+                read into memory, so that all processes on a node that load the same
+                file share one copy of the tables through the page cache.
+
+        Raises:
+            ValueError: if the file is not a table file or was saved for a field
+                with a different :meth:`cache_key`.
+        """
+        with open(path, "rb") as f:
+            if f.read(8) != _TABLES_MAGIC:
+                raise ValueError(f"{path} is not an interpolation table file")
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size).decode())
+        if header["key"] != self.cache_key():
+            raise ValueError(f"{path} was saved for a different field or grid")
+        data_offset = -(-(16 + header_size) // _TABLES_ALIGNMENT) * _TABLES_ALIGNMENT
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset)
+        else:
+            data = np.fromfile(path, dtype=np.uint8, offset=data_offset)
+
+        def get_block(block):
+            offset, dtype, size = block
+            dtype = np.dtype(dtype)
+            array = data[offset:offset + size * dtype.itemsize].view(dtype)
+            if not mmap and dtype == np.float64:
+                array = align_and_pad(array)[:size]
+            return array
+
+        for table in header["tables"]:
+            cell_to_local = get_block(table["cell_to_local"]) if "cell_to_local" in table else None
+            self._set_table(table["name"], table["value_size"], get_block(table["local_vals"]), cell_to_local)
+
+    def build_tables(self, comm, tables):
+        r"""
+        Builds interpolation tables together on all ranks of ``comm``. The
+        interpolation nodes of the 3D interpolants are split into contiguous parts,
+        each rank evaluates the underlying field on its part for all quantities at
+        once, and the values are gathered on all ranks with ``Allgatherv``, so that
+        every rank holds the complete table. The radial interpolant of the flux functions only has a
+        few nodes and is built on every rank.
+
+        While the tables are built, the ``comm`` of the underlying field, e.g. of a
+        :class:`BoozerRadialInterpolant`, is not used to split the Fourier modes,
+        since the ranks evaluate the field at different points.
+
+        Args:
+            comm: An MPI communicator. All of its ranks have to call this method.
+            tables: The names of the tables, i.e. names of quantities with a 3D
+                interpolant, or ``fluxfunctions`` for the radial interpolant of the
+                flux functions.
+        """
+        field = self._field
+        field_comm = getattr(field, "comm", None)
+        if field_comm is not None:
+            field.comm = None
+        try:
+            names = []
+            for table in tables:
+                if table in ("fluxfunctions", "tracing"):
+                    self._build_table(table)
+                else:
+                    names.append(table)
+            if len(names) == 0:
+                return
+            # All 3D interpolants share the same nodes, and the quantities are
+            # evaluated together on each batch of nodes.
+            first, last = parallel_loop_bounds(comm, self.get_interpolant_dof_count(names[0]))
+            all_vals = self.evaluate_interpolants_dofs(names, first, last)
+            for name, vals in zip(names, all_vals):
+                counts = np.array(comm.allgather(vals.size))
+                displs = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                dof_vals = np.empty(np.sum(counts))
+                comm.Allgatherv([vals, MPI.DOUBLE], [dof_vals, (counts, displs), MPI.DOUBLE])
+                self.set_interpolant_dof_values(name, dof_vals)
+        finally:
+            if field_comm is not None:
+                field.comm = field_comm
+
+    def share_tables(self, node_comm, tables):
+        r"""
+        Moves interpolation tables into MPI shared memory. Each table has to be
+        built on one rank of ``node_comm``, the table with index ``i`` on rank
+        ``i % node_comm.size``. That rank allocates a shared memory window with
+        ``MPI.Win.Allocate_shared`` and copies the table into it, and all ranks then
+        use the table in the window instead of a private copy.
+
+        Args:
+            node_comm: An MPI communicator whose ranks share memory, e.g. obtained
+                with ``comm.Split_type(MPI.COMM_TYPE_SHARED)``.
+            tables: The names of the tables, i.e. names of quantities with a 3D
+                interpolant, ``tracing`` for the packed tracing quantities, or
+                ``fluxfunctions`` for the radial interpolant of the flux functions.
+        """
+        for idx, table in enumerate(tables):
+            owner = idx % node_comm.size
+            info = None
+            if node_comm.rank == owner:
+                if table == "fluxfunctions":
+                    interp = self.get_fluxfunction_interpolant()
+                    cell_to_local = None
+                else:
+                    interp = self.get_interpolant(table)
+                    cell_to_local = interp.get_cell_to_local()
+                local_vals = interp.get_local_vals()
+                info = (interp.value_size, local_vals.size, cell_to_local)
+            value_size, size, cell_to_local = node_comm.bcast(info, root=owner)
+
+            itemsize = np.dtype(np.float64).itemsize
+            win = MPI.Win.Allocate_shared(size * itemsize if node_comm.rank == owner else 0, itemsize, comm=node_comm)
+            buf, _ = win.Shared_query(owner)
+            shared_vals = np.ndarray(buffer=buf, dtype=np.float64, shape=(size,))
+            if node_comm.rank == owner:
+                shared_vals[:] = local_vals
+                del interp, local_vals
+            node_comm.Barrier()
+            if shared_vals.ctypes.data % sopp.simd_alignment() != 0:
+                # The window is not aligned to the simd width, so this rank has to
+                # use a private copy of the table.
+                shared_vals = align_and_pad(shared_vals)[:size]
+            self._set_table(table, value_size, shared_vals, cell_to_local)
+            self._shared_windows.append((table, win))
+
+    def close(self):
+        r"""
+        Frees the MPI shared memory windows of the tables placed in shared memory
+        by :meth:`share_tables`. The tables are copied to private memory first, so
+        the field can still be evaluated, but evaluation contexts obtained with
+        ``clone()`` before must not be used anymore. All ranks of the node
+        communicator have to call this method.
+        """
+        for table, win in self._shared_windows:
+            if table == "fluxfunctions":
+                interp = self.get_fluxfunction_interpolant()
+                cell_to_local = None
+            else:
+                interp = self.get_interpolant(table)
+                cell_to_local = interp.get_cell_to_local()
+            local_vals = np.array(interp.get_local_vals())
+            self._set_table(table, interp.value_size, align_and_pad(local_vals)[:local_vals.size], cell_to_local)
+            del interp
+            win.Free()
+        self._shared_windows = []
+
+    def _build_table(self, name):
+        if name == "tracing":
+            # K is only needed for tracing in fields with field_type ""
+            self.build_tracing_interpolant(self.field_type == "")
+        else:
+            getattr(self, "psip" if name == "fluxfunctions" else name)()
+
+    def _set_table(self, name, value_size, local_vals, cell_to_local=None):
+        if name == "fluxfunctions":
+            interp = sopp.RegularGridInterpolant1D(self.rule, self.s_range, value_size, self._extrapolate)
+            interp.set_local_vals(local_vals)
+            self.set_fluxfunction_interpolant(interp)
+        else:
+            interp = sopp.RegularGridInterpolant3D(self.rule, self.s_range, self.theta_range, self.zeta_range,
+                                                  value_size, self._extrapolate)
+            interp.set_local_vals(cell_to_local, local_vals)
+            self.set_interpolant(name, interp)
 
 
 class ShearAlfvenWave(sopp.ShearAlfvenWave):
@@ -1,8 +1,10 @@
 from math import sqrt
 from warnings import warn
+import os
+import time
 import numpy as np
 import simsoptpp as sopp
-from .._core.util import parallel_loop_bounds
+from .._core.util import parallel_loop_bounds, parallel_loop_chunks, gather_rows
 from ..field.boozermagneticfield import BoozerMagneticField, ShearAlfvenWave
 from ..util.constants import (
     ALPHA_PARTICLE_MASS,
@@ -13,6 +15,8 @@ from ..util.functions import print, proc0_print
 from .._core.types import RealArray
 
 __all__ = [
+    "RaggedArray",
+    "TracingResult",
     "MinToroidalFluxStoppingCriterion",
     "MaxToroidalFluxStoppingCriterion",
     "IterationStoppingCriterion",
@@ -21,10 +25,527 @@ __all__ = [
     "compute_resonances",
     "compute_poloidal_transits",
     "compute_toroidal_transits",
+    "load_trajectories",
     "trace_particles_boozer",
 ]
 
 
+class RaggedArray:
+    r"""
+    A sequence of 2D arrays with the same number of columns, e.g. the trajectories
+    of several particles, stored in a single flat array. The rows of array ``i``
+    are ``data[offsets[i]:offsets[i+1], :]``. Indexing returns a view into ``data``,
+    so a :class:`RaggedArray` can be used in place of a list of arrays, while
+    quantities of all arrays (e.g. their last rows) can be computed without a
+    Python loop.
+
+    Args:
+        data: ``(nrows, ncols)`` array with the rows of all arrays.
+        offsets: ``(narrays + 1, )`` integer array with the index of the first row of
+            each array in ``data``, followed by ``nrows``.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        assert self.data.ndim == 2
+        assert self.offsets[0] == 0 and self.offsets[-1] == self.data.shape[0]
+
+    @classmethod
+    def from_list(cls, arrays, ncols):
+        """
+        Creates a :class:`RaggedArray` from a list of arrays with ``ncols`` columns.
+        Empty arrays may have any shape.
+        """
+        offsets = np.zeros((len(arrays) + 1,), dtype=np.int64)
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+        data = np.empty((offsets[-1], ncols))
+        for i, a in enumerate(arrays):
+            data[offsets[i]:offsets[i + 1], :] = np.reshape(a, (-1, ncols))
+        return cls(data, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("RaggedArray index out of range")
+        return self.data[self.offsets[i]:self.offsets[i + 1], :]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def lengths(self):
+        """Number of rows of each array."""
+        return np.diff(self.offsets)
+
+    def owners(self):
+        """Index of the array that each row of ``data`` belongs to."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def first_rows(self):
+        """``(narrays, ncols)`` array with the first row of each array, NaN for empty arrays."""
+        rows = np.full((len(self), self.data.shape[1]), np.nan)
+        nonempty = self.lengths > 0
+        rows[nonempty, :] = self.data[self.offsets[:-1][nonempty], :]
+        return rows
+
+    def last_rows(self):
+        """``(narrays, ncols)`` array with the last row of each array, NaN for empty arrays."""
+        rows = np.full((len(self), self.data.shape[1]), np.nan)
+        nonempty = self.lengths > 0
+        rows[nonempty, :] = self.data[self.offsets[1:][nonempty] - 1, :]
+        return rows
+
+    def take(self, order):
+        """Returns a :class:`RaggedArray` with the arrays ``self[i] for i in order``."""
+        order = np.asarray(order, dtype=np.int64)
+        lengths = self.lengths[order]
+        offsets = np.zeros((len(order) + 1,), dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        rows = np.repeat(self.offsets[:-1][order] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RaggedArray(self.data[rows, :], offsets)
+
+    def gather(self, comm, root=None):
+        """
+        Returns a :class:`RaggedArray` with the arrays of all ranks of ``comm``
+        in the order of the ranks. The lengths and the rows are exchanged as flat
+        buffers with ``Allgatherv``, or with ``Gatherv`` if ``root`` is given, in
+        which case the other ranks receive ``None``. See :func:`gather_rows`.
+        """
+        lengths = gather_rows(comm, self.lengths.astype(np.int64), root)
+        data = gather_rows(comm, self.data, root)
+        if data is None:
+            return None
+        offsets = np.zeros((len(lengths) + 1,), dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return RaggedArray(data, offsets)
+
+
+class TracingResult:
+    r"""
+    Result of :func:`trace_particles_boozer` or :func:`trace_particles_boozer_perturbed`
+    with ``ragged=True``. The trajectories and the hits of all particles are stored
+    as :class:`RaggedArray`, so ``res_tys[i]`` and ``res_hits[i]`` are the arrays of
+    particle ``i`` as in the default output, and the result can be unpacked as
+    ``res_tys, res_hits = result``.
+
+    Args:
+        res_tys: :class:`RaggedArray` with the trajectories of the particles.
+        res_hits: :class:`RaggedArray` with the hits of the particles.
+        indices: index of each particle in ``stz_inits``. This differs from
+            ``0, 1, ...`` if the result only contains some of the particles, e.g.
+            the particles of one rank with ``gather="none"``. Defaults to
+            ``0, 1, ...``.
+    """
+
+    def __init__(self, res_tys, res_hits, indices=None):
+        assert len(res_tys) == len(res_hits)
+        self.res_tys = res_tys
+        self.res_hits = res_hits
+        if indices is None:
+            indices = np.arange(len(res_tys))
+        self.indices = np.asarray(indices, dtype=np.int64)
+        assert len(self.indices) == len(res_tys)
+
+    def __iter__(self):
+        return iter((self.res_tys, self.res_hits))
+
+    def __len__(self):
+        return len(self.res_tys)
+
+    def final_state(self):
+        """
+        ``(nparticles, ncols)`` array with the last row of each trajectory, i.e. the
+        time at which tracing stopped followed by the state.
+        """
+        return self.res_tys.last_rows()
+
+    def loss_times(self):
+        """
+        Time at which each particle first hit one of the stopping criteria, or
+        ``np.inf`` if it did not hit any.
+        """
+        times = np.full((len(self),), np.inf)
+        hits = self.res_hits.data
+        stopped = hits[:, 1] < 0
+        np.minimum.at(times, self.res_hits.owners()[stopped], hits[stopped, 0])
+        return times
+
+    def hit_indices(self):
+        """
+        Returns the index ``idx`` of every hit (see :func:`trace_particles_boozer`)
+        and the index of the particle it belongs to, as two arrays in the order of
+        ``res_hits.data``.
+        """
+        return np.rint(self.res_hits.data[:, 1]).astype(int), self.res_hits.owners()
+
+    def gather(self, comm, root=None):
+        """
+        Returns the result of the particles of all ranks of ``comm``, sorted by
+        their indices, on all ranks, or only on ``root`` if it is given, in which
+        case the other ranks receive ``None``.
+        """
+        res_tys = self.res_tys.gather(comm, root)
+        res_hits = self.res_hits.gather(comm, root)
+        indices = gather_rows(comm, self.indices, root)
+        if res_tys is None:
+            return None
+        return TracingResult(res_tys, res_hits, indices).sorted()
+
+    def take(self, order):
+        """Returns the result of the particles ``order``."""
+        return TracingResult(self.res_tys.take(order), self.res_hits.take(order), self.indices[order])
+
+    def sorted(self):
+        """Returns the result with the particles sorted by their indices."""
+        if np.all(np.diff(self.indices) >= 0):
+            return self
+        return self.take(np.argsort(self.indices, kind="stable"))
+
+    def save(self, filename, **kwargs):
+        """Saves the result, and any additional arrays in ``kwargs``, to a ``.npz`` file."""
+        np.savez(
+            filename,
+            tys_data=self.res_tys.data, tys_offsets=self.res_tys.offsets,
+            hits_data=self.res_hits.data, hits_offsets=self.res_hits.offsets,
+            indices=self.indices, **kwargs
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a result that was saved with :meth:`save`."""
+        with np.load(filename) as f:
+            return cls(RaggedArray(f["tys_data"], f["tys_offsets"]),
+                       RaggedArray(f["hits_data"], f["hits_offsets"]),
+                       f["indices"])
+
+    @classmethod
+    def load_shards(cls, shard_path):
+        """
+        Loads and combines the results that the ranks wrote with the ``shard_path``
+        argument of :func:`trace_particles_boozer`.
+        """
+        with np.load(_shard_filename(shard_path, 0)) as f:
+            nranks = int(f["nranks"])
+        shards = [cls.load(_shard_filename(shard_path, rank)) for rank in range(nranks)]
+        return cls.concatenate(shards).sorted()
+
+    @classmethod
+    def concatenate(cls, results):
+        """Combines a non-empty list of results into one, keeping their order."""
+        ncols_tys = results[0].res_tys.data.shape[1]
+        ncols_hits = results[0].res_hits.data.shape[1]
+        return cls(
+            RaggedArray.from_list([ty for result in results for ty in result.res_tys], ncols_tys),
+            RaggedArray.from_list([hit for result in results for hit in result.res_hits], ncols_hits),
+            np.concatenate([result.indices for result in results]),
+        )
+
+
+def _shard_filename(shard_path, rank):
+    return f"{shard_path}_{rank}.npz"
+
+
+def _checkpoint_filenames(checkpoint_path, rank):
+    """Returns the names of the files with the finished and the in-flight particles of ``rank``."""
+    return f"{checkpoint_path}_{rank}.npz", f"{checkpoint_path}_{rank}_inflight.bin"
+
+
+class _TracingCheckpoint:
+    """
+    Checkpoint of the particles of one rank, see the ``checkpoint_path`` argument
+    of :func:`trace_particles_boozer`. The results of the finished particles are
+    saved every ``interval`` seconds, while a ``simsoptpp.TracingCheckpoint``
+    saves the states of the particles that are being traced.
+    """
+
+    def __init__(self, checkpoint_path, interval, ncols, comm):
+        self.checkpoint_path = checkpoint_path
+        self.interval = interval
+        self.ncols = ncols
+        self.comm = comm
+        self.rank, self.nranks = (0, 1) if comm is None else (comm.rank, comm.size)
+        self.filename, inflight_filename = _checkpoint_filenames(checkpoint_path, self.rank)
+        self.inflight = sopp.TracingCheckpoint(inflight_filename, interval)
+        # Results of the finished particles that this rank took over from the checkpoint
+        self.finished = None
+        self.last_save = time.perf_counter()
+
+    def load(self, nparticles):
+        """
+        Loads the checkpoint if it exists. The finished particles of rank ``r`` of
+        the run that wrote it are taken over by rank ``r % comm.size``. Returns the
+        indices of the particles that still need to be traced, and an ``(n, 7)``
+        array with the rows ``(particle, t, s, theta, zeta, vpar, dt)`` of the
+        particles that were in flight, from which they are resumed. There is at
+        most one row per particle.
+        """
+        finished = []
+        done = [np.zeros((0,), dtype=np.int64)]
+        inflight = [np.zeros((0, 7))]
+        if os.path.exists(_checkpoint_filenames(self.checkpoint_path, 0)[0]):
+            with np.load(_checkpoint_filenames(self.checkpoint_path, 0)[0]) as f:
+                nranks = int(f["nranks"])
+            for rank in range(nranks):
+                filename, inflight_filename = _checkpoint_filenames(self.checkpoint_path, rank)
+                if os.path.exists(filename):
+                    if rank % self.nranks == self.rank:
+                        finished.append(TracingResult.load(filename))
+                        done.append(finished[-1].indices)
+                    else:
+                        with np.load(filename) as f:
+                            done.append(f["indices"])
+                if os.path.exists(inflight_filename):
+                    inflight.append(np.fromfile(inflight_filename, dtype=np.float64).reshape(-1, 7))
+        if finished:
+            self.finished = TracingResult.concatenate(finished)
+        done = np.concatenate(done)
+        inflight = np.concatenate(inflight)
+        inflight = inflight[~np.isin(inflight[:, 0].astype(np.int64), done)]
+        # A particle can be in flight in the files of several earlier ranks, resume
+        # it from the row with the largest time
+        inflight = inflight[np.lexsort((-inflight[:, 1], inflight[:, 0]))]
+        inflight = inflight[np.unique(inflight[:, 0], return_index=True)[1]]
+        # Nobody may overwrite the files before all ranks have read them
+        if self.comm is not None:
+            self.comm.Barrier()
+        self.save([], [], [], force=True)
+        if self.comm is not None:
+            self.comm.Barrier()
+        return np.setdiff1d(np.arange(nparticles), done), inflight
+
+    def save(self, indices, res_tys, res_hits, force=False):
+        """
+        Saves the results of the finished particles ``indices`` of this rank, if
+        ``interval`` seconds have passed since the last save or ``force`` is True.
+        """
+        if not force and time.perf_counter() - self.last_save < self.interval:
+            return
+        result = TracingResult(RaggedArray.from_list(res_tys, self.ncols),
+                               RaggedArray.from_list(res_hits, self.ncols + 1), indices)
+        if self.finished is not None:
+            result = TracingResult.concatenate([self.finished, result])
+        # Write to a temporary file first, so that the checkpoint is never left half written
+        tmp = self.filename + ".tmp"
+        with open(tmp, "wb") as f:
+            result.save(f, nranks=self.nranks)
+        os.replace(tmp, self.filename)
+        self.last_save = time.perf_counter()
+
+    def finish(self, indices, res_tys, res_hits):
+        """
+        Saves the final checkpoint and returns the results of this rank including
+        the finished particles that were taken over from the checkpoint.
+        """
+        self.save(indices, res_tys, res_hits, force=True)
+        self.inflight.write()
+        if self.finished is None:
+            return indices, res_tys, res_hits
+        return (np.concatenate([self.finished.indices, indices]),
+                list(self.finished.res_tys) + res_tys,
+                list(self.finished.res_hits) + res_hits)
+
+
+def _stream_filenames(stream_path, rank):
+    """Returns the names of the trajectory file and of its index for ``rank``."""
+    return f"{stream_path}_{rank}.npy", f"{stream_path}_{rank}_index.npz"
+
+
+def _open_trajectory_writer(stream_path, comm):
+    """
+    Returns a ``simsoptpp.TrajectoryWriter`` that streams the trajectories of this
+    rank to a temporary file, or ``None`` if ``stream_path`` is ``None``.
+    """
+    if stream_path is None:
+        return None
+    rank = 0 if comm is None else comm.rank
+    return sopp.TrajectoryWriter(f"{stream_path}_{rank}.bin")
+
+
+def _finish_trajectory_stream(writer, stream_path, ncols, comm):
+    """
+    Closes ``writer`` and copies the chunks it wrote, sorted by particle, into the
+    trajectory file of this rank, one chunk at a time, so that the memory use stays
+    bounded. The offsets of the trajectories and the indices of their particles
+    are saved to the index file, see :func:`_stream_filenames`.
+    """
+    if writer is None:
+        return
+    writer.close()
+    rank, nranks = (0, 1) if comm is None else (comm.rank, comm.size)
+    data_filename, index_filename = _stream_filenames(stream_path, rank)
+    particles = np.asarray(writer.chunk_particles, dtype=np.int64)
+    lengths = np.asarray(writer.chunk_lengths, dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    nrows = int(np.sum(lengths))
+    if nrows == 0:
+        np.save(data_filename, np.zeros((0, ncols)))
+    else:
+        raw = np.memmap(writer.filename, dtype=np.float64, mode="r", shape=(nrows, ncols))
+        data = np.lib.format.open_memmap(data_filename, mode="w+", dtype=np.float64, shape=(nrows, ncols))
+        row = 0
+        for chunk in np.argsort(particles, kind="stable"):
+            data[row:row + lengths[chunk], :] = raw[starts[chunk]:starts[chunk] + lengths[chunk], :]
+            row += lengths[chunk]
+        data.flush()
+        del data, raw
+    os.remove(writer.filename)
+
+    indices, owners = np.unique(particles, return_inverse=True)
+    offsets = np.zeros((len(indices) + 1,), dtype=np.int64)
+    np.cumsum(np.bincount(owners, weights=lengths, minlength=len(indices)).astype(np.int64), out=offsets[1:])
+    np.savez(index_filename, offsets=offsets, indices=indices, nranks=nranks)
+
+
+def load_trajectories(stream_path, rank=None, mmap_mode="r"):
+    """
+    Loads the trajectories that :func:`trace_particles_boozer` or
+    :func:`trace_particles_boozer_perturbed` streamed to disk with the
+    ``stream_path`` argument.
+
+    Args:
+        stream_path: the ``stream_path`` that was passed to the tracer.
+        rank: if given, only the trajectories traced by this rank are loaded, and
+            their rows are memory mapped with ``mmap_mode``, i.e. only read from
+            disk when they are accessed. Otherwise the trajectories of all ranks
+            are combined, which reads them into memory.
+        mmap_mode: see ``numpy.load``.
+
+    Returns:
+        A :class:`RaggedArray` with the trajectories and the indices of their
+        particles in ``stz_inits``, in increasing order.
+    """
+    if rank is not None:
+        data_filename, index_filename = _stream_filenames(stream_path, rank)
+        with np.load(index_filename) as index:
+            offsets, indices = index["offsets"], index["indices"]
+        return RaggedArray(np.load(data_filename, mmap_mode=mmap_mode), offsets), indices
+
+    with np.load(_stream_filenames(stream_path, 0)[1]) as index:
+        nranks = int(index["nranks"])
+    ranks = [load_trajectories(stream_path, rank, mmap_mode) for rank in range(nranks)]
+    ncols = ranks[0][0].data.shape[1]
+    res_tys = RaggedArray.from_list([ty for tys, _ in ranks for ty in tys], ncols)
+    indices = np.concatenate([indices for _, indices in ranks])
+    order = np.argsort(indices, kind="stable")
+    return res_tys.take(order), indices[order]
+
+
+def _first_and_last_rows(res_tys):
+    """
+    Returns the first and the last row of each trajectory in ``res_tys``, which is
+    a list of arrays or a :class:`RaggedArray`, and the number of rows of each.
+    """
+    if isinstance(res_tys, RaggedArray):
+        return res_tys.first_rows(), res_tys.last_rows(), res_tys.lengths
+    lengths = np.array([len(ty) for ty in res_tys], dtype=np.int64)
+    first = np.array([ty[0] for ty in res_tys]).reshape(len(lengths), -1)
+    last = np.array([ty[-1] for ty in res_tys]).reshape(len(lengths), -1)
+    return first, last, lengths
+
+
+def _trace_distributed(trace_range, nparticles, comm, schedule, chunk_size, on_chunk=None):
+    """
+    Traces the particles of this rank with ``trace_range(first, last)``, which
+    returns the lists ``res_tys, res_hits`` of the particles ``first, ..., last-1``.
+    With ``schedule="static"`` each rank traces one contiguous block of particles.
+    With ``schedule="dynamic"`` the ranks other than 0 take chunks of ``chunk_size``
+    particles on demand from rank 0 (see :func:`parallel_loop_chunks`), and the
+    utilization of these ranks is printed. If ``on_chunk`` is given, the block of a rank is traced in chunks
+    of ``chunk_size`` particles with either schedule, and after each chunk
+    ``on_chunk(indices, res_tys, res_hits)`` is called with the results of this
+    rank so far. Returns the indices of the particles traced on this rank together
+    with their results.
+    """
+    schedule = schedule.lower()
+    assert schedule in ["static", "dynamic"]
+    if chunk_size is None:
+        nranks = 1 if comm is None else comm.size
+        chunk_size = max(1, nparticles // (16 * nranks))
+    if schedule == "static":
+        first, last = parallel_loop_bounds(comm, nparticles)
+        if on_chunk is None:
+            res_tys, res_hits = trace_range(first, last)
+            return np.arange(first, last), res_tys, res_hits
+        chunks = [(i, min(i + chunk_size, last)) for i in range(first, last, chunk_size)]
+    else:
+        chunks = parallel_loop_chunks(comm, nparticles, chunk_size)
+
+    indices = []
+    res_tys = []
+    res_hits = []
+    busy_time = 0.0
+    for first, last in chunks:
+        start = time.perf_counter()
+        tys, hits = trace_range(first, last)
+        busy_time += time.perf_counter() - start
+        indices.extend(range(first, last))
+        res_tys.extend(tys)
+        res_hits.extend(hits)
+        if on_chunk is not None:
+            on_chunk(np.array(indices, dtype=np.int64), res_tys, res_hits)
+    if schedule == "dynamic":
+        _print_utilization(comm, busy_time, len(indices), skip_root=True)
+    return np.array(indices, dtype=np.int64), res_tys, res_hits
+
+
+def _print_utilization(comm, busy_time, nparticles, skip_root=False):
+    """
+    Prints how long each rank spent tracing, and the utilization, i.e. the mean
+    over the maximum of these times, which is the fraction of the wall time for
+    which the ranks were busy on average. With ``skip_root``, rank 0 is left out
+    if there are other ranks, since it does not trace with the dynamic schedule.
+    """
+    stats = np.array([(busy_time, nparticles)] if comm is None else comm.allgather((busy_time, nparticles)))
+    if skip_root and len(stats) > 1:
+        stats = stats[1:]
+    busy, counts = stats[:, 0], stats[:, 1].astype(int)
+    utilization = np.mean(busy) / np.max(busy) if np.max(busy) > 0 else 1.0
+    proc0_print(
+        f"Traced {np.sum(counts)} particles on {len(busy)} ranks, "
+        f"particles per rank min/max: {np.min(counts)}/{np.max(counts)}, "
+        f"tracing time per rank min/mean/max: {np.min(busy):.3g}/{np.mean(busy):.3g}/{np.max(busy):.3g} s, "
+        f"utilization: {100 * utilization:.1f}%"
+    )
+
+
+def _collect_results(res_tys, res_hits, ncols, comm, ragged, indices, gather, shard_path):
+    """
+    Combines the results of the particles ``indices`` traced on this rank into the
+    results of all particles in their original order, either as lists of arrays
+    or as a :class:`TracingResult`, see the ``gather`` and ``shard_path``
+    arguments of :func:`trace_particles_boozer`.
+    """
+    gather = gather.lower()
+    assert gather in ["all", "root", "none"]
+    local = comm is None or gather == "none"
+    if local and not ragged and shard_path is None:
+        # Nothing to exchange or store, so the arrays are not copied into flat arrays
+        order = np.argsort(indices, kind="stable")
+        return [res_tys[i] for i in order], [res_hits[i] for i in order]
+
+    result = TracingResult(RaggedArray.from_list(res_tys, ncols),
+                           RaggedArray.from_list(res_hits, ncols + 1), indices)
+    if shard_path is not None:
+        rank, nranks = (0, 1) if comm is None else (comm.rank, comm.size)
+        result.save(_shard_filename(shard_path, rank), nranks=nranks)
+    if local:
+        result = result.sorted()
+    else:
+        result = result.gather(comm, root=0 if gather == "root" else None)
+        if result is None:
+            # Only the root rank receives the results
+            result = TracingResult(RaggedArray.from_list([], ncols), RaggedArray.from_list([], ncols + 1))
+    if ragged:
+        return result
+    return list(result.res_tys), list(result.res_hits)
+
+
 def trace_particles_boozer_perturbed(
     perturbed_field: ShearAlfvenWave,
     stz_inits: RealArray,
@@ -52,6 +573,12 @@ def trace_particles_boozer_perturbed(
     zetas_stop=False,
     vpars_stop=False,
     axis=2,
+    ragged=False,
+    schedule="static",
+    chunk_size=None,
+    gather="all",
+    shard_path=None,
+    stream_path=None,
 ):
     r"""
     Follow particles in a perturbed field of class :class:`ShearAlfvenWave`. This is modeled after
@@ -146,6 +673,38 @@ def trace_particles_boozer_perturbed(
         axis: Defines handling of coordinate singularity. If 0, tracing is
             performed in Boozer coordinates (s,theta,zeta). If 1, tracing is performed in coordinates (sqrt(s)*cos(theta), sqrt(s)*sin(theta), zeta). 
             If 2, tracing is performed in coordinates (s*cos(theta),s*sin(theta),zeta). Option 2 is recommended.
+        ragged: if True, return a :class:`TracingResult`, which stores the results of
+              all particles in two flat arrays and can be unpacked like the tuple
+              below.
+        schedule: how the particles are distributed over the ranks of ``comm``. With
+              ``"static"`` (default), each rank traces one contiguous block of particles.
+              With ``"dynamic"``, the ranks take chunks of ``chunk_size`` particles on
+              demand, which balances the load when the tracing times of the particles
+              differ a lot, e.g. between promptly lost and confined particles, and the
+              utilization of the ranks is printed. Rank 0 then hands out the chunks and
+              does not trace, see :func:`~simsopt._core.util.parallel_loop_chunks`. The
+              results are in the order of ``stz_inits`` in both cases.
+        chunk_size: number of particles per chunk for ``schedule="dynamic"``. Defaults
+              to ``nparticles // (16 * comm.size)``, and at least 1.
+        gather: how the results are combined across the ranks of ``comm``. They are
+              exchanged as flat arrays with typed collectives instead of pickled
+              lists of arrays. With ``"all"`` (default), every rank receives the
+              results of all particles (``Allgatherv``). With ``"root"``, only rank 0
+              receives them (``Gatherv``), and the other ranks receive no particles.
+              With ``"none"``, every rank only returns the particles it traced; their
+              indices in ``stz_inits`` are available as ``TracingResult.indices`` with
+              ``ragged=True``.
+        shard_path: if given, every rank saves the particles it traced to the file
+              ``{shard_path}_{rank}.npz``, which can be combined with
+              :meth:`TracingResult.load_shards`. Together with ``gather="none"`` the
+              results are never held by a single rank.
+        stream_path: if given, the saved states are streamed to disk in chunks while
+              the particles are traced, instead of being held in memory, so that the
+              memory use does not grow with ``tmax/dt_save``. Every rank writes the
+              trajectories of its particles to ``{stream_path}_{rank}.npy``, which
+              can be loaded with :func:`load_trajectories`, and the returned
+              ``res_tys`` only contain the first and the last state of each particle,
+              as with ``forget_exact_path=True``.
     Returns: 2 element tuple containing
         - ``res_tys``:
             A list of numpy arrays (one for each particle) describing the
@@ -187,46 +746,51 @@ def trace_particles_boozer_perturbed(
     else:
         mode = "gc_" + perturbed_field.B0.field_type
 
-    res_tys = []
-    res_hits = []
-    first, last = parallel_loop_bounds(comm, nparticles)
-    for i in range(first, last):
-        res_ty, res_hit = sopp.particle_guiding_center_boozer_perturbed_tracing(
-            perturbed_field,
-            stz_inits[i, :],
-            m,
-            charge,
-            speed_total,
-            speed_par[i],
-            mus[i],
-            tmax,
-            abstol,
-            reltol,
-            vacuum=(mode == "gc_vac"),
-            noK=(mode == "gc_nok"),
-            thetas=thetas,
-            zetas=zetas,
-            omega_thetas=omega_thetas,
-            omega_zetas=omega_zetas,
-            vpars=vpars,
-            stopping_criteria=stopping_criteria,
-            dt_save=dt_save,
-            thetas_stop=thetas_stop,
-            zetas_stop=zetas_stop,
-            vpars_stop=vpars_stop,
-            forget_exact_path=forget_exact_path,
-            axis=axis,
-        )
-        if not forget_exact_path:
-            res_tys.append(np.asarray(res_ty))
-        else:
-            res_tys.append(np.asarray([res_ty[0], res_ty[-1]]))
-        res_hits.append(np.asarray(res_hit))
-    if comm is not None:
-        res_tys = [i for o in comm.allgather(res_tys) for i in o]
-        res_hits = [i for o in comm.allgather(res_hits) for i in o]
-
-    return res_tys, res_hits
+    writer = _open_trajectory_writer(stream_path, comm)
+
+    def trace_range(first, last):
+        res_tys = []
+        res_hits = []
+        for i in range(first, last):
+            res_ty, res_hit = sopp.particle_guiding_center_boozer_perturbed_tracing(
+                perturbed_field,
+                stz_inits[i, :],
+                m,
+                charge,
+                speed_total,
+                speed_par[i],
+                mus[i],
+                tmax,
+                abstol,
+                reltol,
+                vacuum=(mode == "gc_vac"),
+                noK=(mode == "gc_nok"),
+                thetas=thetas,
+                zetas=zetas,
+                omega_thetas=omega_thetas,
+                omega_zetas=omega_zetas,
+                vpars=vpars,
+                stopping_criteria=stopping_criteria,
+                dt_save=dt_save,
+                thetas_stop=thetas_stop,
+                zetas_stop=zetas_stop,
+                vpars_stop=vpars_stop,
+                forget_exact_path=forget_exact_path,
+                axis=axis,
+                writer=writer,
+                particle_id=i,
+            )
+            # The results are numpy arrays that own the memory the tracer wrote to
+            if not forget_exact_path:
+                res_tys.append(res_ty)
+            else:
+                res_tys.append(res_ty[[0, -1], :])
+            res_hits.append(res_hit)
+        return res_tys, res_hits
+
+    indices, res_tys, res_hits = _trace_distributed(trace_range, nparticles, comm, schedule, chunk_size)
+    _finish_trajectory_stream(writer, stream_path, 6, comm)
+    return _collect_results(res_tys, res_hits, 6, comm, ragged, indices, gather, shard_path)
 
 def trace_particles_boozer(
     field: BoozerMagneticField,
@@ -257,7 +821,16 @@ def trace_particles_boozer(
     solveSympl=False,
     roottol=None,
     predictor_step=None,
-
+    nthreads=1,
+    ragged=False,
+    schedule="static",
+    chunk_size=None,
+    gather="all",
+    shard_path=None,
+    stream_path=None,
+    checkpoint_path=None,
+    checkpoint_interval=600.0,
+    resume=False,
 ):
     r"""
     Follow particles in a :class:`BoozerMagneticField`.
@@ -352,6 +925,61 @@ def trace_particles_boozer(
         solveSympl: If True, uses symplectic solver. If False (default), uses RK45 solver with adaptive time step.
         roottol: root solver tolerance for the symplectic solver. Only used if `solveSympl` is True. If None, defaults to `tol`.
         predictor_step: provide better initial guess for the next time step using predictor steps. Defaults to True if `solveSympl` is True.
+        nthreads: number of OpenMP threads used to trace the particles of each MPI rank.
+              The GIL is released while tracing, and every thread evaluates the field
+              through its own evaluation context (see ``BoozerMagneticField.clone``), which
+              shares the interpolation tables with ``field``. This requires a field that is implemented in C++, such as
+              :class:`InterpolatedBoozerField`, and `solveSympl` = False. Has no effect
+              if simsoptpp was compiled without OpenMP.
+        ragged: if True, return a :class:`TracingResult`, which stores the results of
+              all particles in two flat arrays and can be unpacked like the tuple
+              below.
+        schedule: how the particles are distributed over the ranks of ``comm``. With
+              ``"static"`` (default), each rank traces one contiguous block of particles.
+              With ``"dynamic"``, the ranks take chunks of ``chunk_size`` particles on
+              demand, which balances the load when the tracing times of the particles
+              differ a lot, e.g. between promptly lost and confined particles, and the
+              utilization of the ranks is printed. Rank 0 then hands out the chunks and
+              does not trace, see :func:`~simsopt._core.util.parallel_loop_chunks`. The
+              results are in the order of ``stz_inits`` in both cases.
+        chunk_size: number of particles per chunk for ``schedule="dynamic"``. Defaults
+              to ``nparticles // (16 * comm.size)``, and at least 1.
+        gather: how the results are combined across the ranks of ``comm``. They are
+              exchanged as flat arrays with typed collectives instead of pickled
+              lists of arrays. With ``"all"`` (default), every rank receives the
+              results of all particles (``Allgatherv``). With ``"root"``, only rank 0
+              receives them (``Gatherv``), and the other ranks receive no particles.
+              With ``"none"``, every rank only returns the particles it traced; their
+              indices in ``stz_inits`` are available as ``TracingResult.indices`` with
+              ``ragged=True``.
+        shard_path: if given, every rank saves the particles it traced to the file
+              ``{shard_path}_{rank}.npz``, which can be combined with
+              :meth:`TracingResult.load_shards`. Together with ``gather="none"`` the
+              results are never held by a single rank.
+        stream_path: if given, the saved states are streamed to disk in chunks while
+              the particles are traced, instead of being held in memory, so that the
+              memory use does not grow with ``tmax/dt_save``. Every rank writes the
+              trajectories of its particles to ``{stream_path}_{rank}.npy``, which
+              can be loaded with :func:`load_trajectories`, and the returned
+              ``res_tys`` only contain the first and the last state of each particle,
+              as with ``forget_exact_path=True``.
+        checkpoint_path: if given, every rank saves the results of the particles it
+              has finished to ``{checkpoint_path}_{rank}.npz`` every
+              ``checkpoint_interval`` seconds, and the states ``(t, s, theta, zeta,
+              v_par, dt)`` of the particles it is tracing to
+              ``{checkpoint_path}_{rank}_inflight.bin``. To write checkpoints in
+              between, the particles of a rank are traced in chunks of
+              ``chunk_size`` particles, also with ``schedule="static"``.
+        checkpoint_interval: time in seconds (wall time) between two checkpoints.
+        resume: if True, continue from the checkpoint at ``checkpoint_path``, e.g.
+              after the job was stopped by a time limit. The results of the finished
+              particles are loaded instead of tracing them again, the particles that
+              were in flight continue from their saved states, and the remaining
+              particles are traced from the start. The trajectory and the hits of a
+              resumed particle start at its saved state, and the state of stopping
+              criteria that count iterations or transits starts over. The number
+              of ranks may differ from the run that wrote the checkpoint. If there is
+              no checkpoint yet, all particles are traced from the start.
     Returns: 2 element tuple containing
         - ``res_tys``:
             A list of numpy arrays (one for each particle) describing the
@@ -429,17 +1057,41 @@ def trace_particles_boozer(
     else:
         mode = "gc_" + field.field_type
 
-    res_tys = []
-    res_hits = []
-    first, last = parallel_loop_bounds(comm, nparticles)
-    for i in range(first, last):
-        res_ty, res_hit = sopp.particle_guiding_center_boozer_tracing(
+    if resume and checkpoint_path is None:
+        raise ValueError("resume=True requires a checkpoint_path")
+
+    writer = _open_trajectory_writer(stream_path, comm)
+
+    # The particles that still need to be traced and their initial states, which
+    # differ from stz_inits and parallel_speeds for particles resumed from a checkpoint
+    remaining = np.arange(nparticles)
+    stz_start = np.array(stz_inits, dtype=np.float64)
+    vpar_start = np.array(speed_par, dtype=np.float64).ravel()
+    t_start = np.zeros((nparticles,))
+    dt_start = np.zeros((nparticles,))
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint = _TracingCheckpoint(checkpoint_path, checkpoint_interval, 5, comm)
+        if resume:
+            remaining, inflight = checkpoint.load(nparticles)
+            ids = inflight[:, 0].astype(np.int64)
+            t_start[ids] = inflight[:, 1]
+            stz_start[ids, :] = inflight[:, 2:5]
+            vpar_start[ids] = inflight[:, 5]
+            dt_start[ids] = inflight[:, 6]
+
+    def trace_range(first, last):
+        res_tys = []
+        res_hits = []
+        ids = remaining[first:last]
+        # All particles of the range are traced with a single call into simsoptpp
+        res_tys_batch, res_hits_batch = sopp.particle_guiding_center_boozer_tracing_batch(
             field,
-            stz_inits[i, :],
+            np.ascontiguousarray(stz_start[ids, :]),
             m,
             charge,
-            speed_total[i],
-            speed_par[i],
+            speed_total[ids],
+            vpar_start[ids],
             tmax,
             vacuum=(mode == "gc_vac"),
             noK=(mode == "gc_nok"),
@@ -461,16 +1113,32 @@ def trace_particles_boozer(
             predictor_step=predictor_step,
             roottol=roottol,
             dt=dt,
+            nthreads=nthreads,
+            writer=writer,
+            particle_ids=ids,
+            t_inits=t_start[ids],
+            dt_inits=dt_start[ids],
+            checkpoint=None if checkpoint is None else checkpoint.inflight,
         )
-        if not forget_exact_path:
-            res_tys.append(np.asarray(res_ty))
-        else:
-            res_tys.append(np.asarray([res_ty[0], res_ty[-1]]))
-        res_hits.append(np.asarray(res_hit))
-    if comm is not None:
-        res_tys = [i for o in comm.allgather(res_tys) for i in o]
-        res_hits = [i for o in comm.allgather(res_hits) for i in o]
-    return res_tys, res_hits
+        for res_ty, res_hit in zip(res_tys_batch, res_hits_batch):
+            # The results are numpy arrays that own the memory the tracer wrote to
+            if not forget_exact_path:
+                res_tys.append(res_ty)
+            else:
+                res_tys.append(res_ty[[0, -1], :])
+            res_hits.append(res_hit)
+        return res_tys, res_hits
+
+    on_chunk = None
+    if checkpoint is not None:
+        def on_chunk(indices, res_tys, res_hits):
+            checkpoint.save(remaining[indices], res_tys, res_hits)
+    indices, res_tys, res_hits = _trace_distributed(trace_range, len(remaining), comm, schedule, chunk_size, on_chunk)
+    indices = remaining[indices]
+    if checkpoint is not None:
+        indices, res_tys, res_hits = checkpoint.finish(indices, res_tys, res_hits)
+    _finish_trajectory_stream(writer, stream_path, 5, comm)
+    return _collect_results(res_tys, res_hits, 5, comm, ragged, indices, gather, shard_path)
 
 
 def compute_resonances(res_tys, res_hits, delta=1e-2):
@@ -535,21 +1203,17 @@ def compute_toroidal_transits(res_tys):
     Computes the number of toroidal transits of an orbit.
 
     Args:
-        res_tys: trajectory solution computed from :func:`trace_particles_boozer` with ``forget_exact_path=False``.
+        res_tys: trajectory solution computed from :func:`trace_particles_boozer` with ``forget_exact_path=False``,
+                either a list of arrays or a :class:`RaggedArray`.
 
     Returns:
         ntransits: array with length ``len(res_tys)``. Each element contains the
                 number of toroidal transits of the orbit.
     """
-    nparticles = len(res_tys)
-    ntransits = np.zeros((nparticles,))
-    for ip in range(nparticles):
-        ntraj = len(res_tys[ip][:, 0])
-        phi_init = res_tys[ip][0, 3]
-        for it in range(1, ntraj):
-            phi = res_tys[ip][it, 3]
-        if ntraj > 1:
-            ntransits[ip] = np.round((phi - phi_init) / (2 * np.pi))
+    first, last, lengths = _first_and_last_rows(res_tys)
+    ntransits = np.zeros((len(lengths),))
+    moved = lengths > 1
+    ntransits[moved] = np.round((last[moved, 3] - first[moved, 3]) / (2 * np.pi))
     return ntransits
 
 
@@ -569,7 +1233,8 @@ def compute_poloidal_transits(res_tys, ma=None, flux=True):
 
     Args:
         res_tys: trajectory solution computed from :func:`trace_particles` or
-                :func:`trace_particles_boozer` with ``forget_exact_path=False``.
+                :func:`trace_particles_boozer` with ``forget_exact_path=False``,
+                either a list of arrays or a :class:`RaggedArray`.
         ma: an instance of :class:`Curve` representing the coordinate axis with
                 respect to which the poloidal angle is computed. If orbit is
                 computed in Boozer coordinates, ``ma`` should be ``None``.
@@ -580,15 +1245,10 @@ def compute_poloidal_transits(res_tys, ma=None, flux=True):
         ntransits: array with length ``len(res_tys)``. Each element contains the
                 number of poloidal transits of the orbit.
     """
-    nparticles = len(res_tys)
-    ntransits = np.zeros((nparticles,))
-    for ip in range(nparticles):
-        ntraj = len(res_tys[ip][:, 0])
-        theta_init = res_tys[ip][0, 2]
-        for it in range(1, ntraj):
-            theta = res_tys[ip][it, 2]
-        if ntraj > 1:
-            ntransits[ip] = np.round((theta - theta_init) / (2 * np.pi))
+    first, last, lengths = _first_and_last_rows(res_tys)
+    ntransits = np.zeros((len(lengths),))
+    moved = lengths > 1
+    ntransits[moved] = np.round((last[moved, 2] - first[moved, 2]) / (2 * np.pi))
     return ntransits
 
 
@@ -1,6 +1,7 @@
 import numpy as np
 
-from .._core.util import parallel_loop_bounds
+from .._core.util import parallel_loop_bounds, gather_rows
+from .boozermagneticfield import BoozerRadialInterpolant
 
 __all__ = [
     "initialize_position_uniform_surf",
@@ -10,6 +11,18 @@ __all__ = [
 ]
 
 
+def _modB_on_grid(field, s, ntheta, nzeta):
+    # Returns modB at the points of the grid of the surfaces s, theta_j = 2 pi
+    # j/ntheta and zeta_k = 2 pi k/(nfp nzeta), which have been set on the field
+    # in the order of np.meshgrid(zeta, theta, s), as an array of shape (npoints, 1).
+    # For a BoozerRadialInterpolant the Fourier series is summed with a 2D FFT on
+    # each surface.
+    if isinstance(field, BoozerRadialInterpolant):
+        modB = field.evaluate_grid(["modB"], s, ntheta, nzeta)["modB"]
+        return np.transpose(modB, (1, 2, 0)).reshape((-1, 1))
+    return field.modB()
+
+
 def initialize_position_uniform_surf(
     field, nparticles, s, ntheta_max=100, nzeta_max=100, comm=None, seed=None
 ):
@@ -46,7 +59,7 @@ def initialize_position_uniform_surf(
     G = field.G()
     iota = field.iota()
     I = field.I()
-    modB = field.modB()
+    modB = _modB_on_grid(field, [s], ntheta_max, nzeta_max)
     J = (G + iota * I) / (modB**2)
 
     J_max = np.max(J)
@@ -80,17 +93,12 @@ def initialize_position_uniform_surf(
                 break
 
     # Gather all particle positions across all processes
-    if comm is not None:
-        s_init = [i for o in comm.allgather(s_init) for i in o]
-        theta_init = [i for o in comm.allgather(theta_init) for i in o]
-        zeta_init = [i for o in comm.allgather(zeta_init) for i in o]
-
-    points = np.zeros((nparticles, 3))
+    points = np.zeros((last - first, 3))
     points[:, 0] = np.asarray(s_init)
     points[:, 1] = np.asarray(theta_init)
     points[:, 2] = np.asarray(zeta_init)
 
-    return points
+    return gather_rows(comm, points)
 
 
 def initialize_position_profile(
@@ -153,7 +161,7 @@ def initialize_position_profile(
     G = field.G()
     iota = field.iota()
     I = field.I()
-    modB = field.modB()
+    modB = _modB_on_grid(field, np.linspace(0, 1, ns_max), ntheta_max, nzeta_max)
     J = (G + iota * I) / (modB**2)
 
     # Compute normalized profile values on the grid
@@ -192,17 +200,12 @@ def initialize_position_profile(
                 break
 
     # Gather all particle positions across all processes
-    if comm is not None:
-        s_init = [i for o in comm.allgather(s_init) for i in o]
-        theta_init = [i for o in comm.allgather(theta_init) for i in o]
-        zeta_init = [i for o in comm.allgather(zeta_init) for i in o]
-
-    points = np.zeros((nparticles, 3))
+    points = np.zeros((last - first, 3))
     points[:, 0] = np.asarray(s_init)
     points[:, 1] = np.asarray(theta_init)
     points[:, 2] = np.asarray(zeta_init)
 
-    return points
+    return gather_rows(comm, points)
 
 
 def initialize_position_uniform_vol(
@@ -6,9 +6,11 @@ from ..field.tracing import (
     trace_particles_boozer_perturbed,
     MaxToroidalFluxStoppingCriterion,
     MinToroidalFluxStoppingCriterion,
+    _first_and_last_rows,
+    RaggedArray,
 )
 from ..field.boozermagneticfield import ShearAlfvenHarmonic, ShearAlfvenWave
-from .._core.util import parallel_loop_bounds
+from .._core.util import parallel_loop_bounds, gather_rows
 
 __all__ = [
     "compute_loss_fraction",
@@ -19,13 +21,40 @@ __all__ = [
 ]
 
 
+def _allgather_points(comm, *columns):
+    r"""
+    Concatenates the lists ``columns`` of all ranks of ``comm`` in the order of
+    the ranks. The points are exchanged as a single flat buffer instead of
+    pickling every list separately.
+    """
+    if comm is None:
+        return columns
+    rows = np.reshape(np.asarray(columns, dtype=np.float64).T, (-1, len(columns)))
+    rows = gather_rows(comm, rows)
+    return tuple(rows[:, j].tolist() for j in range(len(columns)))
+
+
+def _allgather_maps(comm, *columns):
+    r"""
+    Concatenates the lists of return maps ``columns`` of all ranks of ``comm`` in
+    the order of the ranks, where ``columns[j][i]`` is the list of the j-th
+    coordinate along the i-th trajectory. The trajectories are exchanged as a
+    :class:`RaggedArray`.
+    """
+    if comm is None:
+        return columns
+    arrays = [np.column_stack(traj) for traj in zip(*columns)]
+    maps = RaggedArray.from_list(arrays, len(columns)).gather(comm)
+    return tuple([traj[:, j].tolist() for traj in maps] for j in range(len(columns)))
+
+
 def compute_loss_fraction(res_tys, tmin=1e-7, tmax=1e-2, ntime=1000):
     r"""
     Compute the fraction of particles lost as a function of time.
 
     Args:
         res_tys : List of particle trajectories, where each trajectory is a 2D array with shape (nsteps, 5)
-                 containing time and coordinates (t, s, theta, zeta, vpar).
+                 containing time and coordinates (t, s, theta, zeta, vpar), or a :class:`RaggedArray`.
         tmin : Minimum time to consider for loss fraction (default: 1e-7)
         tmax : Maximum time to consider for loss fraction (default: 1e-2)
         ntime : Number of time points to evaluate the loss fraction (default: 1000)
@@ -34,16 +63,13 @@ def compute_loss_fraction(res_tys, tmin=1e-7, tmax=1e-2, ntime=1000):
         loss_frac : A numpy array of shape (ntime,) containing the fraction of particles lost at each time point.
     """
     nparticles = len(res_tys)
-
-    timelost = np.zeros((nparticles,))
-    for ip in range(nparticles):
-        timelost[ip] = res_tys[ip][-1, 0]
+    _, last, _ = _first_and_last_rows(res_tys)
+    timelost = np.sort(last[:, 0])
 
     times = np.logspace(np.log10(tmin), np.log10(tmax), ntime)
 
-    loss_frac = np.zeros_like(times)
-    for it in range(ntime):
-        loss_frac[it] = np.count_nonzero(timelost < times[it]-1e-15) / nparticles
+    # Number of particles that were lost before each time
+    loss_frac = np.searchsorted(timelost, times - 1e-15, side="left") / nparticles
 
     return times, loss_frac
 
@@ -183,10 +209,9 @@ class PassingPoincare:
                 thetas_init.append(thetas[i])
                 vpars_init.append(vpar)
 
-        if self.comm is not None:
-            s_init = [i for o in self.comm.allgather(s_init) for i in o]
-            thetas_init = [i for o in self.comm.allgather(thetas_init) for i in o]
-            vpars_init = [i for o in self.comm.allgather(vpars_init) for i in o]
+        s_init, thetas_init, vpars_init = _allgather_points(
+            self.comm, s_init, thetas_init, vpars_init
+        )
 
         return s_init, thetas_init, vpars_init
 
@@ -280,11 +305,9 @@ class PassingPoincare:
             vpars_all.append(vpars_traj)
             t_all.append(t_traj)
 
-        if self.comm is not None:
-            s_all = [i for o in self.comm.allgather(s_all) for i in o]
-            thetas_all = [i for o in self.comm.allgather(thetas_all) for i in o]
-            vpars_all = [i for o in self.comm.allgather(vpars_all) for i in o]
-            t_all = [i for o in self.comm.allgather(t_all) for i in o]
+        s_all, thetas_all, vpars_all, t_all = _allgather_maps(
+            self.comm, s_all, thetas_all, vpars_all, t_all
+        )
 
         return s_all, thetas_all, vpars_all, t_all
 
@@ -662,10 +685,9 @@ class TrappedPoincare:
                     f"Root solve for chi_mirror failed! s = {s2d[i]}, eta/(2*pi) = {etas2d[i] / (2 * np.pi)}"
                 )
 
-        if self.comm is not None:
-            s_init = [i for o in self.comm.allgather(s_init) for i in o]
-            chis_init = [i for o in self.comm.allgather(chis_init) for i in o]
-            etas_init = [i for o in self.comm.allgather(etas_init) for i in o]
+        s_init, chis_init, etas_init = _allgather_points(
+            self.comm, s_init, chis_init, etas_init
+        )
 
         return s_init, chis_init, etas_init
 
@@ -710,11 +732,9 @@ class TrappedPoincare:
                 etas_all.append(etas_traj)
                 t_all.append(t_traj)
 
-        if self.comm is not None:
-            s_all = [i for o in self.comm.allgather(s_all) for i in o]
-            chis_all = [i for o in self.comm.allgather(chis_all) for i in o]
-            etas_all = [i for o in self.comm.allgather(etas_all) for i in o]
-            t_all = [i for o in self.comm.allgather(t_all) for i in o]
+        s_all, chis_all, etas_all, t_all = _allgather_maps(
+            self.comm, s_all, chis_all, etas_all, t_all
+        )
 
         return s_all, chis_all, etas_all, t_all
 
@@ -1154,10 +1174,9 @@ class PassingPerturbedPoincare:
             except RuntimeError:
                 continue
 
-        if self.comm is not None:
-            s_init = [i for o in self.comm.allgather(s_init) for i in o]
-            chis_init = [i for o in self.comm.allgather(chis_init) for i in o]
-            vpars_init = [i for o in self.comm.allgather(vpars_init) for i in o]
+        s_init, chis_init, vpars_init = _allgather_points(
+            self.comm, s_init, chis_init, vpars_init
+        )
 
         return s_init, chis_init, vpars_init
 
@@ -1313,12 +1332,9 @@ class PassingPerturbedPoincare:
             vpars_all.append(vpars_traj)
             t_all.append(t_traj)
 
-        if self.comm is not None:
-            s_all = [i for o in self.comm.allgather(s_all) for i in o]
-            chis_all = [i for o in self.comm.allgather(chis_all) for i in o]
-            etas_all = [i for o in self.comm.allgather(etas_all) for i in o]
-            vpars_all = [i for o in self.comm.allgather(vpars_all) for i in o]
-            t_all = [i for o in self.comm.allgather(t_all) for i in o]
+        s_all, chis_all, etas_all, vpars_all, t_all = _allgather_maps(
+            self.comm, s_all, chis_all, etas_all, vpars_all, t_all
+        )
 
         return s_all, chis_all, etas_all, vpars_all, t_all
 
@@ -0,0 +1,212 @@
+#pragma once
+
+#include "boozermagneticfield.h"
+#include <cmath>
+#include <string>
+#include <vector>
+using std::string;
+using std::vector;
+
+// Field based on a first-order expansion in the distance from the magnetic axis
+// with optional symmetry-breaking modes B0z[i]*cos(m[i]*theta - n[i]*N*zeta) in
+// the field strength, see simsopt.field.BoozerAnalytic for the expressions. Since
+// no quantity calls back into Python, the field can be cloned for multithreaded
+// tracing.
+class BoozerAnalytic : public BoozerMagneticField {
+    public:
+        using typename BoozerMagneticField::Array2;
+        double etabar, B0, N, G0, iota0, Bbar, I0, G1, I1, K1, iota1;
+        vector<double> B0z, n, m;
+
+    private:
+        static string analytic_field_type(double I0, double G1, double I1, double K1) {
+            if (I0 == 0 && I1 == 0 && G1 == 0 && K1 == 0)
+                return "vac";
+            if (K1 == 0)
+                return "nok";
+            return "";
+        }
+
+        // Resets the cached results after a parameter has changed.
+        void invalidate() {
+            Array2 p = points;
+            set_points(p);
+        }
+
+        double radius(double s) const {
+            return std::sqrt(std::abs(2*s*psi0/Bbar));
+        }
+
+        // modB and its derivatives with respect to (s, theta, zeta) at one point.
+        void modB_and_derivs(double s, double theta, double zeta, double& modB,
+                double& dmodBds, double& dmodBdtheta, double& dmodBdzeta) const {
+            double r = radius(s);
+            double angle = theta - N*zeta;
+            double c = std::cos(angle);
+            double sn = std::sin(angle);
+            modB = B0*(1 + etabar*r*c);
+            dmodBds = etabar != 0 ? B0*etabar*0.5*r/s*c : 0.;
+            dmodBdtheta = -B0*etabar*r*sn;
+            dmodBdzeta = N*B0*etabar*r*sn;
+            for (size_t i = 0; i < B0z.size(); ++i) {
+                double angle_i = m[i]*theta - n[i]*N*zeta;
+                double c_i = std::cos(angle_i);
+                double s_i = std::sin(angle_i);
+                modB += B0z[i]*c_i;
+                dmodBdtheta -= B0z[i]*m[i]*s_i;
+                dmodBdzeta += B0z[i]*n[i]*N*s_i;
+            }
+        }
+
+    protected:
+        void _psip_impl(Array2& psip) override {
+            for (int i = 0; i < npoints; ++i) {
+                double s = points(i, 0);
+                psip(i, 0) = psi0*(s*iota0 + s*s*iota1/2);
+            }
+        }
+
+        void _iota_impl(Array2& iota) override {
+            for (int i = 0; i < npoints; ++i)
+                iota(i, 0) = iota0 + iota1*points(i, 0);
+        }
+
+        void _diotads_impl(Array2& diotads) override {
+            for (int i = 0; i < npoints; ++i)
+                diotads(i, 0) = iota1;
+        }
+
+        void _G_impl(Array2& G) override {
+            for (int i = 0; i < npoints; ++i)
+                G(i, 0) = G0 + G1*points(i, 0);
+        }
+
+        void _dGds_impl(Array2& dGds) override {
+            for (int i = 0; i < npoints; ++i)
+                dGds(i, 0) = G1;
+        }
+
+        void _I_impl(Array2& I) override {
+            for (int i = 0; i < npoints; ++i)
+                I(i, 0) = I0 + I1*points(i, 0);
+        }
+
+        void _dIds_impl(Array2& dIds) override {
+            for (int i = 0; i < npoints; ++i)
+                dIds(i, 0) = I1;
+        }
+
+        void _modB_impl(Array2& modB) override {
+            double dmodBds, dmodBdtheta, dmodBdzeta;
+            for (int i = 0; i < npoints; ++i)
+                modB_and_derivs(points(i, 0), points(i, 1), points(i, 2),
+                        modB(i, 0), dmodBds, dmodBdtheta, dmodBdzeta);
+        }
+
+        void _dmodBds_impl(Array2& dmodBds) override {
+            double modB, dmodBdtheta, dmodBdzeta;
+            for (int i = 0; i < npoints; ++i)
+                modB_and_derivs(points(i, 0), points(i, 1), points(i, 2),
+                        modB, dmodBds(i, 0), dmodBdtheta, dmodBdzeta);
+        }
+
+        void _dmodBdtheta_impl(Array2& dmodBdtheta) override {
+            double modB, dmodBds, dmodBdzeta;
+            for (int i = 0; i < npoints; ++i)
+                modB_and_derivs(points(i, 0), points(i, 1), points(i, 2),
+                        modB, dmodBds, dmodBdtheta(i, 0), dmodBdzeta);
+        }
+
+        void _dmodBdzeta_impl(Array2& dmodBdzeta) override {
+            double modB, dmodBds, dmodBdtheta;
+            for (int i = 0; i < npoints; ++i)
+                modB_and_derivs(points(i, 0), points(i, 1), points(i, 2),
+                        modB, dmodBds, dmodBdtheta, dmodBdzeta(i, 0));
+        }
+
+        void _modB_derivs_impl(Array2& modB_derivs) override {
+            double modB;
+            for (int i = 0; i < npoints; ++i)
+                modB_and_derivs(points(i, 0), points(i, 1), points(i, 2),
+                        modB, modB_derivs(i, 0), modB_derivs(i, 1), modB_derivs(i, 2));
+        }
+
+        void _K_impl(Array2& K) override {
+            for (int i = 0; i < npoints; ++i)
+                K(i, 0) = K1*radius(points(i, 0))*std::sin(points(i, 1) - N*points(i, 2));
+        }
+
+        void _dKdtheta_impl(Array2& dKdtheta) override {
+            for (int i = 0; i < npoints; ++i)
+                dKdtheta(i, 0) = K1*radius(points(i, 0))*std::cos(points(i, 1) - N*points(i, 2));
+        }
+
+        void _dKdzeta_impl(Array2& dKdzeta) override {
+            for (int i = 0; i < npoints; ++i)
+                dKdzeta(i, 0) = -N*K1*radius(points(i, 0))*std::cos(points(i, 1) - N*points(i, 2));
+        }
+
+        void _K_derivs_impl(Array2& K_derivs) override {
+            for (int i = 0; i < npoints; ++i) {
+                double Kr = K1*radius(points(i, 0))*std::cos(points(i, 1) - N*points(i, 2));
+                K_derivs(i, 0) = Kr;
+                K_derivs(i, 1) = -N*Kr;
+            }
+        }
+
+    public:
+        BoozerAnalytic(double etabar, double B0, double N, double G0, double psi0, double iota0,
+                double Bbar, double I0, double G1, double I1, double K1, double iota1,
+                vector<double> B0z, vector<double> n, vector<double> m) :
+            BoozerMagneticField(psi0, analytic_field_type(I0, G1, I1, K1)),
+            etabar(etabar), B0(B0), N(N), G0(G0), iota0(iota0), Bbar(Bbar), I0(I0),
+            G1(G1), I1(I1), K1(K1), iota1(iota1), B0z(B0z), n(n), m(m) {
+            if (B0z.size() != n.size() || m.size() != n.size())
+                throw std::invalid_argument("B0z, n and m need to have the same length");
+        }
+
+        shared_ptr<BoozerMagneticField> clone() override {
+            return std::make_shared<BoozerAnalytic>(*this);
+        }
+
+        void evaluate_tracing_quantities(double s, double theta, double zeta, bool vacuum, bool noK, BoozerTracingQuantities& q) override {
+            modB_and_derivs(s, theta, zeta, q.modB, q.dmodBds, q.dmodBdtheta, q.dmodBdzeta);
+            q.G = G0 + G1*s;
+            q.iota = iota0 + iota1*s;
+            if (!vacuum) {
+                q.I = I0 + I1*s;
+                q.dGds = G1;
+                q.dIds = I1;
+                if (!noK) {
+                    double r = radius(s);
+                    double angle = theta - N*zeta;
+                    q.K = K1*r*std::sin(angle);
+                    q.dKdtheta = K1*r*std::cos(angle);
+                    q.dKdzeta = -N*q.dKdtheta;
+                }
+            }
+        }
+
+        void set_field_type() {
+            field_type = analytic_field_type(I0, G1, I1, K1);
+        }
+
+        void set_etabar(double etabar) { this->etabar = etabar; invalidate(); }
+        void set_B0(double B0) { this->B0 = B0; invalidate(); }
+        void set_B0z(vector<double> B0z) {
+            if (B0z.size() != n.size())
+                throw std::invalid_argument("B0z needs to have the same length as n and m");
+            this->B0z = B0z;
+            invalidate();
+        }
+        void set_Bbar(double Bbar) { this->Bbar = Bbar; invalidate(); }
+        void set_N(double N) { this->N = N; invalidate(); }
+        void set_G0(double G0) { this->G0 = G0; invalidate(); }
+        void set_I0(double I0) { this->I0 = I0; set_field_type(); invalidate(); }
+        void set_G1(double G1) { this->G1 = G1; set_field_type(); invalidate(); }
+        void set_I1(double I1) { this->I1 = I1; set_field_type(); invalidate(); }
+        void set_K1(double K1) { this->K1 = K1; set_field_type(); invalidate(); }
+        void set_iota0(double iota0) { this->iota0 = iota0; invalidate(); }
+        void set_iota1(double iota1) { this->iota1 = iota1; invalidate(); }
+        void set_psi0(double psi0) { this->psi0 = psi0; invalidate(); }
+};
@@ -10,6 +10,16 @@ using std::shared_ptr;
 using std::make_shared;
 using std::string;
 
+// Quantities that enter the guiding center equations at a single point, see
+// BoozerMagneticField::evaluate_tracing_quantities(). Derivatives of the flux
+// functions are taken with respect to s.
+struct BoozerTracingQuantities {
+    double modB = 0., dmodBds = 0., dmodBdtheta = 0., dmodBdzeta = 0.;
+    double G = 0., iota = 0.;
+    double I = 0., dGds = 0., dIds = 0.;
+    double K = 0., dKdtheta = 0., dKdzeta = 0.;
+};
+
 class BoozerMagneticField {
     public:
         using Array2 = xt::pytensor<double, 2, xt::layout_type::row_major>;
@@ -113,6 +123,7 @@ class BoozerMagneticField {
         }
         virtual void _set_points() {}
         Array2 points, points_sym;
+        Array2 point_buffer = xt::zeros<double>({1, 3}); // used by evaluate_tracing_quantities()
         Array2 data_modB, data_modB_derivs;
         Array2 data_dmodBds, data_dmodBdtheta, data_dmodBdzeta;
         Array2 data_G, data_dGds;
@@ -149,6 +160,46 @@ class BoozerMagneticField {
             this->set_points(vals);
         }
 
+        // Returns an evaluation context for the field: an object with its own
+        // points and result arrays, which shares all other data (e.g. interpolation
+        // tables) with this field. Contexts can be evaluated on different threads at
+        // the same time and without holding the GIL. This is only possible for fields
+        // that are implemented in C++ and do not call back into Python.
+        virtual shared_ptr<BoozerMagneticField> clone() {
+            throw logic_error("clone was not implemented, this field cannot be used for multithreaded tracing");
+        }
+
+        // Evaluates everything that the guiding center equations need at the single
+        // point (s, theta, zeta): modB and its derivatives, G and iota in vacuum mode,
+        // additionally I, dGds and dIds if noK, and additionally K and its derivatives
+        // otherwise. The default implementation calls set_points() and the accessors
+        // below, so the points of the field should not be relied upon afterwards.
+        // Fields can override this with a faster path for a single point.
+        virtual void evaluate_tracing_quantities(double s, double theta, double zeta, bool vacuum, bool noK, BoozerTracingQuantities& q) {
+            point_buffer(0, 0) = s;
+            point_buffer(0, 1) = theta;
+            point_buffer(0, 2) = zeta;
+            set_points(point_buffer);
+            q.modB = modB_ref()(0);
+            auto& modB_derivs = modB_derivs_ref();
+            q.dmodBds = modB_derivs(0);
+            q.dmodBdtheta = modB_derivs(1);
+            q.dmodBdzeta = modB_derivs(2);
+            q.G = G_ref()(0);
+            q.iota = iota_ref()(0);
+            if (!vacuum) {
+                q.I = I_ref()(0);
+                q.dGds = dGds_ref()(0);
+                q.dIds = dIds_ref()(0);
+                if (!noK) {
+                    q.K = K_ref()(0);
+                    auto& K_derivs = K_derivs_ref();
+                    q.dKdtheta = K_derivs(0);
+                    q.dKdzeta = K_derivs(1);
+                }
+            }
+        }
+
         void set_points(Array2& p) {
             npoints = p.shape(0);
             points.resize({npoints, 3});
@@ -19,165 +19,68 @@ class InterpolatedBoozerField : public BoozerMagneticField {
           status_dKdtheta = false, status_dKdzeta = false, status_K_derivs = false, \
           status_R_derivs = false, status_Z_derivs = false, status_nu_derivs = false, \
           status_modB_derivs = false;
+        // If true, evaluate_tracing_quantities() uses a single interpolant that packs
+        // modB, its derivatives and (for the general mode) K and its derivatives.
+        bool pack_tracing_quantities = false;
     private:
         shared_ptr<RegularGridInterpolant3D<Array2>> interp_modB, interp_dmodBdtheta, \
-          interp_dmodBdzeta, interp_dmodBds, interp_G, interp_iota, interp_dGds, \
-          interp_I, interp_dIds, interp_diotads, interp_psip, interp_R, interp_Z, \
-          interp_nu, interp_K, interp_dRdtheta, interp_dRdzeta, interp_dRds, \
-          interp_dZdtheta, interp_dZdzeta, interp_dZds, interp_dnudtheta, \
+          interp_dmodBdzeta, interp_dmodBds, interp_R, interp_Z, interp_nu, \
+          interp_K, interp_dRdtheta, interp_dRdzeta, interp_dRds, interp_dZdtheta, interp_dZdzeta, interp_dZds, interp_dnudtheta, \
           interp_dnudzeta, interp_dnuds, interp_dKdtheta, interp_dKdzeta, interp_K_derivs, \
           interp_nu_derivs, interp_R_derivs, interp_Z_derivs, interp_modB_derivs;
+        // Packed interpolant with value_size 4 (modB, dmodBds, dmodBdtheta, dmodBdzeta)
+        // or 7 (additionally K, dKdtheta, dKdzeta), see pack_tracing_quantities.
+        shared_ptr<RegularGridInterpolant3D<Array2>> interp_tracing;
+        int tracing_value_size = 0;
+        // The flux functions only depend on s and are interpolated together by one
+        // radial interpolant, in the order psip, G, I, iota, dGds, dIds, diotads.
+        shared_ptr<RegularGridInterpolant1D<Array2>> interp_fluxfunctions;
         const bool extrapolate;
         const bool stellsym = false;
         const int nfp = 1;
         vector<bool> symmetries = vector<bool>(1, false);
 
     protected:
-      void _psip_impl(Array2& psip) override {
-          if(!interp_psip)
-              interp_psip = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-          if(!status_psip) {
-              Array2 old_points = this->field->get_points();
-              string which_scalar = "psip";
-              std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                return fbatch_scalar(s,theta,zeta,which_scalar);
-              };
-              interp_psip->interpolate_batch(fbatch);
-              Array2 old_points_py(old_points);
-              this->field->set_points(old_points_py);
-              status_psip = true;
-          }
-          Array2 stz = this->get_points_ref();
-          points_sym.resize({npoints, 3});
-          Array2 stz0 = this->get_sym_points_ref();
-          exploit_fluxfunction_points(stz, stz0);
-          interp_psip->evaluate_batch(stz0, psip);
-      }
+        void _psip_impl(Array2& psip) override {
+            if(!status_psip)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(0, psip);
+        }
 
         void _G_impl(Array2& G) override {
-            if(!interp_G)
-                interp_G = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_G) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "G";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_G->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_G = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref(); 
-            exploit_fluxfunction_points(stz, stz0);
-            interp_G->evaluate_batch(stz0, G);
+            if(!status_G)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(1, G);
         }
 
         void _I_impl(Array2& I) override {
-            if(!interp_I)
-                interp_I = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_I) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "I";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_I->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_I = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref();
-            exploit_fluxfunction_points(stz, stz0);
-            interp_I->evaluate_batch(stz0, I);
+            if(!status_I)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(2, I);
         }
 
         void _iota_impl(Array2& iota) override {
-            if(!interp_iota)
-                interp_iota = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_iota) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "iota";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_iota->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_iota = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref(); 
-            exploit_fluxfunction_points(stz, stz0);
-            interp_iota->evaluate_batch(stz0, iota);
+            if(!status_iota)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(3, iota);
         }
 
         void _dGds_impl(Array2& dGds) override {
-            if(!interp_dGds)
-                interp_dGds = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_dGds) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "dGds";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_dGds->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_dGds = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref();
-            exploit_fluxfunction_points(stz, stz0);
-            interp_dGds->evaluate_batch(stz0, dGds);
+            if(!status_dGds)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(4, dGds);
         }
 
         void _dIds_impl(Array2& dIds) override {
-            if(!interp_dIds)
-                interp_dIds = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_dIds) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "dIds";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_dIds->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_dIds = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref();
-            exploit_fluxfunction_points(stz, stz0);
-            interp_dIds->evaluate_batch(stz0, dIds);
+            if(!status_dIds)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(5, dIds);
         }
 
         void _diotads_impl(Array2& diotads) override {
-            if(!interp_diotads)
-                interp_diotads = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-            if(!status_diotads) {
-                Array2 old_points = this->field->get_points();
-                string which_scalar = "diotads";
-                std::function<Vec(Vec, Vec, Vec)> fbatch = [this,which_scalar](Vec s, Vec theta, Vec zeta) {
-                  return fbatch_scalar(s,theta,zeta,which_scalar);
-                };
-                interp_diotads->interpolate_batch(fbatch);
-                Array2 old_points_py(old_points);
-                this->field->set_points(old_points_py);
-                status_diotads = true;
-            }
-            Array2 stz = this->get_points_ref();
-            points_sym.resize({npoints, 3});
-            Array2 stz0 = this->get_sym_points_ref();
-            exploit_fluxfunction_points(stz, stz0);
-            interp_diotads->evaluate_batch(stz0, diotads);
+            if(!status_diotads)
+                build_fluxfunction_interpolant();
+            evaluate_fluxfunction(6, diotads);
         }
 
         void _K_impl(Array2& K) override {
@@ -194,9 +97,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_K = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref();
+            Array2& stz_sym = this->get_sym_points_ref();
             exploit_symmetries_points(stz, stz_sym);
             interp_K->evaluate_batch(stz_sym, K);
             if(stellsym){
@@ -218,9 +121,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_dKdtheta = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref();
+            Array2& stz_sym = this->get_sym_points_ref();
             exploit_symmetries_points(stz, stz_sym);
             interp_dKdtheta->evaluate_batch(stz_sym, dKdtheta);
         }
@@ -239,9 +142,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_dKdzeta = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref(); 
+            Array2& stz_sym = this->get_sym_points_ref(); 
             exploit_symmetries_points(stz, stz_sym);
             interp_dKdzeta->evaluate_batch(stz_sym, dKdzeta);
         }
@@ -260,9 +163,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_K_derivs = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref();
+            Array2& stz_sym = this->get_sym_points_ref();
             exploit_symmetries_points(stz, stz_sym);
             interp_K_derivs->evaluate_batch(stz_sym, K_derivs);
         }
@@ -281,9 +184,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_nu = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref();               
+            Array2& stz_sym = this->get_sym_points_ref();               
             exploit_symmetries_points(stz, stz_sym);
             interp_nu->evaluate_batch(stz_sym, nu);
             if (stellsym) {
@@ -305,9 +208,9 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 this->field->set_points(old_points_py);
                 status_dnudtheta = true;
             }
-            Array2 stz = this->get_points_ref();
+            Array2& stz = this->get_points_ref();
             points_sym.resize({npoints, 3});
-            Array2 stz_sym = this->get_sym_points_ref();
+            Array2& stz_sym = this->get_sym_points_ref();
             exploit_symmetries_points(stz, stz_sym);
             interp_dnudtheta->evaluate_batch(stz_sym, dnudtheta);
         }
@@ -705,62 +608,55 @@ class InterpolatedBoozerField : public BoozerMagneticField {
             }
         }
 
-        void exploit_fluxfunction_points(Array2& stz, Array2& stz0){
-            int npoints = stz.shape(0);
-            double* dataptr = &(stz(0, 0));
-            double* datasymptr = &(stz0(0, 0));
-            for (int i = 0; i < npoints; ++i) {
-                double s = dataptr[3*i+0];
-                datasymptr[3*i+0] = s;
-                datasymptr[3*i+1] = 0.;
-                datasymptr[3*i+2] = 0.;
+        // Maps (theta, zeta) into the domain of the interpolants and returns whether
+        // stellarator symmetry was used to do so.
+        bool exploit_symmetries_point(double& theta, double& zeta){
+            double period = (2*M_PI)/nfp;
+            // Restrict theta to [0,2 pi]
+            int theta_mult = int(theta/(2*M_PI));
+            theta = theta - theta_mult * 2*M_PI;
+            if (theta < 0) {
+              theta = theta + 2*M_PI;
             }
+            if (theta > 2*M_PI) {
+              theta = theta - 2*M_PI;
+            }
+            // Restrict zeta to [0,2 pi/nfp]
+            int zeta_mult = int(zeta/period);
+            zeta = zeta - zeta_mult * period;
+            if (zeta < 0) {
+              zeta = zeta + period;
+            }
+            if (zeta > period) {
+              zeta = zeta - period;
+            }
+            assert(theta >= 0);
+            assert(theta <= 2*M_PI);
+            assert(zeta >= 0);
+            assert(zeta <= period);
+            if(theta > M_PI && stellsym) {
+                zeta = period-zeta;
+                theta = 2*M_PI-theta;
+                assert(theta >= 0);
+                assert(theta <= M_PI);
+                assert(zeta >= 0);
+                assert(zeta <= period);
+                return true;
+            }
+            return false;
         }
 
         void exploit_symmetries_points(Array2& stz, Array2& stz_sym){
             int npoints = stz.shape(0);
             if(symmetries.size() != npoints)
                 symmetries = vector<bool>(npoints, false);
-            double period = (2*M_PI)/nfp;
             double* dataptr = &(stz(0, 0));
             double* datasymptr = &(stz_sym(0, 0));
             for (int i = 0; i < npoints; ++i) {
                 double s = dataptr[3*i+0];
                 double theta = dataptr[3*i+1];
                 double zeta = dataptr[3*i+2];
-                // Restrict theta to [0,2 pi]
-                int theta_mult = int(theta/(2*M_PI));
-                theta = theta - theta_mult * 2*M_PI;
-                if (theta < 0) {
-                  theta = theta + 2*M_PI;
-                }
-                if (theta > 2*M_PI) {
-                  theta = theta - 2*M_PI;
-                }
-                // Restrict zeta to [0,2 pi/nfp]
-                int zeta_mult = int(zeta/period);
-                zeta = zeta - zeta_mult * period;
-                if (zeta < 0) {
-                  zeta = zeta + period;
-                }
-                if (zeta > period) {
-                  zeta = zeta - period;
-                }
-                assert(theta >= 0);
-                assert(theta <= 2*M_PI);
-                assert(zeta >= 0);
-                assert(zeta <= period);
-                if(theta > M_PI && stellsym) {
-                    zeta = period-zeta;
-                    theta = 2*M_PI-theta;
-                    symmetries[i] = true;
-                    assert(theta >= 0);
-                    assert(theta <= M_PI);
-                    assert(zeta >= 0);
-                    assert(zeta <= period);
-                } else{
-                    symmetries[i] = false;
-                }
+                symmetries[i] = exploit_symmetries_point(theta, zeta);
                 datasymptr[3*i+0] = s;
                 datasymptr[3*i+1] = theta;
                 datasymptr[3*i+2] = zeta;
@@ -795,10 +691,8 @@ class InterpolatedBoozerField : public BoozerMagneticField {
             Array2 points = xt::zeros<double>({npoints, 3});
             for(int i=0; i<npoints; i++) {
                 points(i, 0) = s[i];
-                if ((which_scalar != "G") && (which_scalar != "I") && (which_scalar != "iota") && (which_scalar != "dGds") && (which_scalar != "dIds") && (which_scalar != "diotads")) {
-                  points(i, 1) = theta[i];
-                  points(i, 2) = zeta[i];
-                }
+                points(i, 1) = theta[i];
+                points(i, 2) = zeta[i];
             }
             Array2 points_py(points);
             this->field->set_points(points_py);
@@ -856,29 +750,152 @@ class InterpolatedBoozerField : public BoozerMagneticField {
             } else if (which_scalar == "modB_derivs") {
               scalar = this->field->modB_derivs();
               npoints = 3*npoints;
-            } else if (which_scalar == "G") {
-              scalar = this->field->G();
-            } else if (which_scalar == "I") {
-              scalar = this->field->I();
-            } else if (which_scalar == "psip") {
-              scalar = this->field->psip();
-            } else if (which_scalar == "iota") {
-              scalar = this->field->iota();
-            } else if (which_scalar == "dGds") {
-              scalar = this->field->dGds();
-            } else if (which_scalar == "dIds") {
-              scalar = this->field->dIds();
-            } else if (which_scalar == "diotads") {
-              scalar = this->field->diotads();
             } else {
               throw std::runtime_error("Incorrect value for which_scalar.");
             }
             return Vec(scalar.data(), scalar.data()+npoints);
         }
 
+        Vec fbatch_tracing(Vec s, Vec theta, Vec zeta, bool with_K) {
+            int npoints = s.size();
+            Array2 points = xt::zeros<double>({npoints, 3});
+            for(int i=0; i<npoints; i++) {
+                points(i, 0) = s[i];
+                points(i, 1) = theta[i];
+                points(i, 2) = zeta[i];
+            }
+            this->field->set_points(points);
+            Array2 modB = this->field->modB();
+            Array2 modB_derivs = this->field->modB_derivs();
+            Array2 K, K_derivs;
+            if (with_K) {
+              K = this->field->K();
+              K_derivs = this->field->K_derivs();
+            }
+            int value_size = with_K ? 7 : 4;
+            Vec res(value_size*npoints, 0.);
+            for(int i=0; i<npoints; i++) {
+                res[value_size*i+0] = modB(i, 0);
+                res[value_size*i+1] = modB_derivs(i, 0);
+                res[value_size*i+2] = modB_derivs(i, 1);
+                res[value_size*i+3] = modB_derivs(i, 2);
+                if (with_K) {
+                  res[value_size*i+4] = K(i, 0);
+                  res[value_size*i+5] = K_derivs(i, 0);
+                  res[value_size*i+6] = K_derivs(i, 1);
+                }
+            }
+            return res;
+        }
+
+        Vec fbatch_fluxfunctions(Vec s) {
+            int npoints = s.size();
+            Array2 points = xt::zeros<double>({npoints, 3});
+            for(int i=0; i<npoints; i++) {
+                points(i, 0) = s[i];
+            }
+            this->field->set_points(points);
+            Array2 psip = this->field->psip();
+            Array2 G = this->field->G();
+            Array2 I = this->field->I();
+            Array2 iota = this->field->iota();
+            Array2 dGds = this->field->dGds();
+            Array2 dIds = this->field->dIds();
+            Array2 diotads = this->field->diotads();
+            Vec res(7*npoints, 0.);
+            for(int i=0; i<npoints; i++) {
+                res[7*i+0] = psip(i, 0);
+                res[7*i+1] = G(i, 0);
+                res[7*i+2] = I(i, 0);
+                res[7*i+3] = iota(i, 0);
+                res[7*i+4] = dGds(i, 0);
+                res[7*i+5] = dIds(i, 0);
+                res[7*i+6] = diotads(i, 0);
+            }
+            return res;
+        }
+
+        void build_fluxfunction_interpolant() {
+            interp_fluxfunctions = std::make_shared<RegularGridInterpolant1D<Array2>>(rule, s_range, 7, extrapolate);
+            Array2 old_points = this->field->get_points();
+            std::function<Vec(Vec)> fbatch = [this](Vec s) {
+              return fbatch_fluxfunctions(s);
+            };
+            interp_fluxfunctions->interpolate_batch(fbatch);
+            Array2 old_points_py(old_points);
+            this->field->set_points(old_points_py);
+            status_psip = status_G = status_I = status_iota = true;
+            status_dGds = status_dIds = status_diotads = true;
+        }
+
+        // Writes the flux function with index idx in interp_fluxfunctions at the
+        // current points to the single column of res.
+        void evaluate_fluxfunction(int idx, Array2& res) {
+            Array2& stz = this->get_points_ref();
+            for (int i = 0; i < npoints; ++i) {
+                double vals[7] = {0., 0., 0., 0., 0., 0., 0.};
+                interp_fluxfunctions->evaluate_inplace(stz(i, 0), vals);
+                res(i, 0) = vals[idx];
+            }
+        }
+
+        std::pair<double, double> estimate_error_fluxfunction(int idx, int samples) {
+            if(!interp_fluxfunctions)
+                build_fluxfunction_interpolant();
+            std::function<Vec(Vec)> fbatch = [this](Vec s) {
+              return fbatch_fluxfunctions(s);
+            };
+            return interp_fluxfunctions->estimate_error(fbatch, samples, idx);
+        }
+
+        // Returns the member that holds the interpolant of the given quantity and its
+        // status flag.
+        std::pair<shared_ptr<RegularGridInterpolant3D<Array2>>*, bool*> interpolant_member(const string& name) {
+            if (name == "modB") return {&interp_modB, &status_modB};
+            if (name == "dmodBdtheta") return {&interp_dmodBdtheta, &status_dmodBdtheta};
+            if (name == "dmodBdzeta") return {&interp_dmodBdzeta, &status_dmodBdzeta};
+            if (name == "dmodBds") return {&interp_dmodBds, &status_dmodBds};
+            if (name == "modB_derivs") return {&interp_modB_derivs, &status_modB_derivs};
+            if (name == "K") return {&interp_K, &status_K};
+            if (name == "dKdtheta") return {&interp_dKdtheta, &status_dKdtheta};
+            if (name == "dKdzeta") return {&interp_dKdzeta, &status_dKdzeta};
+            if (name == "K_derivs") return {&interp_K_derivs, &status_K_derivs};
+            if (name == "R") return {&interp_R, &status_R};
+            if (name == "dRdtheta") return {&interp_dRdtheta, &status_dRdtheta};
+            if (name == "dRdzeta") return {&interp_dRdzeta, &status_dRdzeta};
+            if (name == "dRds") return {&interp_dRds, &status_dRds};
+            if (name == "R_derivs") return {&interp_R_derivs, &status_R_derivs};
+            if (name == "Z") return {&interp_Z, &status_Z};
+            if (name == "dZdtheta") return {&interp_dZdtheta, &status_dZdtheta};
+            if (name == "dZdzeta") return {&interp_dZdzeta, &status_dZdzeta};
+            if (name == "dZds") return {&interp_dZds, &status_dZds};
+            if (name == "Z_derivs") return {&interp_Z_derivs, &status_Z_derivs};
+            if (name == "nu") return {&interp_nu, &status_nu};
+            if (name == "dnudtheta") return {&interp_dnudtheta, &status_dnudtheta};
+            if (name == "dnudzeta") return {&interp_dnudzeta, &status_dnudzeta};
+            if (name == "dnuds") return {&interp_dnuds, &status_dnuds};
+            if (name == "nu_derivs") return {&interp_nu_derivs, &status_nu_derivs};
+            throw std::invalid_argument("Unknown interpolant " + name);
+        }
+
+        // Returns the interpolant of the given quantity, and creates it without
+        // building it if it does not exist yet.
+        shared_ptr<RegularGridInterpolant3D<Array2>> create_interpolant(const string& name) {
+            auto member = interpolant_member(name);
+            if (!*member.first) {
+                int value_size = 1;
+                if (name == "K_derivs")
+                    value_size = 2;
+                else if (name.size() > 7 && name.compare(name.size() - 7, 7, "_derivs") == 0)
+                    value_size = 3;
+                *member.first = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, theta_range, zeta_range, value_size, extrapolate);
+            }
+            return *member.first;
+        }
+
     public:
         const shared_ptr<BoozerMagneticField> field;
-        const RangeTriplet s_range, theta_range, zeta_range, angle0_range = {0., M_PI, 1};
+        const RangeTriplet s_range, theta_range, zeta_range;
         using BoozerMagneticField::npoints;
         const InterpolationRule rule;
 
@@ -894,6 +911,192 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 RangeTriplet s_range, RangeTriplet theta_range, RangeTriplet zeta_range,
                 bool extrapolate, int nfp, bool stellsym, string field_type) : InterpolatedBoozerField(field, UniformInterpolationRule(degree), s_range, theta_range, zeta_range, extrapolate, nfp, stellsym, field_type) {}
 
+        // The copy shares the underlying field and all interpolants that have been
+        // built so far, and only owns the points and the arrays that the results are
+        // written to. Interpolants that have not been built yet would be built from
+        // the Python field on first use, so the caller should evaluate all required
+        // quantities before creating a copy that is used without the GIL.
+        shared_ptr<BoozerMagneticField> clone() override {
+            return std::make_shared<InterpolatedBoozerField>(*this);
+        }
+
+        // Builds the interpolant that packs modB and its derivatives, and K and its
+        // derivatives if with_K, see pack_tracing_quantities.
+        void build_tracing_interpolant(bool with_K) {
+            int value_size = with_K ? 7 : 4;
+            interp_tracing = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, theta_range, zeta_range, value_size, extrapolate);
+            Array2 old_points = this->field->get_points();
+            std::function<Vec(Vec, Vec, Vec)> fbatch = [this,with_K](Vec s, Vec theta, Vec zeta) {
+              return fbatch_tracing(s,theta,zeta,with_K);
+            };
+            interp_tracing->interpolate_batch(fbatch);
+            Array2 old_points_py(old_points);
+            this->field->set_points(old_points_py);
+            tracing_value_size = value_size;
+        }
+
+        // Returns the interpolant of the given quantity, or of the packed tracing
+        // quantities for name "tracing", if it has been built and nullptr otherwise.
+        shared_ptr<RegularGridInterpolant3D<Array2>> get_interpolant(const string& name) {
+            if (name == "tracing")
+                return interp_tracing;
+            auto member = interpolant_member(name);
+            return *member.second ? *member.first : nullptr;
+        }
+
+        // Uses the given interpolant, e.g. one with stored coefficients, for the
+        // given quantity instead of building it from the underlying field.
+        void set_interpolant(const string& name, shared_ptr<RegularGridInterpolant3D<Array2>> interp) {
+            if (name == "tracing") {
+                interp_tracing = interp;
+                tracing_value_size = interp->get_value_size();
+                return;
+            }
+            auto member = interpolant_member(name);
+            *member.first = interp;
+            *member.second = true;
+        }
+
+        shared_ptr<RegularGridInterpolant1D<Array2>> get_fluxfunction_interpolant() {
+            return interp_fluxfunctions;
+        }
+
+        void set_fluxfunction_interpolant(shared_ptr<RegularGridInterpolant1D<Array2>> interp) {
+            interp_fluxfunctions = interp;
+            status_psip = status_G = status_I = status_iota = true;
+            status_dGds = status_dIds = status_diotads = true;
+        }
+
+        // Evaluates the underlying field at the dofs with index first to last-1 of
+        // the interpolant of the given quantity, see
+        // RegularGridInterpolant3D::evaluate_dofs. Together with
+        // set_interpolant_dof_values this allows to split building an interpolant
+        // over several processes.
+        Vec evaluate_interpolant_dofs(const string& name, uint32_t first, uint32_t last) {
+            auto interp = create_interpolant(name);
+            Array2 old_points = this->field->get_points();
+            std::function<Vec(Vec, Vec, Vec)> fbatch = [this,name](Vec s, Vec theta, Vec zeta) {
+              return fbatch_scalar(s,theta,zeta,name);
+            };
+            Vec res = interp->evaluate_dofs(fbatch, first, last);
+            Array2 old_points_py(old_points);
+            this->field->set_points(old_points_py);
+            return res;
+        }
+
+        // Builds the interpolant of the given quantity from the values of the
+        // underlying field at all of its dofs.
+        void set_interpolant_dof_values(const string& name, const Vec& dof_vals) {
+            create_interpolant(name)->set_dof_values(dof_vals);
+            *interpolant_member(name).second = true;
+        }
+
+        uint32_t get_interpolant_dof_count(const string& name) {
+            return create_interpolant(name)->get_dof_count();
+        }
+
+        // Same as evaluate_interpolant_dofs for several quantities at once. All
+        // interpolants share the same grid, so the quantities are evaluated one
+        // after the other on each batch of points. This allows the underlying field
+        // to compute quantities that share work, e.g. modB and its derivatives in
+        // BoozerRadialInterpolant, in one pass.
+        std::vector<Vec> evaluate_interpolants_dofs(const std::vector<string>& names, uint32_t first, uint32_t last) {
+            std::vector<shared_ptr<RegularGridInterpolant3D<Array2>>> interps;
+            std::vector<std::function<Vec(Vec, Vec, Vec)>> fbatches;
+            std::vector<Vec> res(names.size());
+            for (size_t i = 0; i < names.size(); ++i) {
+                interps.push_back(create_interpolant(names[i]));
+                string name = names[i];
+                fbatches.push_back([this,name](Vec s, Vec theta, Vec zeta) {
+                  return fbatch_scalar(s,theta,zeta,name);
+                });
+                res[i].reserve(size_t(last-first) * interps[i]->get_value_size());
+            }
+            Array2 old_points = this->field->get_points();
+            uint32_t BATCH_SIZE = 16384;
+            for (uint32_t batch_first = first; batch_first < last; batch_first += BATCH_SIZE) {
+                uint32_t batch_last = std::min(batch_first + BATCH_SIZE, last);
+                for (size_t i = 0; i < names.size(); ++i) {
+                    Vec vals = interps[i]->evaluate_dofs(fbatches[i], batch_first, batch_last);
+                    res[i].insert(res[i].end(), vals.begin(), vals.end());
+                }
+            }
+            Array2 old_points_py(old_points);
+            this->field->set_points(old_points_py);
+            return res;
+        }
+
+        // Builds the interpolants of the given quantities from the underlying
+        // field, see evaluate_interpolants_dofs.
+        void build_interpolants(const std::vector<string>& names) {
+            uint32_t dof_count = names.empty() ? 0 : get_interpolant_dof_count(names[0]);
+            std::vector<Vec> vals = evaluate_interpolants_dofs(names, 0, dof_count);
+            for (size_t i = 0; i < names.size(); ++i) {
+                set_interpolant_dof_values(names[i], vals[i]);
+            }
+        }
+
+        // Evaluates the interpolants directly at the single point, without going
+        // through the points and result arrays of the field, and with one symmetry
+        // mapping for all quantities. Interpolants that do not exist yet are built
+        // first, which calls the underlying field.
+        void evaluate_tracing_quantities(double s, double theta, double zeta, bool vacuum, bool noK, BoozerTracingQuantities& q) override {
+            bool with_K = !vacuum && !noK;
+            if (!(status_G && status_iota && (vacuum || (status_I && status_dGds && status_dIds)))) {
+                build_fluxfunction_interpolant();
+            }
+            if (pack_tracing_quantities) {
+                if (!interp_tracing || (with_K && tracing_value_size < 7)) {
+                    build_tracing_interpolant(with_K);
+                }
+            } else if (!(status_modB && status_modB_derivs && (!with_K || (status_K && status_K_derivs)))) {
+                point_buffer(0, 0) = s;
+                point_buffer(0, 1) = theta;
+                point_buffer(0, 2) = zeta;
+                set_points(point_buffer);
+                modB_ref();
+                modB_derivs_ref();
+                if (with_K) {
+                    K_ref();
+                    K_derivs_ref();
+                }
+            }
+
+            // fluxvals = [psip, G, I, iota, dGds, dIds, diotads]
+            double fluxvals[7] = {0., 0., 0., 0., 0., 0., 0.};
+            interp_fluxfunctions->evaluate_inplace(s, fluxvals);
+            q.G = fluxvals[1];
+            q.iota = fluxvals[3];
+            if (!vacuum) {
+                q.I = fluxvals[2];
+                q.dGds = fluxvals[4];
+                q.dIds = fluxvals[5];
+            }
+
+            // vals = [modB, dmodBds, dmodBdtheta, dmodBdzeta, K, dKdtheta, dKdzeta]
+            bool symmetric = exploit_symmetries_point(theta, zeta);
+            double vals[7] = {0., 0., 0., 0., 0., 0., 0.};
+            if (pack_tracing_quantities) {
+                interp_tracing->evaluate_inplace(s, theta, zeta, vals);
+            } else {
+                interp_modB->evaluate_inplace(s, theta, zeta, vals);
+                interp_modB_derivs->evaluate_inplace(s, theta, zeta, vals+1);
+                if (with_K) {
+                    interp_K->evaluate_inplace(s, theta, zeta, vals+4);
+                    interp_K_derivs->evaluate_inplace(s, theta, zeta, vals+5);
+                }
+            }
+            q.modB = vals[0];
+            q.dmodBds = vals[1];
+            q.dmodBdtheta = symmetric ? -vals[2] : vals[2];
+            q.dmodBdzeta = symmetric ? -vals[3] : vals[3];
+            if (with_K) {
+                q.K = symmetric ? -vals[4] : vals[4];
+                q.dKdtheta = vals[5];
+                q.dKdzeta = vals[6];
+            }
+        }
+
                 std::pair<double, double> estimate_error_modB(int samples) {
                     if(!interp_modB) {
                       interp_modB = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, theta_range, zeta_range, 1, extrapolate);
@@ -980,53 +1183,14 @@ class InterpolatedBoozerField : public BoozerMagneticField {
                 }
 
                 std::pair<double, double> estimate_error_G(int samples) {
-                    if(!interp_G) {
-                      interp_G = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-                    }
-                    std::function<Vec(Vec, Vec, Vec)> fbatch = [this](Vec s, Vec theta, Vec zeta) {
-                      return fbatch_scalar(s,theta,zeta,"G");
-                    };
-                    if(!status_G) {
-                        Array2 old_points = this->field->get_points();
-                        interp_G->interpolate_batch(fbatch);
-                        Array2 old_points_py(old_points);
-                        this->field->set_points(old_points_py);
-                        status_G = true;
-                    }
-                    return interp_G->estimate_error(fbatch, samples);
+                    return estimate_error_fluxfunction(1, samples);
                 }
 
                 std::pair<double, double> estimate_error_I(int samples) {
-                    if(!interp_I) {
-                      interp_I = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-                    }
-                    std::function<Vec(Vec, Vec, Vec)> fbatch = [this](Vec s, Vec theta, Vec zeta) {
-                      return fbatch_scalar(s,theta,zeta,"I");
-                    };
-                    if(!status_I) {
-                        Array2 old_points = this->field->get_points();
-                        interp_I->interpolate_batch(fbatch);
-                        Array2 old_points_py(old_points);
-                        this->field->set_points(old_points_py);
-                        status_I = true;
-                    }
-                    return interp_I->estimate_error(fbatch, samples);
+                    return estimate_error_fluxfunction(2, samples);
                 }
 
                 std::pair<double, double> estimate_error_iota(int samples) {
-                    if(!interp_iota) {
-                      interp_iota = std::make_shared<RegularGridInterpolant3D<Array2>>(rule, s_range, angle0_range, angle0_range, 1, extrapolate);
-                    }
-                    std::function<Vec(Vec, Vec, Vec)> fbatch = [this](Vec s, Vec theta, Vec zeta) {
-                      return fbatch_scalar(s,theta,zeta,"iota");
-                    };
-                    if(!status_iota) {
-                        Array2 old_points = this->field->get_points();
-                        interp_iota->interpolate_batch(fbatch);
-                        Array2 old_points_py(old_points);
-                        this->field->set_points(old_points_py);
-                        status_iota = true;
-                    }
-                    return interp_iota->estimate_error(fbatch, samples);
+                    return estimate_error_fluxfunction(3, samples);
                 }
 };
@@ -1,5 +1,6 @@
 #include "boozerradialinterpolant.h"
 #include <math.h>
+#include <cmath>
 #include "xtensor-python/pyarray.hpp"
 typedef xt::pyarray<double> Array;
 #include <xtensor/xview.hpp>
@@ -7,16 +8,66 @@ typedef xt::pyarray<double> Array;
 #include <cstdio>
 #include <iostream>
 #include <string>
+#include <algorithm>
+#include <stdexcept>
+#include <vector>
 #include <xsimd/xsimd.hpp>
 
 namespace xs = xsimd;
 #define ANGLE_RECOMPUTE 5
 
+// Number of angle points whose tables of sin and cos are computed together in
+// compute_kmns and compute_kmnc_kmns, before the surfaces are processed in parallel.
+#define K_POINT_BLOCK 64
+
+// Fills the tables of sin and cos of xm*theta-xn*zeta for all (padded) modes.
+static void fill_angle_table(double* sin_angles, double* cos_angles, double* xm_array, double* xn_array,
+    std::size_t num_modes, double theta_value, double zeta_value) {
+    constexpr std::size_t simd_size = xsimd::simd_type<double>::size;
+    simd_t theta(theta_value);
+    simd_t zeta(zeta_value);
+    for (std::size_t im=0; im < num_modes; im+=simd_size) {
+        xs::batch<double, simd_size> b_sin, b_cos, b_xm, b_xn;
+
+        b_xm = xs::load_aligned(&xm_array[im]);
+        b_xn = xs::load_aligned(&xn_array[im]);
+
+        sincos(xs::fms(b_xm, theta, b_xn*zeta), b_sin, b_cos);
+
+        b_sin.store_aligned(&sin_angles[im]);
+        b_cos.store_aligned(&cos_angles[im]);
+    }
+}
+
+// Returns K at the point with the angle zeta from the Fourier series of R, Z, nu
+// and their derivatives at the point.
+static double boozer_K(double zeta, double B, double R, double dRdtheta, double dRdzeta, double dRds,
+    double dZdtheta, double dZdzeta, double dZds, double nu, double dnuds, double dnudtheta, double dnudzeta,
+    double G, double iota, double I) {
+    double phi = zeta - nu;
+    double dphids = - dnuds;
+    double dphidtheta = - dnudtheta;
+    double dphidzeta = 1. - dnudzeta;
+    double dXdtheta = dRdtheta * cos(phi) - R * sin(phi) * dphidtheta;
+    double dYdtheta = dRdtheta * sin(phi) + R * cos(phi) * dphidtheta;
+    double dXds   = dRds   * cos(phi) - R * sin(phi) * dphids;
+    double dYds   = dRds   * sin(phi) + R * cos(phi) * dphids;
+    double dXdzeta  = dRdzeta  * cos(phi) - R * sin(phi) * dphidzeta;
+    double dYdzeta  = dRdzeta  * sin(phi) + R * cos(phi) * dphidzeta;
+    double gstheta = dXdtheta * dXds + dYdtheta * dYds + dZdtheta * dZds;
+    double gszeta  = dXdzeta  * dXds + dYdzeta  * dYds + dZdzeta  * dZds;
+    double sqrtg = (G + iota*I)/(B*B);
+    return (gszeta + iota*gstheta)/sqrtg;
+}
+
 void compute_kmnc_kmns(Array& kmnc, Array& kmns, Array& rmnc, Array& drmncds, Array& zmns, Array& dzmnsds,\
     Array& numns, Array& dnumnsds, Array& bmnc,\
     Array& rmns, Array& drmnsds, Array& zmnc, Array& dzmncds,\
     Array& numnc, Array& dnumncds, Array& bmns,\
     Array& iota, Array& G, Array& I, Array& xm, Array& xn, Array& thetas, Array& zetas) {
+    // The angle points are processed in blocks. The tables of sin and cos of a
+    // block are computed first, and then the surfaces, each of which only
+    // updates its own row of kmns and kmnc, are processed in parallel.
 
     std::size_t num_modes = rmnc.shape(1);
     std::size_t num_surf = rmnc.shape(0);
@@ -24,8 +75,8 @@ void compute_kmnc_kmns(Array& kmnc, Array& kmns, Array& rmnc, Array& drmncds, Ar
 
     constexpr std::size_t simd_size = xsimd::simd_type<double>::size;
 
-    AlignedPaddedVec sin_angles(num_modes, 0.);
-    AlignedPaddedVec cos_angles(num_modes, 0.);
+    AlignedPaddedVec sin_angles(K_POINT_BLOCK*num_modes, 0.);
+    AlignedPaddedVec cos_angles(K_POINT_BLOCK*num_modes, 0.);
 
     double* kmnc_array = kmnc.data(); 
     double* kmns_array = kmns.data(); 
@@ -50,87 +101,71 @@ void compute_kmnc_kmns(Array& kmnc, Array& kmns, Array& rmnc, Array& drmncds, Ar
     double* I_array = I.data(); 
     double* xm_array = xm.data();
     double* xn_array = xn.data();
+    double* thetas_array = thetas.data();
+    double* zetas_array = zetas.data();
 
-    for (std::size_t ip=0; ip < num_points; ++ip) {
-        double n_zeta = zetas(ip);
-        simd_t theta(thetas(ip));
-        simd_t zeta(n_zeta);
-        
-
-        for (std::size_t im=0; im < num_modes; im+=simd_size) {
-            xs::batch<double, simd_size> b_sin, b_cos, b_xm, b_xn;
-
-            b_xm = xs::load_aligned(&xm_array[im]);
-            b_xn = xs::load_aligned(&xn_array[im]);
-
-            sincos(xs::fms(b_xm, theta, b_xn*zeta), b_sin, b_cos);
-            // sin_angles[im] = sin(xm_array[im]*theta-xn_array[im]*zeta);
-            // cos_angles[im] = cos(xm_array[im]*theta-xn_array[im]*zeta);
+    for (std::size_t first=0; first < num_points; first += K_POINT_BLOCK) {
+        int block = std::min<std::size_t>(K_POINT_BLOCK, num_points - first);
 
-            b_sin.store_aligned(&sin_angles[im]);
-            b_cos.store_aligned(&cos_angles[im]);
+        #pragma omp parallel for
+        for (int ib=0; ib < block; ++ib) {
+            fill_angle_table(&sin_angles[ib*num_modes], &cos_angles[ib*num_modes], xm_array, xn_array,
+                num_modes, thetas_array[first+ib], zetas_array[first+ib]);
         }
 
-        for (std::size_t isurf=0; isurf < num_surf; ++isurf) {  
-            double B = 0.;
-            double R = 0.;
-            double dRdtheta = 0.;
-            double dRdzeta = 0.;
-            double dRds = 0.;
-            double dZdtheta = 0.;
-            double dZdzeta = 0.;
-            double dZds = 0.;
-            double nu = 0.;
-            double dnuds = 0.;
-            double dnudtheta = 0.;
-            double dnudzeta = 0.;
-            #pragma omp simd
-            for (int im=0; im < num_modes; ++im) {
-                B += bmnc_array[isurf*num_modes+im]*cos_angles[im] + bmns_array[isurf*num_modes+im]*sin_angles[im];
-                R += rmnc_array[isurf*num_modes+im]*cos_angles[im] + rmns_array[isurf*num_modes+im]*sin_angles[im];
-                dRdtheta += -rmnc_array[isurf*num_modes+im]*xm_array[im]*sin_angles[im] + rmns_array[isurf*num_modes+im]*xm_array[im]*cos_angles[im];
-                dRdzeta  +=  rmnc_array[isurf*num_modes+im]*xn_array[im]*sin_angles[im] - rmns_array[isurf*num_modes+im]*xn_array[im]*cos_angles[im];
-                dRds += drmncds_array[isurf*num_modes+im]*cos_angles[im] + drmnsds_array[isurf*num_modes+im]*sin_angles[im];
-                dZdtheta += zmns_array[isurf*num_modes+im]*xm_array[im]*cos_angles[im] - zmnc_array[isurf*num_modes+im]*xm_array[im]*sin_angles[im];
-                dZdzeta += -zmns_array[isurf*num_modes+im]*xn_array[im]*cos_angles[im] + zmnc_array[isurf*num_modes+im]*xn_array[im]*sin_angles[im];
-                dZds += dzmnsds_array[isurf*num_modes+im]*sin_angles[im] + dzmncds_array[isurf*num_modes+im]*cos_angles[im];
-                nu   += numns_array[isurf*num_modes+im]*sin_angles[im] + numnc_array[isurf*num_modes+im]*cos_angles[im];
-                dnuds += dnumnsds_array[isurf*num_modes+im]*sin_angles[im] + dnumncds_array[isurf*num_modes+im]*cos_angles[im];
-                dnudtheta += numns_array[isurf*num_modes+im]*xm_array[im]*cos_angles[im] - numnc_array[isurf*num_modes+im]*xm_array[im]*sin_angles[im];
-                dnudzeta += -numns_array[isurf*num_modes+im]*xn_array[im]*cos_angles[im] + numnc_array[isurf*num_modes+im]*xn_array[im]*sin_angles[im];
-            }
-            double phi = n_zeta - nu;
-            double dphids = - dnuds;
-            double dphidtheta = - dnudtheta;
-            double dphidzeta = 1. - dnudzeta;
-            double dXdtheta = dRdtheta * cos(phi) - R * sin(phi) * dphidtheta;
-            double dYdtheta = dRdtheta * sin(phi) + R * cos(phi) * dphidtheta;
-            double dXds   = dRds   * cos(phi) - R * sin(phi) * dphids;
-            double dYds   = dRds   * sin(phi) + R * cos(phi) * dphids;
-            double dXdzeta  = dRdzeta  * cos(phi) - R * sin(phi) * dphidzeta;
-            double dYdzeta  = dRdzeta  * sin(phi) + R * cos(phi) * dphidzeta;
-            double gstheta = dXdtheta * dXds + dYdtheta * dYds + dZdtheta * dZds;
-            double gszeta  = dXdzeta  * dXds + dYdzeta  * dYds + dZdzeta  * dZds;
-            double sqrtg = (G_array[isurf] + iota_array[isurf]*I_array[isurf])/(B*B);
-            double K = (gszeta + iota_array[isurf]*gstheta)/sqrtg;
-            simd_t b_K(K);
-            simd_t b_coe(2.*M_PI*M_PI);
-
-            for (std::size_t im=0; im < num_modes; im+=simd_size) {
-                xs::batch<double, simd_size> b_sin,b_cos, b_kmns, b_kmnc; 
-
-                b_sin = xs::load_aligned(&sin_angles[im]);
-                b_cos = xs::load_aligned(&cos_angles[im]);
-                b_kmns = xs::load_aligned(&kmns_array[isurf*num_modes+im]);
-                b_kmnc = xs::load_aligned(&kmnc_array[isurf*num_modes+im]);
-                
-                b_kmns = xs::fma(b_K, b_sin/b_coe, b_kmns);
-                b_kmnc = xs::fma(b_K, b_cos/b_coe, b_kmnc);
+        #pragma omp parallel for
+        for (int isurf=0; isurf < num_surf; ++isurf) {
+            for (int ib=0; ib < block; ++ib) {
+                const double* sin_row = &sin_angles[ib*num_modes];
+                const double* cos_row = &cos_angles[ib*num_modes];
+                double B = 0.;
+                double R = 0.;
+                double dRdtheta = 0.;
+                double dRdzeta = 0.;
+                double dRds = 0.;
+                double dZdtheta = 0.;
+                double dZdzeta = 0.;
+                double dZds = 0.;
+                double nu = 0.;
+                double dnuds = 0.;
+                double dnudtheta = 0.;
+                double dnudzeta = 0.;
+                #pragma omp simd reduction(+:B,R,dRdtheta,dRdzeta,dRds,dZdtheta,dZdzeta,dZds,nu,dnuds,dnudtheta,dnudzeta)
+                for (int im=0; im < num_modes; ++im) {
+                    B += bmnc_array[isurf*num_modes+im]*cos_row[im] + bmns_array[isurf*num_modes+im]*sin_row[im];
+                    R += rmnc_array[isurf*num_modes+im]*cos_row[im] + rmns_array[isurf*num_modes+im]*sin_row[im];
+                    dRdtheta += -rmnc_array[isurf*num_modes+im]*xm_array[im]*sin_row[im] + rmns_array[isurf*num_modes+im]*xm_array[im]*cos_row[im];
+                    dRdzeta  +=  rmnc_array[isurf*num_modes+im]*xn_array[im]*sin_row[im] - rmns_array[isurf*num_modes+im]*xn_array[im]*cos_row[im];
+                    dRds += drmncds_array[isurf*num_modes+im]*cos_row[im] + drmnsds_array[isurf*num_modes+im]*sin_row[im];
+                    dZdtheta += zmns_array[isurf*num_modes+im]*xm_array[im]*cos_row[im] - zmnc_array[isurf*num_modes+im]*xm_array[im]*sin_row[im];
+                    dZdzeta += -zmns_array[isurf*num_modes+im]*xn_array[im]*cos_row[im] + zmnc_array[isurf*num_modes+im]*xn_array[im]*sin_row[im];
+                    dZds += dzmnsds_array[isurf*num_modes+im]*sin_row[im] + dzmncds_array[isurf*num_modes+im]*cos_row[im];
+                    nu   += numns_array[isurf*num_modes+im]*sin_row[im] + numnc_array[isurf*num_modes+im]*cos_row[im];
+                    dnuds += dnumnsds_array[isurf*num_modes+im]*sin_row[im] + dnumncds_array[isurf*num_modes+im]*cos_row[im];
+                    dnudtheta += numns_array[isurf*num_modes+im]*xm_array[im]*cos_row[im] - numnc_array[isurf*num_modes+im]*xm_array[im]*sin_row[im];
+                    dnudzeta += -numns_array[isurf*num_modes+im]*xn_array[im]*cos_row[im] + numnc_array[isurf*num_modes+im]*xn_array[im]*sin_row[im];
+                }
+                double K = boozer_K(zetas_array[first+ib], B, R, dRdtheta, dRdzeta, dRds, dZdtheta, dZdzeta, dZds,
+                    nu, dnuds, dnudtheta, dnudzeta, G_array[isurf], iota_array[isurf], I_array[isurf]);
+                simd_t b_K(K);
+                simd_t b_coe(2.*M_PI*M_PI);
+
+                for (std::size_t im=0; im < num_modes; im+=simd_size) {
+                    xs::batch<double, simd_size> b_sin,b_cos, b_kmns, b_kmnc; 
+
+                    b_sin = xs::load_aligned(&sin_row[im]);
+                    b_cos = xs::load_aligned(&cos_row[im]);
+                    b_kmns = xs::load_aligned(&kmns_array[isurf*num_modes+im]);
+                    b_kmnc = xs::load_aligned(&kmnc_array[isurf*num_modes+im]);
+                    
+                    b_kmns = xs::fma(b_K, b_sin/b_coe, b_kmns);
+                    b_kmnc = xs::fma(b_K, b_cos/b_coe, b_kmnc);
 
-                b_kmns.store_aligned(&kmns_array[isurf*num_modes+im]);
-                b_kmnc.store_aligned(&kmnc_array[isurf*num_modes+im]);
+                    b_kmns.store_aligned(&kmns_array[isurf*num_modes+im]);
+                    b_kmnc.store_aligned(&kmnc_array[isurf*num_modes+im]);
+                }
+                kmnc_array[isurf*num_modes] = kmnc_array[isurf*num_modes] - K*cos_row[0]/(4.*M_PI*M_PI);
             }
-            kmnc_array[isurf*num_modes] = kmnc_array[isurf*num_modes] - K*cos_angles[0]/(4.*M_PI*M_PI);
         }
     }
 }
@@ -138,6 +173,7 @@ void compute_kmnc_kmns(Array& kmnc, Array& kmns, Array& rmnc, Array& drmncds, Ar
 void compute_kmns(Array& kmns, Array& rmnc, Array& drmncds, Array& zmns, Array& dzmnsds,\
     Array& numns, Array& dnumnsds, Array& bmnc, Array& iota, Array& G, Array& I,\
     Array& xm, Array& xn, Array& thetas, Array& zetas) {
+    // Same as compute_kmnc_kmns, for a stellarator symmetric field.
 
     std::size_t num_modes = rmnc.shape(1);
     std::size_t num_surf = rmnc.shape(0);
@@ -163,82 +199,66 @@ void compute_kmns(Array& kmns, Array& rmnc, Array& drmncds, Array& zmns, Array&
     double* thetas_array = thetas.data(); 
     double* zetas_array = zetas.data();
 
-    AlignedPaddedVec sin_angles(num_modes, 0.);
-    AlignedPaddedVec cos_angles(num_modes, 0.);
+    AlignedPaddedVec sin_angles(K_POINT_BLOCK*num_modes, 0.);
+    AlignedPaddedVec cos_angles(K_POINT_BLOCK*num_modes, 0.);
 
-    for (std::size_t ip=0; ip < num_points; ++ip) {
-        double n_zeta = zetas(ip);
-        simd_t theta(thetas(ip));
-        simd_t zeta(n_zeta);
+    for (std::size_t first=0; first < num_points; first += K_POINT_BLOCK) {
+        int block = std::min<std::size_t>(K_POINT_BLOCK, num_points - first);
 
-        for (std::size_t im=0; im < num_modes; im+=simd_size) {
-            xs::batch<double, simd_size> b_sin, b_cos, b_xm, b_xn;
+        #pragma omp parallel for
+        for (int ib=0; ib < block; ++ib) {
+            fill_angle_table(&sin_angles[ib*num_modes], &cos_angles[ib*num_modes], xm_array, xn_array,
+                num_modes, thetas_array[first+ib], zetas_array[first+ib]);
+        }
 
-            b_xm = xs::load_aligned(&xm_array[im]);
-            b_xn = xs::load_aligned(&xn_array[im]);
+        #pragma omp parallel for
+        for (int isurf=0; isurf < num_surf; ++isurf) {
+            for (int ib=0; ib < block; ++ib) {
+                const double* sin_row = &sin_angles[ib*num_modes];
+                const double* cos_row = &cos_angles[ib*num_modes];
+                double B = 0.;
+                double R = 0.;
+                double dRdtheta = 0.;
+                double dRdzeta = 0.;
+                double dRds = 0.;
+                double dZdtheta =  0.;
+                double dZdzeta =  0.;
+                double dZds =  0.;
+                double nu = 0.;
+                double dnuds = 0.;
+                double dnudtheta = 0.;
+                double dnudzeta =  0.;
+                #pragma omp simd reduction(+:B,R,dRdtheta,dRdzeta,dRds,dZdtheta,dZdzeta,dZds,nu,dnuds,dnudtheta,dnudzeta)
+                for (std::size_t im=0; im < num_modes; ++im) {
+                    B += bmnc_array[isurf*num_modes+im]*cos_row[im];
+                    R += rmnc_array[isurf*num_modes+im]*cos_row[im];
+                    dRdtheta += -rmnc_array[isurf*num_modes+im]*xm_array[im]*sin_row[im];
+                    dRdzeta +=   rmnc_array[isurf*num_modes+im]*xn_array[im]*sin_row[im];
+                    dRds += drmncds_array[isurf*num_modes+im]*cos_row[im];
+                    dZdtheta += zmns_array[isurf*num_modes+im]*xm_array[im]*cos_row[im];
+                    dZdzeta += -zmns_array[isurf*num_modes+im]*xn_array[im]*cos_row[im];
+                    dZds += dzmnsds_array[isurf*num_modes+im]*sin_row[im];
+                    nu += numns_array[isurf*num_modes+im]*sin_row[im];
+                    dnuds += dnumnsds_array[isurf*num_modes+im]*sin_row[im];
+                    dnudtheta += numns_array[isurf*num_modes+im]*xm_array[im]*cos_row[im];
+                    dnudzeta += -numns_array[isurf*num_modes+im]*xn_array[im]*cos_row[im];
+                }
+                double K = boozer_K(zetas_array[first+ib], B, R, dRdtheta, dRdzeta, dRds, dZdtheta, dZdzeta, dZds,
+                    nu, dnuds, dnudtheta, dnudzeta, G_array[isurf], iota_array[isurf], I_array[isurf]);
 
-            sincos(xs::fms(b_xm, theta, b_xn*zeta), b_sin, b_cos);
+                simd_t b_K(K);
+                simd_t b_coe(2.*M_PI*M_PI);
 
-            b_sin.store_aligned(&sin_angles[im]);
-            b_cos.store_aligned(&cos_angles[im]);
-        }
+                for (std::size_t im=0; im < num_modes; im+=simd_size) {
+                    xs::batch<double, simd_size> b_sin, b_kmns ; 
 
-        for (int isurf=0; isurf < num_surf; ++isurf) {    
-            double B = 0.;
-            double R = 0.;
-            double dRdtheta = 0.;
-            double dRdzeta = 0.;
-            double dRds = 0.;
-            double dZdtheta =  0.;
-            double dZdzeta =  0.;
-            double dZds =  0.;
-            double nu = 0.;
-            double dnuds = 0.;
-            double dnudtheta = 0.;
-            double dnudzeta =  0.;
-            #pragma omp simd
-            for (std::size_t im=0; im < num_modes; ++im) {
-                B += bmnc_array[isurf*num_modes+im]*cos_angles[im];
-                R += rmnc_array[isurf*num_modes+im]*cos_angles[im];
-                dRdtheta += -rmnc_array[isurf*num_modes+im]*xm_array[im]*sin_angles[im];
-                dRdzeta +=   rmnc_array[isurf*num_modes+im]*xn_array[im]*sin_angles[im];
-                dRds += drmncds_array[isurf*num_modes+im]*cos_angles[im];
-                dZdtheta += zmns_array[isurf*num_modes+im]*xm_array[im]*cos_angles[im];
-                dZdzeta += -zmns_array[isurf*num_modes+im]*xn_array[im]*cos_angles[im];
-                dZds += dzmnsds_array[isurf*num_modes+im]*sin_angles[im];
-                nu += numns_array[isurf*num_modes+im]*sin_angles[im];
-                dnuds += dnumnsds_array[isurf*num_modes+im]*sin_angles[im];
-                dnudtheta += numns_array[isurf*num_modes+im]*xm_array[im]*cos_angles[im];
-                dnudzeta += -numns_array[isurf*num_modes+im]*xn_array[im]*cos_angles[im];
-            }            
-            double phi = n_zeta - nu;
-            double dphids = - dnuds;
-            double dphidtheta = - dnudtheta;
-            double dphidzeta = 1. - dnudzeta;
-            double dXdtheta = dRdtheta * cos(phi) - R * sin(phi) * dphidtheta;
-            double dYdtheta = dRdtheta * sin(phi) + R * cos(phi) * dphidtheta;
-            double dXds   = dRds   * cos(phi) - R * sin(phi) * dphids;
-            double dYds   = dRds   * sin(phi) + R * cos(phi) * dphids;
-            double dXdzeta  = dRdzeta  * cos(phi) - R * sin(phi) * dphidzeta;
-            double dYdzeta  = dRdzeta  * sin(phi) + R * cos(phi) * dphidzeta;
-            double gstheta = dXdtheta * dXds + dYdtheta * dYds + dZdtheta * dZds;
-            double gszeta  = dXdzeta  * dXds + dYdzeta  * dYds + dZdzeta  * dZds;
-            double sqrtg = (G_array[isurf] + iota_array[isurf]*I_array[isurf])/(B*B);
-            double K = (gszeta + iota_array[isurf]*gstheta)/sqrtg;
-
-            simd_t b_K(K);
-            simd_t b_coe(2.*M_PI*M_PI);
-
-            for (std::size_t im=0; im < num_modes; im+=simd_size) {
-                xs::batch<double, simd_size> b_sin, b_kmns ; 
-
-                b_sin = xs::load_aligned(&sin_angles[im]);
-                b_kmns = xs::load_aligned(&kmns_array[isurf*num_modes+im]);
-                
-                b_kmns = xs::fma(b_K, b_sin/b_coe, b_kmns);
+                    b_sin = xs::load_aligned(&sin_row[im]);
+                    b_kmns = xs::load_aligned(&kmns_array[isurf*num_modes+im]);
+                    
+                    b_kmns = xs::fma(b_K, b_sin/b_coe, b_kmns);
 
-                b_kmns.store_aligned(&kmns_array[isurf*num_modes+im]);
-                // kmns_array[isurf*num_modes+im] = kmns_array[isurf*num_modes+im] + K*sin_angles[im]/(2.*M_PI*M_PI); 
+                    b_kmns.store_aligned(&kmns_array[isurf*num_modes+im]);
+                }
             }
         }
     }
@@ -479,6 +499,158 @@ void inverse_fourier_transform_even(Array& K, Array& kmns, Array& xm, Array& xn,
     }
 }
 
+void evaluate_mode_splines(Array& res, Array& knots, Array& coefs, int degree, Array& s) {
+    // res(im, ip) = sum_j coefs(im, j)*B_j(s(ip)), where B_j are the B-splines of the
+    // given degree on the knots, which are shared by the splines of all modes.
+    int num_modes = coefs.shape(0);
+    int num_coefs = coefs.shape(1);
+    int num_points = s.shape(0);
+    if (knots.shape(0) != num_coefs + degree + 1)
+        throw std::invalid_argument("knots needs to have num_coefs + degree + 1 entries");
+    if (res.shape(0) != num_modes || res.shape(1) != num_points)
+        throw std::invalid_argument("res needs to have shape (num_modes, num_points)");
+
+    double* t = knots.data();
+    double* coefs_array = coefs.data();
+    double* res_array = res.data();
+    std::vector<double> basis(degree+1), left(degree+1), right(degree+1);
+    for (int ip=0; ip < num_points; ++ip) {
+        double x = s(ip);
+        // knot interval t[l] <= x < t[l+1] with degree <= l < num_coefs, so that
+        // points outside of the knots are extrapolated with the first or last
+        // polynomial piece, as done by scipy
+        int l = std::upper_bound(t + degree + 1, t + num_coefs, x) - t - 1;
+        // the degree+1 B-splines that do not vanish on the interval, with the
+        // recurrence of Cox and de Boor
+        basis[0] = 1.;
+        for (int j = 1; j <= degree; ++j) {
+            left[j] = x - t[l+1-j];
+            right[j] = t[l+j] - x;
+            double saved = 0.;
+            for (int r = 0; r < j; ++r) {
+                double temp = basis[r]/(right[r+1] + left[j-r]);
+                basis[r] = saved + right[r+1]*temp;
+                saved = left[j-r]*temp;
+            }
+            basis[j] = saved;
+        }
+        for (int im=0; im < num_modes; ++im) {
+            double* c = &coefs_array[im*num_coefs + l - degree];
+            double val = 0.;
+            for (int j = 0; j <= degree; ++j) {
+                val += c[j]*basis[j];
+            }
+            res_array[im*num_points + ip] = val;
+        }
+    }
+}
+
+void inverse_fourier_transform_terms(Array& out, Array& coefs, std::vector<int>& odd, std::vector<int>& outputs,
+    Array& xm, Array& xn, Array& thetas, Array& zetas, IndexArray& s_idx, int nfp) {
+    // out(outputs[it], ip) += sum_im coefs(it, s_idx(ip), im)*cos(xm(im)*thetas(ip)-xn(im)*zetas(ip))
+    // for the terms it with odd[it] == 0, and with sin instead of cos otherwise.
+    // The table of sin and cos is computed once per point and shared by all terms.
+    // It is built from cos and sin of m*theta and n*nfp*zeta, which are obtained
+    // with the angle addition formulas, so that only a few sin and cos have to be
+    // evaluated per point, independent of the order of the modes.
+    int num_terms = coefs.shape(0);
+    int num_s = coefs.shape(1);
+    int num_modes = coefs.shape(2);
+    int num_points = thetas.shape(0);
+    int num_outputs = out.shape(0);
+
+    if (odd.size() != num_terms || outputs.size() != num_terms)
+        throw std::invalid_argument("odd and outputs need to have one entry per term");
+    if (out.shape(1) != num_points || zetas.shape(0) != num_points || s_idx.shape(0) != num_points)
+        throw std::invalid_argument("out, thetas, zetas and s_idx need to have one entry per point");
+    if (xm.shape(0) < num_modes || xn.shape(0) < num_modes)
+        throw std::invalid_argument("xm and xn need to have one entry per mode");
+    if (nfp < 1)
+        throw std::invalid_argument("nfp needs to be positive");
+    for (int it=0; it < num_terms; ++it) {
+        if (outputs[it] < 0 || outputs[it] >= num_outputs)
+            throw std::invalid_argument("outputs need to be rows of out");
+    }
+    for (int ip=0; ip < num_points; ++ip) {
+        if (s_idx(ip) < 0 || s_idx(ip) >= num_s)
+            throw std::invalid_argument("s_idx needs to index the second dimension of coefs");
+    }
+
+    // mode im has the angle m_idx[im]*theta - n_idx[im]*nfp*zeta
+    std::vector<int> m_idx(num_modes), n_idx(num_modes);
+    int max_m = 0, max_n = 0;
+    for (int im=0; im < num_modes; ++im) {
+        m_idx[im] = std::lround(xm(im));
+        n_idx[im] = std::lround(xn(im)/nfp);
+        if (m_idx[im] < 0 || m_idx[im] != xm(im) || n_idx[im]*nfp != xn(im))
+            throw std::invalid_argument("xm needs to be non-negative integers and xn integer multiples of nfp");
+        max_m = std::max(max_m, m_idx[im]);
+        max_n = std::max(max_n, std::abs(n_idx[im]));
+    }
+
+    double* out_array = out.data();
+    double* coefs_array = coefs.data();
+    double* thetas_array = thetas.data();
+    double* zetas_array = zetas.data();
+    int64_t* s_idx_array = s_idx.data();
+
+    #pragma omp parallel
+    {
+        std::vector<double> sin_angles(num_modes), cos_angles(num_modes);
+        std::vector<double> sin_m(max_m + 1), cos_m(max_m + 1);
+        // n runs from -max_n to max_n and is stored at n + max_n
+        std::vector<double> sin_n(2*max_n + 1), cos_n(2*max_n + 1);
+        #pragma omp for
+        for (int ip=0; ip < num_points; ++ip) {
+            double theta = thetas_array[ip];
+            double nfpzeta = nfp*zetas_array[ip];
+            double sin_theta = std::sin(theta), cos_theta = std::cos(theta);
+            double sin_zeta = std::sin(nfpzeta), cos_zeta = std::cos(nfpzeta);
+            for (int m=0; m <= max_m; ++m) {
+                // recompute the angle from scratch every so often, to
+                // avoid accumulating floating point error
+                if (m % ANGLE_RECOMPUTE == 0) {
+                    sin_m[m] = std::sin(m*theta);
+                    cos_m[m] = std::cos(m*theta);
+                } else {
+                    sin_m[m] = sin_m[m-1]*cos_theta + cos_m[m-1]*sin_theta;
+                    cos_m[m] = cos_m[m-1]*cos_theta - sin_m[m-1]*sin_theta;
+                }
+            }
+            for (int n=0; n <= max_n; ++n) {
+                double sn, cn;
+                if (n % ANGLE_RECOMPUTE == 0) {
+                    sn = std::sin(n*nfpzeta);
+                    cn = std::cos(n*nfpzeta);
+                } else {
+                    sn = sin_n[max_n+n-1]*cos_zeta + cos_n[max_n+n-1]*sin_zeta;
+                    cn = cos_n[max_n+n-1]*cos_zeta - sin_n[max_n+n-1]*sin_zeta;
+                }
+                sin_n[max_n+n] = sn;
+                cos_n[max_n+n] = cn;
+                sin_n[max_n-n] = -sn;
+                cos_n[max_n-n] = cn;
+            }
+            for (int im=0; im < num_modes; ++im) {
+                double sm = sin_m[m_idx[im]], cm = cos_m[m_idx[im]];
+                double sn = sin_n[max_n+n_idx[im]], cn = cos_n[max_n+n_idx[im]];
+                sin_angles[im] = sm*cn - cm*sn;
+                cos_angles[im] = cm*cn + sm*sn;
+            }
+            for (int it=0; it < num_terms; ++it) {
+                const double* c = &coefs_array[(std::size_t(it)*num_s + s_idx_array[ip])*num_modes];
+                const double* angles = odd[it] ? sin_angles.data() : cos_angles.data();
+                double val = 0.;
+                #pragma omp simd reduction(+:val)
+                for (int im=0; im < num_modes; ++im) {
+                    val += c[im]*angles[im];
+                }
+                out_array[std::size_t(outputs[it])*num_points + ip] += val;
+            }
+        }
+    }
+}
+
 int simd_alignment() {
     int alignment = xs::simd_type<double>::size * 8;
     return alignment;
@@ -1,5 +1,7 @@
+#include <vector>
 #include "xtensor-python/pyarray.hpp"
 typedef xt::pyarray<double> Array;
+typedef xt::pyarray<int64_t> IndexArray;
 
 Array fourier_transform_odd(Array& K, Array& xm, Array& xn, Array& thetas, Array& zetas);
 Array fourier_transform_even(Array& K, Array& xm, Array& xn, Array& thetas, Array& zetas);
@@ -13,4 +15,7 @@ void compute_kmnc_kmns(Array& kmnc, Array& kmns, Array& rmnc, Array& drmncds, Ar
     Array& rmns, Array& drmnsds, Array& zmnc, Array& dzmncds,\
     Array& numnc, Array& dnumncds, Array& bmns,\
     Array& iota, Array& G, Array& I, Array& xm, Array& xn, Array& thetas, Array& zetas);
+void evaluate_mode_splines(Array& res, Array& knots, Array& coefs, int degree, Array& s);
+void inverse_fourier_transform_terms(Array& out, Array& coefs, std::vector<int>& odd, std::vector<int>& outputs,
+    Array& xm, Array& xn, Array& thetas, Array& zetas, IndexArray& s_idx, int nfp);
 int simd_alignment();
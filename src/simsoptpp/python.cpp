@@ -28,6 +28,12 @@ PYBIND11_MODULE(simsoptpp, m) {
     m.def("inverse_fourier_transform_odd", &inverse_fourier_transform_odd);
     m.def("compute_kmns",&compute_kmns);
     m.def("compute_kmnc_kmns",&compute_kmnc_kmns);
+    m.def("evaluate_mode_splines", &evaluate_mode_splines,
+        "Evaluates the splines of all Fourier modes, which share their knots and degree and have the coefficients in the rows of coefs, at the points s and writes them to the rows of res.",
+        py::arg("res"), py::arg("knots"), py::arg("coefs"), py::arg("degree"), py::arg("s"));
+    m.def("inverse_fourier_transform_terms", &inverse_fourier_transform_terms,
+        "Adds several inverse Fourier transforms to the rows of out, sharing the table of sin and cos of each point between them. Term it adds the transform with the coefficients coefs[it, s_idx[ip], :] at point ip to out[outputs[it], ip], using sin if odd[it] and cos otherwise. The poloidal mode numbers xm need to be non-negative integers and the toroidal mode numbers xn integer multiples of nfp, since the table is computed with the angle addition formulas.",
+        py::arg("out"), py::arg("coefs"), py::arg("odd"), py::arg("outputs"), py::arg("xm"), py::arg("xn"), py::arg("thetas"), py::arg("zetas"), py::arg("s_idx"), py::arg("nfp"));
     m.def("simd_alignment", &simd_alignment);
 
 #ifdef VERSION_INFO
@@ -1,8 +1,10 @@
 #include "pybind11/pybind11.h"
 #include "pybind11/stl.h"
 #include "pybind11/functional.h"
+#include "pybind11/numpy.h"
 #include "boozermagneticfield.h"
 #include "boozermagneticfield_interpolated.h"
+#include "boozeranalytic.h"
 #include "pyboozermagneticfield.h"
 #include "regular_grid_interpolant_3d.h"
 #include "shearalfvenwave.h"
@@ -16,6 +18,21 @@ using std::vector;
 namespace py = pybind11;
 
 void init_boozermagneticfields(py::module_ &m){
+  py::class_<BoozerTracingQuantities>(m, "BoozerTracingQuantities")
+    .def(py::init<>())
+    .def_readonly("modB", &BoozerTracingQuantities::modB)
+    .def_readonly("dmodBds", &BoozerTracingQuantities::dmodBds)
+    .def_readonly("dmodBdtheta", &BoozerTracingQuantities::dmodBdtheta)
+    .def_readonly("dmodBdzeta", &BoozerTracingQuantities::dmodBdzeta)
+    .def_readonly("G", &BoozerTracingQuantities::G)
+    .def_readonly("iota", &BoozerTracingQuantities::iota)
+    .def_readonly("I", &BoozerTracingQuantities::I)
+    .def_readonly("dGds", &BoozerTracingQuantities::dGds)
+    .def_readonly("dIds", &BoozerTracingQuantities::dIds)
+    .def_readonly("K", &BoozerTracingQuantities::K)
+    .def_readonly("dKdtheta", &BoozerTracingQuantities::dKdtheta)
+    .def_readonly("dKdzeta", &BoozerTracingQuantities::dKdzeta);
+
   auto mf = py::class_<
       BoozerMagneticField,
       BoozerMagneticFieldTrampoline<BoozerMagneticField>,
@@ -398,8 +415,70 @@ void init_boozermagneticfields(py::module_ &m){
         &BoozerMagneticField::set_points,
         "Set the points where the field should be evaluated in "
         "Boozer coordinates `(s,theta,zeta)`."
+    )
+    .def(
+        "evaluate_tracing_quantities",
+        [](BoozerMagneticField& self, double s, double theta, double zeta, bool vacuum, bool noK) {
+            BoozerTracingQuantities q;
+            self.evaluate_tracing_quantities(s, theta, zeta, vacuum, noK, q);
+            return q;
+        },
+        py::arg("s"), py::arg("theta"), py::arg("zeta"), py::arg("vacuum"), py::arg("noK"),
+        "Returns a `BoozerTracingQuantities` object with all quantities that the "
+        "guiding center equations need at the single point `(s,theta,zeta)`. "
+        "The points of the field should not be relied upon afterwards."
+    )
+    .def(
+        "clone",
+        &BoozerMagneticField::clone,
+        "Returns an evaluation context for the field, which has its own points "
+        "and results but shares all other data with the field. Different "
+        "contexts can be evaluated on different threads at the same time. "
+        "Only available for fields implemented in C++."
     );
 
+  py::class_<BoozerAnalytic, BoozerMagneticField, shared_ptr<BoozerAnalytic>>(m, "BoozerAnalytic")
+      .def(
+          py::init<double, double, double, double, double, double,
+          double, double, double, double, double, double,
+          vector<double>, vector<double>, vector<double>>(),
+          py::arg("etabar"), py::arg("B0"), py::arg("N"), py::arg("G0"),
+          py::arg("psi0"), py::arg("iota0"), py::arg("Bbar")=1.0, py::arg("I0")=0.0,
+          py::arg("G1")=0.0, py::arg("I1")=0.0, py::arg("K1")=0.0, py::arg("iota1")=0.0,
+          py::arg("B0z")=vector<double>{0.0}, py::arg("n")=vector<double>{1.0},
+          py::arg("m")=vector<double>{2.0}
+      )
+      .def_readonly("etabar", &BoozerAnalytic::etabar)
+      .def_readonly("B0", &BoozerAnalytic::B0)
+      .def_readonly("N", &BoozerAnalytic::N)
+      .def_readonly("G0", &BoozerAnalytic::G0)
+      .def_readonly("iota0", &BoozerAnalytic::iota0)
+      .def_readonly("Bbar", &BoozerAnalytic::Bbar)
+      .def_readonly("I0", &BoozerAnalytic::I0)
+      .def_readonly("G1", &BoozerAnalytic::G1)
+      .def_readonly("I1", &BoozerAnalytic::I1)
+      .def_readonly("K1", &BoozerAnalytic::K1)
+      .def_readonly("iota1", &BoozerAnalytic::iota1)
+      .def_readonly("B0z", &BoozerAnalytic::B0z)
+      .def_readonly("n", &BoozerAnalytic::n)
+      .def_readonly("m", &BoozerAnalytic::m)
+      .def_readwrite("psi0", &BoozerAnalytic::psi0)
+      .def_readwrite("field_type", &BoozerAnalytic::field_type)
+      .def("set_field_type", &BoozerAnalytic::set_field_type)
+      .def("set_etabar", &BoozerAnalytic::set_etabar)
+      .def("set_B0", &BoozerAnalytic::set_B0)
+      .def("set_B0z", &BoozerAnalytic::set_B0z)
+      .def("set_Bbar", &BoozerAnalytic::set_Bbar)
+      .def("set_N", &BoozerAnalytic::set_N)
+      .def("set_G0", &BoozerAnalytic::set_G0)
+      .def("set_I0", &BoozerAnalytic::set_I0)
+      .def("set_G1", &BoozerAnalytic::set_G1)
+      .def("set_I1", &BoozerAnalytic::set_I1)
+      .def("set_K1", &BoozerAnalytic::set_K1)
+      .def("set_iota0", &BoozerAnalytic::set_iota0)
+      .def("set_iota1", &BoozerAnalytic::set_iota1)
+      .def("set_psi0", &BoozerAnalytic::set_psi0);
+
   auto ifield = py::class_<
       InterpolatedBoozerField,
       BoozerMagneticField, 
@@ -475,6 +554,78 @@ void init_boozermagneticfields(py::module_ &m){
           "rule",
           &InterpolatedBoozerField::rule
       )
+      .def(
+          "get_interpolant",
+          &InterpolatedBoozerField::get_interpolant,
+          "Returns the interpolant of a quantity, e.g. `modB`, or of the packed "
+          "tracing quantities for `tracing`, or None if it has not been built."
+      )
+      .def(
+          "set_interpolant",
+          &InterpolatedBoozerField::set_interpolant,
+          "Uses the given interpolant for a quantity instead of building it."
+      )
+      .def(
+          "get_interpolant_dof_count",
+          &InterpolatedBoozerField::get_interpolant_dof_count,
+          "Returns the number of dofs of the interpolant of a quantity."
+      )
+      .def(
+          "evaluate_interpolant_dofs",
+          [](InterpolatedBoozerField& self, const string& name, uint32_t first, uint32_t last) {
+              Vec vals = self.evaluate_interpolant_dofs(name, first, last);
+              return py::array_t<double>(vals.size(), vals.data());
+          },
+          "Evaluates the underlying field at the dofs `first` to `last-1` of the "
+          "interpolant of a quantity."
+      )
+      .def(
+          "set_interpolant_dof_values",
+          [](InterpolatedBoozerField& self, const string& name, py::array_t<double, py::array::c_style | py::array::forcecast> dof_vals) {
+              self.set_interpolant_dof_values(name, Vec(dof_vals.data(), dof_vals.data() + dof_vals.size()));
+          },
+          "Builds the interpolant of a quantity from the values of the underlying "
+          "field at all of its dofs."
+      )
+      .def(
+          "evaluate_interpolants_dofs",
+          [](InterpolatedBoozerField& self, const std::vector<string>& names, uint32_t first, uint32_t last) {
+              std::vector<Vec> vals = self.evaluate_interpolants_dofs(names, first, last);
+              py::list res;
+              for (auto& v : vals)
+                  res.append(py::array_t<double>(v.size(), v.data()));
+              return res;
+          },
+          "Evaluates the underlying field at the dofs `first` to `last-1` of the "
+          "interpolants of several quantities, evaluating all quantities on each "
+          "batch of points before moving on to the next one."
+      )
+      .def(
+          "build_interpolants",
+          &InterpolatedBoozerField::build_interpolants,
+          "Builds the interpolants of several quantities from the underlying field, "
+          "evaluating all quantities on each batch of points before moving on to "
+          "the next one."
+      )
+      .def(
+          "build_tracing_interpolant",
+          &InterpolatedBoozerField::build_tracing_interpolant,
+          "Builds the interpolant of the packed tracing quantities, modB and its "
+          "derivatives, and K and its derivatives if with_K.",
+          py::arg("with_K")
+      )
+      .def(
+          "get_fluxfunction_interpolant",
+          &InterpolatedBoozerField::get_fluxfunction_interpolant,
+          "Returns the radial interpolant of psip, G, I, iota, dGds, dIds and "
+          "diotads, or None if it has not been built."
+      )
+      .def(
+          "set_fluxfunction_interpolant",
+          &InterpolatedBoozerField::set_fluxfunction_interpolant,
+          "Uses the given radial interpolant for the flux functions instead of "
+          "building it."
+      )
       .def_readwrite("status_modB",&InterpolatedBoozerField::status_modB)
       .def_readwrite("status_dmodBdtheta",&InterpolatedBoozerField::status_dmodBdtheta)
       .def_readwrite("status_dmodBdzeta",&InterpolatedBoozerField::status_dmodBdzeta)
@@ -506,6 +657,13 @@ void init_boozermagneticfields(py::module_ &m){
       .def_readwrite("status_Z_derivs",&InterpolatedBoozerField::status_Z_derivs)
       .def_readwrite("status_nu_derivs",&InterpolatedBoozerField::status_nu_derivs)
       .def_readwrite("status_modB_derivs",&InterpolatedBoozerField::status_modB_derivs)
+      .def_readwrite(
+          "pack_tracing_quantities",
+          &InterpolatedBoozerField::pack_tracing_quantities,
+          "If True, evaluate_tracing_quantities uses a single interpolant that "
+          "packs modB, its derivatives, K and its derivatives, so that one cell "
+          "lookup serves all of them."
+      )
       ;
     
     // ShearAlfvenWave:
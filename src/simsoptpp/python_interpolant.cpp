@@ -1,6 +1,7 @@
 #include "pybind11/pybind11.h"
 #include "pybind11/stl.h"
 #include "pybind11/functional.h"
+#include "pybind11/numpy.h"
 #include "xtensor-python/pytensor.hpp"     // Numpy bindings
 
 typedef xt::pytensor<double, 2, xt::layout_type::row_major> Array2;
@@ -10,6 +11,24 @@ using std::vector;
 namespace py = pybind11;
 #include "regular_grid_interpolant_3d.h"
 
+// Returns a read-only view of the coefficients of an interpolant that keeps the
+// interpolant alive.
+template<class T>
+py::array_t<double> local_vals_view(shared_ptr<T> interp) {
+    py::array_t<double> res(interp->get_local_vals_size(), interp->get_local_vals_data(), py::cast(interp));
+    res.attr("setflags")(py::arg("write") = false);
+    return res;
+}
+
+// Keeps a reference to the array that holds coefficients passed to set_local_vals,
+// so that e.g. a memory mapped file stays mapped while the interpolant uses it.
+std::shared_ptr<const void> keep_alive(py::array_t<double, py::array::c_style> local_vals) {
+    return std::shared_ptr<const void>(new py::object(local_vals), [](const void* ptr) {
+        py::gil_scoped_acquire acquire;
+        delete static_cast<const py::object*>(ptr);
+    });
+}
+
 void init_interpolant(py::module_ &m){
 
     py::class_<InterpolationRule, shared_ptr<InterpolationRule>>(m, "InterpolationRule", "Abstract class for interpolation rules on an interval.")
@@ -30,6 +49,40 @@ void init_interpolant(py::module_ &m){
         .def(py::init<InterpolationRule, RangeTriplet, RangeTriplet, RangeTriplet, int, bool, std::function<std::vector<bool>(Vec, Vec, Vec)>>())
         .def(py::init<InterpolationRule, RangeTriplet, RangeTriplet, RangeTriplet, int, bool>())
         .def("interpolate_batch", &RegularGridInterpolant3D<Array2>::interpolate_batch, "Interpolate a function by evaluating the function on all interpolation nodes simultanuously.")
+        .def("evaluate_dofs", [](shared_ptr<RegularGridInterpolant3D<Array2>> self, std::function<Vec(Vec, Vec, Vec)>& f, uint32_t first, uint32_t last) {
+                Vec vals = self->evaluate_dofs(f, first, last);
+                return py::array_t<double>(vals.size(), vals.data());
+            }, "Evaluate a function on the interpolation nodes `first` to `last-1`, the first step of `interpolate_batch`.")
+        .def("set_dof_values", [](shared_ptr<RegularGridInterpolant3D<Array2>> self, py::array_t<double, py::array::c_style | py::array::forcecast> dof_vals) {
+                self->set_dof_values(Vec(dof_vals.data(), dof_vals.data() + dof_vals.size()));
+            }, "Build the interpolant from the values of a function on all `dof_count` interpolation nodes, the second step of `interpolate_batch`.")
+        .def_property_readonly("dof_count", &RegularGridInterpolant3D<Array2>::get_dof_count, "The number of interpolation nodes that are not skipped.")
         .def("evaluate", &RegularGridInterpolant3D<Array2>::evaluate, "Evaluate the interpolant at a point.")
-        .def("evaluate_batch", &RegularGridInterpolant3D<Array2>::evaluate_batch, "Evaluate the interpolant at multiple points (faster than `evaluate` as it uses prefetching).");
+        .def("evaluate_batch", &RegularGridInterpolant3D<Array2>::evaluate_batch, "Evaluate the interpolant at multiple points (faster than `evaluate` as it uses prefetching).")
+        .def_readwrite("specialized_kernels", &RegularGridInterpolant3D<Array2>::specialized_kernels, "Whether to evaluate interpolants of degree 1 to 5 with kernels specialized for that degree (default), or with the kernel for arbitrary degree.")
+        .def_property_readonly("value_size", &RegularGridInterpolant3D<Array2>::get_value_size, "The number of outputs of the interpolant.")
+        .def("get_cell_to_local", [](shared_ptr<RegularGridInterpolant3D<Array2>> self) {
+                const std::vector<int32_t>& cell_to_local = self->get_cell_to_local();
+                return py::array_t<int32_t>(cell_to_local.size(), cell_to_local.data());
+            }, "Position of the coefficients of each cell in `get_local_vals`, or -1 for skipped cells.")
+        .def("get_local_vals", &local_vals_view<RegularGridInterpolant3D<Array2>>, "Read-only view of the coefficients of the built interpolant.")
+        .def("set_local_vals", [](shared_ptr<RegularGridInterpolant3D<Array2>> self, py::array_t<int32_t, py::array::c_style | py::array::forcecast> cell_to_local, py::array_t<double, py::array::c_style> local_vals) {
+                std::vector<int32_t> cell_to_local_vec(cell_to_local.data(), cell_to_local.data() + cell_to_local.size());
+                self->set_local_vals(cell_to_local_vec, local_vals.data(), local_vals.size(), keep_alive(local_vals));
+            }, "Use coefficients obtained from `get_cell_to_local` and `get_local_vals` of an interpolant on the same grid instead of building the interpolant. The coefficients are not copied and need to be aligned to the simd width, e.g. a memory mapped file.");
+
+    py::class_<RegularGridInterpolant1D<Array2>, shared_ptr<RegularGridInterpolant1D<Array2>>>(m, "RegularGridInterpolant1D",
+            R"pbdoc(
+            Interpolates a (vector valued) function of one variable on a uniform grid.
+            This is the one dimensional version of `RegularGridInterpolant3D` and is used for the flux functions of `InterpolatedBoozerField`.
+            )pbdoc")
+        .def(py::init<InterpolationRule, RangeTriplet, int, bool>())
+        .def("interpolate_batch", &RegularGridInterpolant1D<Array2>::interpolate_batch, "Interpolate a function by evaluating the function on all interpolation nodes simultanuously.")
+        .def("evaluate", &RegularGridInterpolant1D<Array2>::evaluate, "Evaluate the interpolant at a point.")
+        .def("evaluate_batch", &RegularGridInterpolant1D<Array2>::evaluate_batch, "Evaluate the interpolant at multiple points, given as the first column of an array.")
+        .def_property_readonly("value_size", &RegularGridInterpolant1D<Array2>::get_value_size, "The number of outputs of the interpolant.")
+        .def("get_local_vals", &local_vals_view<RegularGridInterpolant1D<Array2>>, "Read-only view of the coefficients of the built interpolant.")
+        .def("set_local_vals", [](shared_ptr<RegularGridInterpolant1D<Array2>> self, py::array_t<double, py::array::c_style> local_vals) {
+                self->set_local_vals(local_vals.data(), local_vals.size(), keep_alive(local_vals));
+            }, "Use coefficients obtained from `get_local_vals` of an interpolant on the same grid instead of building the interpolant, see `RegularGridInterpolant3D.set_local_vals`.");
 }
@@ -1,6 +1,7 @@
 #include "pybind11/pybind11.h"
 #include "pybind11/stl.h"
 #include "pybind11/functional.h"
+#include "pybind11/numpy.h"
 namespace py = pybind11;
 using std::shared_ptr;
 using std::vector;
@@ -10,6 +11,46 @@ using std::vector;
     #include "symplectic.h"
 #endif
 
+// The tracers store the rows of a trajectory (or of the hits) contiguously in a
+// vector. Instead of converting it to a list of lists, the vector is moved to the
+// heap and returned as an (nrows, n) numpy array that owns it through a capsule.
+// The array keeps the whole capacity of the vector alive, so a vector that has
+// grown (or been reserved) well beyond its size is shrunk first.
+template<std::size_t n>
+py::array_t<double> to_numpy(vector<std::array<double, n>>&& rows) {
+    if (rows.capacity() > 2*rows.size())
+        rows.shrink_to_fit();
+    auto owner = new vector<std::array<double, n>>(std::move(rows));
+    py::capsule free_when_done(owner, [](void* p) {
+        delete reinterpret_cast<vector<std::array<double, n>>*>(p);
+    });
+    return py::array_t<double>(
+        {(py::ssize_t) owner->size(), (py::ssize_t) n},
+        owner->empty() ? nullptr : owner->front().data(),
+        free_when_done);
+}
+
+template<class T>
+py::list to_numpy(vector<T>&& results) {
+    py::list res;
+    for (auto& r : results)
+        res.append(to_numpy(std::move(r)));
+    return res;
+}
+
+template<class A, class B>
+py::tuple to_numpy(tuple<A, B>&& results) {
+    return py::make_tuple(to_numpy(std::move(std::get<0>(results))), to_numpy(std::move(std::get<1>(results))));
+}
+
+// Wraps a tracing function so that its results are returned as numpy arrays.
+template<class R, class... Args>
+auto returning_numpy(R (*f)(Args...)) {
+    return [f](Args... args) {
+        return to_numpy(f(std::forward<Args>(args)...));
+    };
+}
+
 void init_tracing(py::module_ &m){
     py::class_<StoppingCriterion, shared_ptr<StoppingCriterion>>(m, "StoppingCriterion");
     py::class_<IterationStoppingCriterion, shared_ptr<IterationStoppingCriterion>, StoppingCriterion>(m, "IterationStoppingCriterion")
@@ -23,7 +64,22 @@ void init_tracing(py::module_ &m){
     py::class_<StepSizeStoppingCriterion, shared_ptr<StepSizeStoppingCriterion>, StoppingCriterion>(m, "StepSizeStoppingCriterion")
         .def(py::init<double>());
 
-    m.def("particle_guiding_center_boozer_tracing", &particle_guiding_center_boozer_tracing,
+    py::class_<TrajectoryWriter, shared_ptr<TrajectoryWriter>>(m, "TrajectoryWriter")
+        .def(py::init<std::string, std::size_t>(), py::arg("filename"), py::arg("chunk_rows")=4096)
+        .def_readonly("filename", &TrajectoryWriter::filename)
+        .def_readonly("chunk_rows", &TrajectoryWriter::chunk_rows)
+        .def_readonly("ncols", &TrajectoryWriter::ncols)
+        .def_readonly("chunk_particles", &TrajectoryWriter::chunk_particles)
+        .def_readonly("chunk_lengths", &TrajectoryWriter::chunk_lengths)
+        .def("close", &TrajectoryWriter::close);
+
+    py::class_<TracingCheckpoint, shared_ptr<TracingCheckpoint>>(m, "TracingCheckpoint")
+        .def(py::init<std::string, double>(), py::arg("filename"), py::arg("interval"))
+        .def_readonly("filename", &TracingCheckpoint::filename)
+        .def_readonly("interval", &TracingCheckpoint::interval)
+        .def("write", &TracingCheckpoint::write);
+
+    m.def("particle_guiding_center_boozer_tracing", returning_numpy(&particle_guiding_center_boozer_tracing),
         py::arg("field"),
         py::arg("stz_init"),
         py::arg("m"),
@@ -50,10 +106,51 @@ void init_tracing(py::module_ &m){
         py::arg("solveSympl")=false,
         py::arg("predictor_step")=true,
         py::arg("roottol")=1e-9,
-        py::arg("dt")=1e-7
+        py::arg("dt")=1e-7,
+        py::arg("writer")=nullptr,
+        py::arg("particle_id")=0,
+        py::arg("t_init")=0.,
+        py::arg("dt_init")=0.,
+        py::arg("checkpoint")=nullptr
+        );
+
+    m.def("particle_guiding_center_boozer_tracing_batch", returning_numpy(&particle_guiding_center_boozer_tracing_batch),
+        py::arg("field"),
+        py::arg("stz_inits"),
+        py::arg("m"),
+        py::arg("q"),
+        py::arg("vtotals"),
+        py::arg("vtangs"),
+        py::arg("tmax"),
+        py::arg("vacuum"),
+        py::arg("noK"),
+        py::arg("thetas")=vector<double>{},
+        py::arg("zetas")=vector<double>{},
+        py::arg("omega_thetas")=vector<double>{},
+        py::arg("omega_zetas")=vector<double>{},
+        py::arg("vpars")=vector<double>{},
+        py::arg("stopping_criteria")=vector<shared_ptr<StoppingCriterion>>{},
+        py::arg("dt_save")=1e-6,
+        py::arg("forget_exact_path")=false,
+        py::arg("thetas_stop")=false,
+        py::arg("zetas_stop")=false,
+        py::arg("vpars_stop")=false,
+        py::arg("axis")=0,
+        py::arg("abstol")=1e-9,
+        py::arg("reltol")=1e-9,
+        py::arg("solveSympl")=false,
+        py::arg("predictor_step")=true,
+        py::arg("roottol")=1e-9,
+        py::arg("dt")=1e-7,
+        py::arg("nthreads")=1,
+        py::arg("writer")=nullptr,
+        py::arg("particle_ids")=vector<int64_t>{},
+        py::arg("t_inits")=vector<double>{},
+        py::arg("dt_inits")=vector<double>{},
+        py::arg("checkpoint")=nullptr
         );
 
-    m.def("particle_guiding_center_boozer_perturbed_tracing", &particle_guiding_center_boozer_perturbed_tracing,
+    m.def("particle_guiding_center_boozer_perturbed_tracing", returning_numpy(&particle_guiding_center_boozer_perturbed_tracing),
         py::arg("pertrurbed_field"),
         py::arg("stz_init"),
         py::arg("m"),
@@ -77,6 +174,8 @@ void init_tracing(py::module_ &m){
         py::arg("vpars_stop")=false,
         py::arg("forget_exact_path")=false,
         py::arg("axis")=0,
-        py::arg("vpars")=vector<double>{}
+        py::arg("vpars")=vector<double>{},
+        py::arg("writer")=nullptr,
+        py::arg("particle_id")=0
     );
 }
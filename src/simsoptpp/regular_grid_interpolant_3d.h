@@ -1,10 +1,10 @@
 #pragma once
 
 #include "simdhelpers.h"
-#include <unordered_map>
 #include <algorithm>
 #include <functional>
 #include <iostream>
+#include <memory>
 #include <random>
 #include <stdexcept>
 #include <stdint.h>
@@ -59,6 +59,24 @@ class InterpolationRule {
             }
             return res;
         }
+
+        template<class T>
+        void basis_funs(T x, T* res) const {
+            // evaluate all basisfunctions p_0, ..., p_degree at location x. The
+            // scalings are the barycentric weights of the nodes, and the product
+            // Π_{i≠idx} (x-x_i) is split into the products over i<idx and i>idx,
+            // which are computed for all idx at once in O(degree) operations.
+            T left(1.);
+            for(int i = 0; i < degree+1; ++i) {
+                res[i] = left;
+                left *= (x-T(nodes[i]));
+            }
+            T right(1.);
+            for(int i = degree; i >= 0; --i) {
+                res[i] *= right * T(scalings[i]);
+                right *= (x-T(nodes[i]));
+            }
+        }
 };
 
 template<class Array>
@@ -101,7 +119,10 @@ class RegularGridInterpolant3D {
         Vec xdoftensor_reduced, ydoftensor_reduced, zdoftensor_reduced;
 
         Vec vals; // contains the values of the function to be interpolated at the dofs, of size dofs_to_keep * value_size
-        std::unordered_map<int, AlignedPaddedVec> all_local_vals_map; // maps each cell to an array of size (degree+1)**3 * padded_value_size
+        AlignedPaddedVec all_local_vals; // coefficients of all kept cells, each an array of size (degree+1)**3 * padded_value_size
+        std::vector<int32_t> cell_to_local; // position of each cell in the coefficients, or -1 if the cell is skipped
+        const double* local_vals_data = nullptr; // the coefficients, either all_local_vals or memory passed to set_local_vals
+        std::shared_ptr<const void> local_vals_owner; // keeps the memory passed to set_local_vals alive
         std::vector<bool> skip_cell; // whether to skip each cell or not
         // since we are skipping some dofs, we need mappings into the list of
         // reduced dofs, e.g. if we skip dofs 3, then reduced to full would
@@ -110,10 +131,9 @@ class RegularGridInterpolant3D {
 
         uint32_t cells_to_skip, cells_to_keep, dofs_to_skip, dofs_to_keep; // which cells and dofs we skip and keep
         int local_vals_size;
-        Vec pkxs, pkys, pkzs;
 
         static const int simdcount = xsimd::simd_type<double>::size; // vector width for simd instructions
-        int padded_value_size; // smallest multiple of simdcount that is larger than value_size
+        int padded_value_size; // smallest multiple of simdcount that is at least value_size
 
         inline int idx_dof(int i, int j, int k){
             int degree = rule.degree;
@@ -128,18 +148,32 @@ class RegularGridInterpolant3D {
             return i*(ny+1)*(nz+1) + j*(nz+1) + k;
         }
 
+        // Returns a pointer to the coefficients of the given cell, or nullptr if the
+        // cell is skipped, out of bounds, or the interpolant has not been built yet.
+        inline const double* local_vals_ptr(int cell_idx){
+            if(cell_idx < 0 || cell_idx >= (int)cell_to_local.size())
+                return nullptr;
+            int32_t local_idx = cell_to_local[cell_idx];
+            if(local_idx < 0)
+                return nullptr;
+            return local_vals_data + size_t(local_idx) * local_vals_size;
+        }
+
         inline int idx_dof_local(int i, int j, int k){
             int degree = rule.degree;
             return i*(degree+1)*(degree+1) + j*(degree+1) + k;
         }
 
         int locate_unsafe(double x, double y, double z);
-        void evaluate_inplace(double x, double y, double z, double* res);
-        void evaluate_inplace(double x, double *res);
         void evaluate_local(double x, double y, double z, int cell_idx, double *res);
-        void evaluate_local(double x, int cell_idx, double *res);
+        template<int degree>
+        void evaluate_local_fixed_degree(double x, double y, double z, const double* vals_local, double *res);
+        void check_local_vals(const double* data, size_t size);
 
     public:
+        // whether to evaluate interpolants of degree 1 to 5 with kernels for which the
+        // degree is known at compile time, or with the kernel for arbitrary degree
+        bool specialized_kernels = true;
 
         RegularGridInterpolant3D(InterpolationRule rule, RangeTriplet xrange, RangeTriplet yrange, RangeTriplet zrange, int value_size, bool out_of_bounds_ok, std::function<std::vector<bool>(Vec, Vec, Vec)> skip) :
             rule(rule), 
@@ -149,9 +183,6 @@ class RegularGridInterpolant3D {
             value_size(value_size), out_of_bounds_ok(out_of_bounds_ok)
         {
             int degree = rule.degree;
-            pkxs = Vec(degree+1, 0.);
-            pkys = Vec(degree+1, 0.);
-            pkzs = Vec(degree+1, 0.);
             hx = (xmax-xmin)/nx;
             hy = (ymax-ymin)/ny;
             hz = (zmax-zmin)/nz;
@@ -288,7 +319,7 @@ class RegularGridInterpolant3D {
             vals = Vec(dofs_to_keep * value_size, 0.);
 
             // round up value_size to nearest multiple of simdcount
-            padded_value_size = (value_size + simdcount) - (value_size % simdcount);
+            padded_value_size = ((value_size + simdcount - 1) / simdcount) * simdcount;
             int nnodes = (nx*degree+1)*(ny*degree+1)*(nz*degree+1);
             local_vals_size = (degree+1)*(degree+1)*(degree+1)*padded_value_size;
         }
@@ -297,12 +328,104 @@ class RegularGridInterpolant3D {
             {}
 
         void interpolate_batch(std::function<Vec(Vec, Vec, Vec)> &f); // build the interpolant
+        // interpolate_batch split into its two steps, so that the dofs can be
+        // evaluated in parts, e.g. on different MPI ranks: evaluate f at the dofs
+        // with index first to last-1, and build the interpolant from the values of f
+        // at all get_dof_count() dofs.
+        Vec evaluate_dofs(std::function<Vec(Vec, Vec, Vec)> &f, uint32_t first, uint32_t last);
+        void set_dof_values(const Vec& dof_vals);
+        uint32_t get_dof_count() const { return dofs_to_keep; }
 
         Vec evaluate(double x, double y, double z); // evaluate the interpolant at one location
+        void evaluate_inplace(double x, double y, double z, double* res); // evaluate at one location and write the value_size results to res
         void evaluate_batch(Array& xyz, Array& fxyz); // evluate the interpolant at multiple locations
-        void evaluate_batch_1D(Array &xyz, Array &fxyz);
         
         std::pair<double, double> estimate_error(std::function<Vec(Vec, Vec, Vec)> &f, int samples);
+
+        int get_value_size() const { return value_size; }
+        // The coefficients of the interpolant once it has been built, and the
+        // position of each cell in them (-1 for skipped cells). These can be
+        // stored and passed to set_local_vals of an interpolant on the same grid.
+        const std::vector<int32_t>& get_cell_to_local() const { return cell_to_local; }
+        const double* get_local_vals_data() const { return local_vals_data; }
+        size_t get_local_vals_size() const { return local_vals_data ? size_t(cells_to_keep) * local_vals_size : 0; }
+        // Uses the given coefficients instead of building the interpolant. The data
+        // is not copied, it has to be aligned to the simd width and stay valid as
+        // long as owner is alive, which the interpolant keeps a reference to.
+        void set_local_vals(const std::vector<int32_t>& cell_to_local, const double* data, size_t size, std::shared_ptr<const void> owner);
+};
+
+template<class Array>
+class RegularGridInterpolant1D {
+    /* This class implements a vector-valued piecewise polynomial interpolant
+     * on a regular grid in one dimension. It is the one dimensional version of
+     * RegularGridInterpolant3D and is meant for functions of a single
+     * coordinate, e.g. the flux functions of a magnetic field in Boozer
+     * coordinates, for which a three dimensional grid with a single cell in
+     * the other two directions wastes both memory and time.
+     *
+     * As in the three dimensional case, the coefficients of each cell are
+     * padded to a multiple of the simd width and all cells are stored in one
+     * contiguous array, so that evaluating all value_size outputs at a point
+     * costs degree+1 fused multiply-adds per simd vector.
+     */
+    private:
+        const int nx; // number of cells
+        double hx; // gridsize
+        const double xmin, xmax; // lower and upper bound of the coordinate
+        const int value_size; // number of output dimensions of the interpolant
+        const InterpolationRule rule; // the interpolation rule to use on each cell in the grid
+        const bool out_of_bounds_ok; // whether to do nothing or throw an error when the interpolant is queried at an out-of-bounds point
+
+        Vec xmesh; // location of the mesh nodes, has size nx+1
+        Vec xdof; // location of the interpolation nodes, has size nx*degree+1
+        AlignedPaddedVec all_local_vals; // coefficients of all cells, each an array of size (degree+1) * padded_value_size
+        const double* local_vals_data = nullptr; // the coefficients, either all_local_vals or memory passed to set_local_vals
+        std::shared_ptr<const void> local_vals_owner; // keeps the memory passed to set_local_vals alive
+
+        static const int simdcount = xsimd::simd_type<double>::size; // vector width for simd instructions
+        int padded_value_size; // smallest multiple of simdcount that is at least value_size
+        int local_vals_size;
+
+        void evaluate_local(double x, int cell_idx, double *res);
+
+    public:
+        RegularGridInterpolant1D(InterpolationRule rule, RangeTriplet xrange, int value_size, bool out_of_bounds_ok) :
+            rule(rule),
+            xmin(std::get<0>(xrange)), xmax(std::get<1>(xrange)), nx(std::get<2>(xrange)),
+            value_size(value_size), out_of_bounds_ok(out_of_bounds_ok)
+        {
+            int degree = rule.degree;
+            hx = (xmax-xmin)/nx;
+            xmesh = linspace(xmin, xmax, nx+1, true);
+            xdof = Vec(nx*degree+1, 0.);
+            for (int i = 0; i < nx; ++i) {
+                for (int j = 0; j < degree+1; ++j) {
+                    xdof[i*degree+j] = xmesh[i] + rule.nodes[j]*hx;
+                }
+            }
+            padded_value_size = ((value_size + simdcount - 1) / simdcount) * simdcount;
+            local_vals_size = (degree+1)*padded_value_size;
+        }
+
+        void interpolate_batch(std::function<Vec(Vec)> &f); // build the interpolant
+
+        Vec evaluate(double x); // evaluate the interpolant at one location
+        void evaluate_inplace(double x, double* res); // evaluate at one location and write the value_size results to res
+        // Evaluate the interpolant at multiple locations. Only the first column of
+        // x is used, so that an array of (s, theta, zeta) points can be passed as is.
+        void evaluate_batch(Array& x, Array& fx);
+
+        // Estimates the error of the interpolant at random samples. If component is
+        // not negative, only that output of the interpolant is compared to f.
+        std::pair<double, double> estimate_error(std::function<Vec(Vec)> &f, int samples, int component=-1);
+
+        int get_value_size() const { return value_size; }
+        // The coefficients of the interpolant once it has been built, see
+        // RegularGridInterpolant3D::get_local_vals_data and set_local_vals.
+        const double* get_local_vals_data() const { return local_vals_data; }
+        size_t get_local_vals_size() const { return local_vals_data ? size_t(nx) * local_vals_size : 0; }
+        void set_local_vals(const double* data, size_t size, std::shared_ptr<const void> owner);
 };
 
 class UniformInterpolationRule : public InterpolationRule {
@@ -4,8 +4,10 @@
 typedef xt::xarray<double> Array;
 
 template class RegularGridInterpolant3D<Array>;
+template class RegularGridInterpolant1D<Array>;
 
 template<class Type, std::size_t rank, xt::layout_type layout>
 using DefaultTensor = xt::xtensor<Type, rank, layout, XTENSOR_DEFAULT_ALLOCATOR(double)>;
 using Tensor2 = DefaultTensor<double, 2, xt::layout_type::row_major>;
-template class RegularGridInterpolant3D<Tensor2>;
\ No newline at end of file
+template class RegularGridInterpolant3D<Tensor2>;
+template class RegularGridInterpolant1D<Tensor2>;
\ No newline at end of file
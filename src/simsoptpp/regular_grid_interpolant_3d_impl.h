@@ -12,32 +12,51 @@ const int RegularGridInterpolant3D<Array>::simdcount;
 
 template<class Array>
 void RegularGridInterpolant3D<Array>::interpolate_batch(std::function<Vec(Vec, Vec, Vec)> &f) {
-    int BATCH_SIZE = 16384;
-    int NUM_BATCHES = dofs_to_keep/BATCH_SIZE + (dofs_to_keep % BATCH_SIZE != 0);
-    for (int i = 0; i < NUM_BATCHES; ++i) {
-        uint32_t first = i * BATCH_SIZE;
-        uint32_t last = std::min((uint32_t)((i+1) * BATCH_SIZE), dofs_to_keep);
-        Vec xsub(xdoftensor_reduced.begin() + first, xdoftensor_reduced.begin() + last);
-        Vec ysub(ydoftensor_reduced.begin() + first, ydoftensor_reduced.begin() + last);
-        Vec zsub(zdoftensor_reduced.begin() + first, zdoftensor_reduced.begin() + last);
+    set_dof_values(evaluate_dofs(f, 0, dofs_to_keep));
+}
+
+template<class Array>
+Vec RegularGridInterpolant3D<Array>::evaluate_dofs(std::function<Vec(Vec, Vec, Vec)> &f, uint32_t first, uint32_t last) {
+    if(first > last || last > dofs_to_keep)
+        throw std::invalid_argument((boost::format("Invalid dof range [%1%, %2%) for %3% dofs") % first % last % dofs_to_keep).str());
+    uint32_t BATCH_SIZE = 16384;
+    Vec res(size_t(last-first) * value_size, 0.);
+    for (uint32_t batch_first = first; batch_first < last; batch_first += BATCH_SIZE) {
+        uint32_t batch_last = std::min(batch_first + BATCH_SIZE, last);
+        Vec xsub(xdoftensor_reduced.begin() + batch_first, xdoftensor_reduced.begin() + batch_last);
+        Vec ysub(ydoftensor_reduced.begin() + batch_first, ydoftensor_reduced.begin() + batch_last);
+        Vec zsub(zdoftensor_reduced.begin() + batch_first, zdoftensor_reduced.begin() + batch_last);
         Vec fxyzsub  = f(xsub, ysub, zsub);
-        for (int j = 0; j < last-first; ++j) {
+        for (int j = 0; j < batch_last-batch_first; ++j) {
             for (int l = 0; l < value_size; ++l) {
-                vals[first * value_size + j * value_size + l] = fxyzsub[j * value_size + l];
+                res[size_t(batch_first - first + j) * value_size + l] = fxyzsub[j * value_size + l];
             }
         }
     }
-    int degree = rule.degree;
-    all_local_vals_map = std::unordered_map<int, AlignedPaddedVec>();
-    all_local_vals_map.reserve(cells_to_keep);
+    return res;
+}
 
+template<class Array>
+void RegularGridInterpolant3D<Array>::set_dof_values(const Vec& dof_vals) {
+    if(dof_vals.size() != size_t(dofs_to_keep) * value_size)
+        throw std::invalid_argument((boost::format("Expected %1% values at the dofs, got %2%") % (size_t(dofs_to_keep) * value_size) % dof_vals.size()).str());
+    vals = dof_vals;
+    int degree = rule.degree;
+    // The coefficients of all cells that are kept are stored contiguously, in the
+    // same order as the cells, so that neighbouring cells are close in memory.
+    cell_to_local = std::vector<int32_t>(nx*ny*nz, -1);
+    all_local_vals = AlignedPaddedVec(size_t(cells_to_keep) * local_vals_size, 0.);
+    local_vals_data = all_local_vals.data();
+    local_vals_owner.reset();
+    int32_t local_idx = 0;
     for (int xidx = 0; xidx < nx; ++xidx) {
         for (int yidx = 0; yidx < ny; ++yidx) {
             for (int zidx = 0; zidx < nz; ++zidx) {
                 int meshidx = idx_cell(xidx, yidx, zidx);
                 if(skip_cell[meshidx])
                     continue;
-                AlignedPaddedVec local_vals(local_vals_size, 0.);
+                cell_to_local[meshidx] = local_idx;
+                double* local_vals = all_local_vals.data() + size_t(local_idx) * local_vals_size;
                 for (int i = 0; i < degree+1; ++i) {
                     for (int j = 0; j < degree+1; ++j) {
                         for (int k = 0; k < degree+1; ++k) {
@@ -49,7 +68,7 @@ void RegularGridInterpolant3D<Array>::interpolate_batch(std::function<Vec(Vec, V
                         }
                     }
                 }
-                all_local_vals_map.insert({meshidx, local_vals});
+                local_idx++;
             }
         }
     }
@@ -65,16 +84,6 @@ void RegularGridInterpolant3D<Array>::evaluate_batch(Array& xyz, Array& fxyz){
     }
 }
 
-template<class Array>
-void RegularGridInterpolant3D<Array>::evaluate_batch_1D(Array& xyz, Array& fxyz){
-    if(fxyz.layout() != xt::layout_type::row_major)
-          throw std::runtime_error("fxyz needs to be in row-major storage order");
-    int npoints = xyz.shape(0);
-    for (int i = 0; i < npoints; ++i) {
-        evaluate_inplace(xyz(i, 0), fxyz.data() + value_size*i);
-    }
-}
-
 template<class Array>
 Vec RegularGridInterpolant3D<Array>::evaluate(double x, double y, double z){
     Vec fxyz(value_size, 0.);
@@ -120,37 +129,36 @@ void RegularGridInterpolant3D<Array>::evaluate_inplace(double x, double y, doubl
     return evaluate_local(xlocal, ylocal, zlocal, idx_cell(xidx, yidx, zidx), res);
 }
 
-template<class Array>
-void RegularGridInterpolant3D<Array>::evaluate_inplace(double x, double* res){
-
-    // to avoid funny business when the data is just a tiny bit out of bounds
-    // due to machine precision, we perform this check and shift
-    if(x >= xmax) x -= _EPS_;
-    else if (x <= xmin) x += _EPS_;
-
-    int xidx = int(nx*(x-xmin)/(xmax-xmin)); // find idx so that xmesh[xidx] <= x <= xs[xidx+1]
-
-    if(!out_of_bounds_ok){
-        if(xidx < 0 || xidx >= nx)
-            throw std::runtime_error((boost::format("xidxs={} not within [0, {}]") % xidx % (nx-1)).str());
-    }
-    double xlocal = (x-xmesh[xidx])/hx;
-    return evaluate_local(xlocal, idx_cell(xidx, 0, 0), res);
-}
-
 template<class Array>
 void RegularGridInterpolant3D<Array>::evaluate_local(double x, double y, double z, int cell_idx, double* res)
 {
     int degree = rule.degree;
-    auto got = all_local_vals_map.find(cell_idx);
-    if (got == all_local_vals_map.end()) {
+    const double* vals_local = local_vals_ptr(cell_idx);
+    if (vals_local == nullptr) {
         if(out_of_bounds_ok)
             return;
         else
-            throw std::runtime_error((boost::format("cell_idx={} not in all_local_vals_map") % cell_idx).str());
+            throw std::runtime_error((boost::format("cell_idx={} has no coefficients") % cell_idx).str());
     }
-
-    double* vals_local = got->second.data();
+    if(specialized_kernels) {
+        switch(degree) {
+            case 1: return evaluate_local_fixed_degree<1>(x, y, z, vals_local, res);
+            case 2: return evaluate_local_fixed_degree<2>(x, y, z, vals_local, res);
+            case 3: return evaluate_local_fixed_degree<3>(x, y, z, vals_local, res);
+            case 4: return evaluate_local_fixed_degree<4>(x, y, z, vals_local, res);
+            case 5: return evaluate_local_fixed_degree<5>(x, y, z, vals_local, res);
+            default: break;
+        }
+    }
+    // The interpolant itself is not modified during evaluation, so that it can
+    // be evaluated from several threads at once. The values of the basis
+    // functions are therefore stored in a buffer that belongs to the thread.
+    static thread_local Vec pks;
+    if(pks.size() < 3*(degree+1))
+        pks.resize(3*(degree+1));
+    double* pkxs = pks.data();
+    double* pkys = pkxs + degree + 1;
+    double* pkzs = pkys + degree + 1;
     if(xsimd::simd_type<double>::size >= 3){
         simd_t xyz;
         xyz[0] = x;
@@ -170,14 +178,10 @@ void RegularGridInterpolant3D<Array>::evaluate_local(double x, double y, double
         }
     }
 
-    // Potential optimization: use barycentric interpolation here right now the
-    // implementation in O(degree^3) in memory and O(degree^4) in computation,
-    // using Barycentric interpolation this could be reduced to O(degree^3) in
-    // memory and O(degree^3) in computation.
     for(int l=0; l<padded_value_size; l += simdcount) {
         simd_t sumi(0.);
         int offset_local = l;
-        double* val_ptr = &(vals_local[offset_local]);
+        const double* val_ptr = &(vals_local[offset_local]);
         for (int i = 0; i < degree+1; ++i) {
             simd_t sumj(0.);
             for (int j = 0; j < degree+1; ++j) {
@@ -198,33 +202,35 @@ void RegularGridInterpolant3D<Array>::evaluate_local(double x, double y, double
         }
     }
 }
-//TODO memory usage not fixed
 template<class Array>
-void RegularGridInterpolant3D<Array>::evaluate_local(double x, int cell_idx, double* res)
+template<int degree>
+void RegularGridInterpolant3D<Array>::evaluate_local_fixed_degree(double x, double y, double z, const double* vals_local, double* res)
 {
-    int degree = rule.degree;
-    auto got = all_local_vals_map.find(cell_idx);
-    if (got == all_local_vals_map.end()) {
-        if(out_of_bounds_ok)
-            return;
-        else
-            throw std::runtime_error((boost::format("cell_idx={} not in all_local_vals_map") % cell_idx).str());
-    }
-
-    double* vals_local = got->second.data();
-
-    for (int k = 0; k < degree+1; ++k) {
-        pkxs[k] = this->rule.basis_fun(k, x);
+    // Same as the generic kernel in evaluate_local, but the basis functions are
+    // evaluated in O(degree) operations and the loops have a length that is known
+    // at compile time, so that they can be unrolled.
+    constexpr int n = degree+1;
+    double pkxs[n], pkys[n], pkzs[n];
+    this->rule.basis_funs(x, pkxs);
+    this->rule.basis_funs(y, pkys);
+    this->rule.basis_funs(z, pkzs);
+    // the products of the y and z basis functions are the same for all outputs
+    double pkyzs[n*n];
+    for (int j = 0; j < n; ++j) {
+        for (int k = 0; k < n; ++k) {
+            pkyzs[j*n+k] = pkys[j]*pkzs[k];
+        }
     }
-
     for(int l=0; l<padded_value_size; l += simdcount) {
         simd_t sumi(0.);
-        int offset_local = l;
-        double* val_ptr = &(vals_local[offset_local]);
-        for (int i = 0; i < degree+1; ++i) {
-            double pkx = pkxs[i];
-            sumi = xsimd::fma(xsimd::load_aligned(val_ptr), simd_t(pkx), sumi);
-            val_ptr += padded_value_size * (degree+1) * (degree+1);
+        const double* val_ptr = &(vals_local[l]);
+        for (int i = 0; i < n; ++i) {
+            simd_t sumjk(0.);
+            for (int jk = 0; jk < n*n; ++jk) {
+                sumjk = xsimd::fma(xsimd::load_aligned(val_ptr), simd_t(pkyzs[jk]), sumjk);
+                val_ptr += padded_value_size;
+            }
+            sumi = xsimd::fma(sumjk, simd_t(pkxs[i]), sumi);
         }
         for (int ll = 0; ll < std::min(simdcount, value_size-l); ++ll) {
             res[l+ll] = sumi[ll];
@@ -232,6 +238,29 @@ void RegularGridInterpolant3D<Array>::evaluate_local(double x, int cell_idx, dou
     }
 }
 
+template<class Array>
+void RegularGridInterpolant3D<Array>::check_local_vals(const double* data, size_t size) {
+    if(size != size_t(cells_to_keep) * local_vals_size)
+        throw std::invalid_argument((boost::format("Expected %1% coefficients, got %2%") % (size_t(cells_to_keep) * local_vals_size) % size).str());
+    if(reinterpret_cast<uintptr_t>(data) % XSIMD_DEFAULT_ALIGNMENT != 0)
+        throw std::invalid_argument((boost::format("The coefficients need to be aligned to %1% bytes") % XSIMD_DEFAULT_ALIGNMENT).str());
+}
+
+template<class Array>
+void RegularGridInterpolant3D<Array>::set_local_vals(const std::vector<int32_t>& cell_to_local, const double* data, size_t size, std::shared_ptr<const void> owner) {
+    if(cell_to_local.size() != size_t(nx)*ny*nz)
+        throw std::invalid_argument((boost::format("Expected %1% cells, got %2%") % (size_t(nx)*ny*nz) % cell_to_local.size()).str());
+    for (size_t i = 0; i < cell_to_local.size(); ++i) {
+        if(cell_to_local[i] >= int32_t(cells_to_keep) || (cell_to_local[i] < 0) != bool(skip_cell[i]))
+            throw std::invalid_argument("cell_to_local does not match the cells of the interpolant");
+    }
+    check_local_vals(data, size);
+    this->cell_to_local = cell_to_local;
+    all_local_vals = AlignedPaddedVec();
+    local_vals_data = data;
+    local_vals_owner = owner;
+}
+
 template<class Array>
 std::pair<double, double> RegularGridInterpolant3D<Array>::estimate_error(std::function<Vec(Vec, Vec, Vec)> &f, int samples) {
     std::default_random_engine generator;
@@ -267,7 +296,129 @@ std::pair<double, double> RegularGridInterpolant3D<Array>::estimate_error(std::f
     return std::make_pair(mean-std, mean+std);
 }
 
+template<class Array>
+const int RegularGridInterpolant1D<Array>::simdcount;
 
+template<class Array>
+void RegularGridInterpolant1D<Array>::interpolate_batch(std::function<Vec(Vec)> &f) {
+    int degree = rule.degree;
+    Vec vals = f(xdof);
+    all_local_vals = AlignedPaddedVec(size_t(nx) * local_vals_size, 0.);
+    local_vals_data = all_local_vals.data();
+    local_vals_owner.reset();
+    for (int xidx = 0; xidx < nx; ++xidx) {
+        double* local_vals = all_local_vals.data() + size_t(xidx) * local_vals_size;
+        for (int i = 0; i < degree+1; ++i) {
+            int offset = value_size*(xidx*degree+i);
+            for (int l = 0; l < value_size; ++l) {
+                local_vals[padded_value_size*i + l] = vals[offset + l];
+            }
+        }
+    }
+}
+
+template<class Array>
+void RegularGridInterpolant1D<Array>::evaluate_batch(Array& x, Array& fx){
+    if(fx.layout() != xt::layout_type::row_major)
+          throw std::runtime_error("fx needs to be in row-major storage order");
+    int npoints = x.shape(0);
+    for (int i = 0; i < npoints; ++i) {
+        evaluate_inplace(x(i, 0), fx.data() + value_size*i);
+    }
+}
+
+template<class Array>
+Vec RegularGridInterpolant1D<Array>::evaluate(double x){
+    Vec fx(value_size, 0.);
+    evaluate_inplace(x, fx.data());
+    return fx;
+}
+
+template<class Array>
+void RegularGridInterpolant1D<Array>::evaluate_inplace(double x, double* res){
+    // to avoid funny business when the data is just a tiny bit out of bounds
+    // due to machine precision, we perform this check and shift
+    if(x >= xmax) x -= _EPS_;
+    else if (x <= xmin) x += _EPS_;
+
+    int xidx = int(nx*(x-xmin)/(xmax-xmin)); // find idx so that xmesh[xidx] <= x <= xs[xidx+1]
+    if(xidx < 0 || xidx >= nx) {
+        if(out_of_bounds_ok)
+            return;
+        else
+            throw std::runtime_error((boost::format("xidxs={} not within [0, {}]") % xidx % (nx-1)).str());
+    }
+    double xlocal = (x-xmesh[xidx])/hx;
+    return evaluate_local(xlocal, xidx, res);
+}
+
+template<class Array>
+void RegularGridInterpolant1D<Array>::evaluate_local(double x, int cell_idx, double* res)
+{
+    int degree = rule.degree;
+    if (local_vals_data == nullptr)
+        throw std::runtime_error("The interpolant has to be built with interpolate_batch before it can be evaluated");
+    const double* vals_local = local_vals_data + size_t(cell_idx) * local_vals_size;
+    static thread_local Vec pks;
+    if(pks.size() < degree+1)
+        pks.resize(degree+1);
+    double* pkxs = pks.data();
+    this->rule.basis_funs(x, pkxs);
+
+    for(int l=0; l<padded_value_size; l += simdcount) {
+        simd_t sumi(0.);
+        const double* val_ptr = &(vals_local[l]);
+        for (int i = 0; i < degree+1; ++i) {
+            sumi = xsimd::fma(xsimd::load_aligned(val_ptr), simd_t(pkxs[i]), sumi);
+            val_ptr += padded_value_size;
+        }
+        for (int ll = 0; ll < std::min(simdcount, value_size-l); ++ll) {
+            res[l+ll] = sumi[ll];
+        }
+    }
+}
+
+template<class Array>
+void RegularGridInterpolant1D<Array>::set_local_vals(const double* data, size_t size, std::shared_ptr<const void> owner) {
+    if(size != size_t(nx) * local_vals_size)
+        throw std::invalid_argument((boost::format("Expected %1% coefficients, got %2%") % (size_t(nx) * local_vals_size) % size).str());
+    if(reinterpret_cast<uintptr_t>(data) % XSIMD_DEFAULT_ALIGNMENT != 0)
+        throw std::invalid_argument((boost::format("The coefficients need to be aligned to %1% bytes") % XSIMD_DEFAULT_ALIGNMENT).str());
+    all_local_vals = AlignedPaddedVec();
+    local_vals_data = data;
+    local_vals_owner = owner;
+}
+
+template<class Array>
+std::pair<double, double> RegularGridInterpolant1D<Array>::estimate_error(std::function<Vec(Vec)> &f, int samples, int component) {
+    std::default_random_engine generator;
+    std::uniform_real_distribution<double> distribution(0.0, +1.0);
+    double err = 0;
+    double errsq = 0;
+    Vec xs(samples, 0.);
+    Array x = xt::zeros<double>({samples, 1});
+    Array fhx = xt::zeros<double>({samples, value_size});
+    for (int i = 0; i < samples; ++i) {
+        xs[i] = xmin + distribution(generator)*(xmax-xmin);
+        x(i, 0) = xs[i];
+    }
+    Vec fx = f(xs);
+    this->evaluate_batch(x, fhx);
+    int lmin = component < 0 ? 0 : component;
+    int lmax = component < 0 ? value_size : component+1;
+    for (int i = 0; i < samples; ++i) {
+        double diff = 0.;
+        for (int l = lmin; l < lmax; ++l) {
+            diff += std::pow(fx[value_size*i+l]-fhx(i, l), 2);
+        }
+        diff = std::sqrt(diff);
+        err += diff;
+        errsq += diff*diff;
+    }
+    double mean = err/samples;
+    double std = std::sqrt((errsq - err*err/samples)/(samples-1)/samples);
+    return std::make_pair(mean-std, mean+std);
+}
 
 Vec linspace(double min, double max, int n, bool endpoint) {
     Vec res(n, 0.);
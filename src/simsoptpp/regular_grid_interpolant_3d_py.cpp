@@ -6,4 +6,5 @@ typedef xt::pytensor<double, 2, xt::layout_type::row_major> Array;
 // typedef xt::xarray<double> Array;
 
 template class RegularGridInterpolant3D<Array>;
+template class RegularGridInterpolant1D<Array>;
 // template class RegularGridInterpolant3D<xt::pytensor<double, 2, xt::layout_type::row_major>>;
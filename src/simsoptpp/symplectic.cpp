@@ -178,7 +178,7 @@ void sympl_dense::calc_state(double eval_t, State &temp) {
 
 // see https://github.com/itpplasma/SIMPLE/blob/master/SRC/
 //         orbit_symplectic_quasi.f90:timestep_euler1_quasi
-tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField::Size+2>>> solve_sympl(SymplField f, typename SymplField::State y, double tmax, double dt, double roottol, vector<double> thetas, vector<double> zetas, vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, vector<double> vpars, bool thetas_stop, bool zetas_stop, bool vpars_stop, bool forget_exact_path, bool predictor_step, double dt_save)
+tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField::Size+2>>> solve_sympl(SymplField f, typename SymplField::State y, double tmax, double dt, double roottol, vector<double> thetas, vector<double> zetas, vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, vector<double> vpars, bool thetas_stop, bool zetas_stop, bool vpars_stop, bool forget_exact_path, bool predictor_step, double dt_save, shared_ptr<TrajectoryWriter> writer, int64_t particle_id, double t_init, shared_ptr<TracingCheckpoint> checkpoint)
 {
     double abstol = 0;
     if (zetas.size() > 0 && omega_zetas.size() == 0) {
@@ -195,7 +195,9 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
     typedef typename SymplField::State State;
     vector<array<double, SymplField::Size+1>> res = {};
     vector<array<double, SymplField::Size+2>> res_hits = {};
-    double t = 0.0;
+    reserve_trajectory(res, tmax - t_init, dt_save, forget_exact_path, writer ? writer->chunk_rows : MAX_RESERVED_TRAJECTORY_ROWS);
+    // Tracing starts at t_init > 0 if it is resumed from a checkpoint
+    double t = t_init;
     bool stop = false;
 
     State z = {}; // s, theta, zeta, pzeta
@@ -218,6 +220,7 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
 
     // for interpolation
     sympl_dense dense;
+    StoppingCriteriaWorkspace<SymplField> workspace;
     dense.update(t, dt, y, f);
 
     // set up root solvers
@@ -233,10 +236,11 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
     int iter = 0;
     double s_guess = z[0];
     double pzeta_guess = z[3];
+    const auto first_row = join<1,SymplField::Size>({t}, y);
 
     do {
         // Save initial point
-        if (t==0){
+        if (t==t_init){
             res.push_back(join<1,SymplField::Size>({t}, y));
         }
 
@@ -324,7 +328,7 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
         double t_current = t;
 
         stop = check_stopping_criteria<SymplField,sympl_dense>(f, iter, res_hits, dense, t_last, t_current, dt, abstol, thetas, zetas, 
-            omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop);
+            omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop, workspace);
 
         // Save path if forget_exact_path = False
         if (forget_exact_path == 0) {
@@ -339,13 +343,18 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
             double t_save_last = dt_save * std::ceil(t_last/dt_save);
 
             for (double t_save = t_save_last; t_save <= t_last; t_save += dt_save) {
-                if (t_save != 0) { // t = 0 is already saved. 
+                if (t_save != t_init) { // t = t_init is already saved. 
                     dense.calc_state(t_save, temp);
                     res.push_back(join<1,SymplField::Size>({t_save}, {temp}));
                 }
             }
+            if (writer)
+                writer->write_chunk(particle_id, res);
         } 
 
+        if (checkpoint && iter % CHECKPOINT_UPDATE_STEPS == 0)
+            checkpoint->update(particle_id, t, y, dt);
+
         t_last = t_current;
     } while(t < tmax && !stop);
     // Save t = tmax
@@ -356,6 +365,10 @@ tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField
     }
     dense.calc_state(t, y);
     res.push_back(join<1,SymplField::Size>({t}, {y}));
+    if (writer)
+        writer->finish(particle_id, res, first_row);
+    if (checkpoint)
+        checkpoint->finish(particle_id);
 
     gsl_multiroot_fsolver_free(s_euler);
     gsl_vector_free(xvec_quasi);
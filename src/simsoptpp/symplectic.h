@@ -63,7 +63,7 @@ public:
         double get_dvpardt();
 };
 
-tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField::Size+2>>> solve_sympl(SymplField f, typename SymplField::State y, double tmax, double dt, double roottol, vector<double> thetas, vector<double> zetas, vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, vector<double> vpars, bool thetas_stop=false, bool zetas_stop=false, bool vpars_stop=false, bool forget_exact_path = false, bool predictor_step = true, double dt_save=1e-6);
+tuple<vector<array<double, SymplField::Size+1>>, vector<array<double, SymplField::Size+2>>> solve_sympl(SymplField f, typename SymplField::State y, double tmax, double dt, double roottol, vector<double> thetas, vector<double> zetas, vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, vector<double> vpars, bool thetas_stop=false, bool zetas_stop=false, bool vpars_stop=false, bool forget_exact_path = false, bool predictor_step = true, double dt_save=1e-6, shared_ptr<TrajectoryWriter> writer=nullptr, int64_t particle_id=0, double t_init=0, shared_ptr<TracingCheckpoint> checkpoint=nullptr);
 
 class f_quasi_params{
 public:
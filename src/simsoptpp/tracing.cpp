@@ -8,12 +8,17 @@
 
 #include <memory>
 #include <vector>
+#include <exception>
 #include <functional>
 #include <cassert>
 #include <stdexcept>
 #include <iomanip>
 #include <boost/math/tools/roots.hpp>
 #include <boost/numeric/odeint.hpp>
+#include "pybind11/pybind11.h"
+#ifdef _OPENMP
+    #include <omp.h>
+#endif
 
 using std::shared_ptr;
 using std::tuple;
@@ -37,7 +42,6 @@ class GuidingCenterVacuumBoozerRHS {
      *
      */
     private:
-        Array2 stz = xt::zeros<double>({1, 3});
         shared_ptr<BoozerMagneticField> field;
         double m, q, mu;
     public:
@@ -55,21 +59,17 @@ class GuidingCenterVacuumBoozerRHS {
                 const double t) {
 
             y_to_stzvt<GuidingCenterVacuumBoozerRHS>(ys, stzv, *this);
-
-            stz(0, 0) = stzv[0];
-            stz(0, 1) = stzv[1];
-            stz(0, 2) = stzv[2];
             double v_par = stzv[3];
 
-            field->set_points(stz);
+            BoozerTracingQuantities fq;
+            field->evaluate_tracing_quantities(stzv[0], stzv[1], stzv[2], true, false, fq);
             auto psi0 = field->psi0;
-            double modB = field->modB_ref()(0);
-            double G = field->G_ref()(0);
-            double iota = field->iota_ref()(0);
-            auto modB_derivs = field->modB_derivs_ref();
-            double dmodBds = modB_derivs(0);
-            double dmodBdtheta = modB_derivs(1);
-            double dmodBdzeta = modB_derivs(2);
+            double modB = fq.modB;
+            double G = fq.G;
+            double iota = fq.iota;
+            double dmodBds = fq.dmodBds;
+            double dmodBdtheta = fq.dmodBdtheta;
+            double dmodBdzeta = fq.dmodBdzeta;
             double v_perp2 = 2*mu*modB;
             double fak1 = m*v_par*v_par/modB + m*mu;
 
@@ -308,7 +308,6 @@ class GuidingCenterNoKBoozerRHS {
      *  with the limit K = 0.
      */
     private:
-        Array2 stz = xt::zeros<double>({1, 3});
         shared_ptr<BoozerMagneticField> field;
         double m, q, mu;
     public:
@@ -325,24 +324,20 @@ class GuidingCenterNoKBoozerRHS {
         void operator()(const State &ys, array<double, 4> &dydt,
                 const double t) {
             y_to_stzvt<GuidingCenterNoKBoozerRHS>(ys, stzv, *this);
-
-            stz(0, 0) = stzv[0];
-            stz(0, 1) = stzv[1];
-            stz(0, 2) = stzv[2];
             double v_par = stzv[3];
-                    
-            field->set_points(stz);
+
+            BoozerTracingQuantities fq;
+            field->evaluate_tracing_quantities(stzv[0], stzv[1], stzv[2], false, true, fq);
             auto psi0 = field->psi0;
-            double modB = field->modB_ref()(0);
-            double G = field->G_ref()(0);
-            double I = field->I_ref()(0);
-            double dGdpsi = field->dGds_ref()(0)/psi0;
-            double dIdpsi = field->dIds_ref()(0)/psi0;
-            double iota = field->iota_ref()(0);
-            auto modB_derivs = field->modB_derivs_ref();
-            double dmodBdpsi = modB_derivs(0)/psi0;
-            double dmodBdtheta = modB_derivs(1);
-            double dmodBdzeta = modB_derivs(2);
+            double modB = fq.modB;
+            double G = fq.G;
+            double I = fq.I;
+            double dGdpsi = fq.dGds/psi0;
+            double dIdpsi = fq.dIds/psi0;
+            double iota = fq.iota;
+            double dmodBdpsi = fq.dmodBds/psi0;
+            double dmodBdtheta = fq.dmodBdtheta;
+            double dmodBdzeta = fq.dmodBdzeta;
             double v_perp2 = 2*mu*modB;
             double fak1 = m*v_par*v_par/modB + m*mu;
             double D = ((q + m*v_par*dIdpsi/modB)*G - (-q*iota + m*v_par*dGdpsi/modB)*I)/iota;
@@ -375,7 +370,6 @@ class GuidingCenterBoozerRHS {
      *  :math:`m` is the mass, and :math:`v_\perp = 2\mu|B|`.
      */
     private:
-        Array2 stz = xt::zeros<double>({1, 3});
         shared_ptr<BoozerMagneticField> field;
         double m, q, mu;
     public:
@@ -393,29 +387,24 @@ class GuidingCenterBoozerRHS {
                 const double t) {
 
             y_to_stzvt<GuidingCenterBoozerRHS>(ys, stzv, *this);
-
-            stz(0, 0) = stzv[0];
-            stz(0, 1) = stzv[1];
-            stz(0, 2) = stzv[2];
             double v_par = stzv[3];
 
-            field->set_points(stz);
+            BoozerTracingQuantities fq;
+            field->evaluate_tracing_quantities(stzv[0], stzv[1], stzv[2], false, false, fq);
             auto psi0 = field->psi0;
-            double modB = field->modB_ref()(0);
-            double K = field->K_ref()(0);
-            auto K_derivs = field->K_derivs_ref();
-            double dKdtheta = K_derivs(0);
-            double dKdzeta = K_derivs(1);
-
-            double G = field->G_ref()(0);
-            double I = field->I_ref()(0);
-            double dGdpsi = field->dGds_ref()(0)/psi0;
-            double dIdpsi = field->dIds_ref()(0)/psi0;
-            double iota = field->iota_ref()(0);
-            auto modB_derivs = field->modB_derivs_ref();
-            double dmodBdpsi = modB_derivs(0)/psi0;
-            double dmodBdtheta = modB_derivs(1);
-            double dmodBdzeta = modB_derivs(2);
+            double modB = fq.modB;
+            double K = fq.K;
+            double dKdtheta = fq.dKdtheta;
+            double dKdzeta = fq.dKdzeta;
+
+            double G = fq.G;
+            double I = fq.I;
+            double dGdpsi = fq.dGds/psi0;
+            double dIdpsi = fq.dIds/psi0;
+            double iota = fq.iota;
+            double dmodBdpsi = fq.dmodBds/psi0;
+            double dmodBdtheta = fq.dmodBdtheta;
+            double dmodBdzeta = fq.dmodBdzeta;
             double v_perp2 = 2*mu*modB;
             double fak1 = m*v_par*v_par/modB + m*mu; // dHdB
             double C = -m*v_par*(dKdzeta-dGdpsi)/modB - q*iota;
@@ -436,7 +425,9 @@ template<class RHS>
 tuple<vector<array<double, RHS::Size+1>>, vector<array<double, RHS::Size+2>>>
 solve(RHS rhs, typename RHS::State stzvt, double tau_max, double dtau, double dtau_max, double abstol, double reltol, vector<double> thetas, vector<double> zetas, 
     vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, double dtau_save, vector<double> vpars, 
-    bool thetas_stop=false, bool zetas_stop=false, bool vpars_stop=false, bool forget_exact_path=false) {
+    bool thetas_stop=false, bool zetas_stop=false, bool vpars_stop=false, bool forget_exact_path=false,
+    shared_ptr<TrajectoryWriter> writer=nullptr, int64_t particle_id=0, double tau_init=0,
+    shared_ptr<TracingCheckpoint> checkpoint=nullptr) {
 
     if (zetas.size() > 0 && omega_zetas.size() == 0) {
         omega_zetas.insert(omega_zetas.end(), zetas.size(), 0.);
@@ -455,31 +446,41 @@ solve(RHS rhs, typename RHS::State stzvt, double tau_max, double dtau, double dt
     State y, temp; 
     typedef typename boost::numeric::odeint::result_of::make_dense_output<runge_kutta_dopri5<State>>::type dense_stepper_type;
     dense_stepper_type dense = make_dense_output(abstol, reltol, dtau_max, runge_kutta_dopri5<State>());
-    double tau = 0;
+    // Tracing starts at tau_init > 0 if it is resumed from a checkpoint
+    double tau = tau_init;
     int iter = 0;
     bool stop = false;
     double tau_last = 0;
     double tau_current;
     tau_last = tau;
 
+    reserve_trajectory(res, tau_max - tau_init, dtau_save, forget_exact_path, writer ? writer->chunk_rows : MAX_RESERVED_TRAJECTORY_ROWS);
     // Save initial state
-    res.push_back(join<1, RHS::Size>({0}, stzvt));
+    res.push_back(join<1, RHS::Size>({tau_init * rhs.tnorm}, stzvt));
+    const auto first_row = res.back();
 
     stzvt_to_y<RHS>(stzvt, y, rhs);
     dense.initialize(y, tau, dtau);
+    StoppingCriteriaWorkspace<RHS> workspace;
 
     do {
-        tuple<double, double> step = dense.do_step(rhs);
+        // Pass the RHS by reference, since odeint copies the system it is given
+        tuple<double, double> step = dense.do_step(std::ref(rhs));
         iter++;
         tau = dense.current_time();
         y = dense.current_state();
         tau_last = std::get<0>(step);
         tau_current = std::get<1>(step);
         dtau = tau_current - tau_last; // Timestep taken
+        if (checkpoint && iter % CHECKPOINT_UPDATE_STEPS == 0) {
+            y_to_stzvt<RHS>(y, temp, rhs);
+            checkpoint->update(particle_id, tau * rhs.tnorm, temp, dtau * rhs.tnorm);
+        }
 
         // Check if we have hit a stopping criterion between tau_last and tau_current
         stop = check_stopping_criteria<RHS,dense_stepper_type>(rhs, iter, res_hits, dense, tau_last, 
-            tau_current, dtau, abstol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop);
+            tau_current, dtau, abstol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop,
+            workspace);
 
         // Save path if forget_exact_path = False
         if (forget_exact_path == 0) {
@@ -490,13 +491,15 @@ solve(RHS rhs, typename RHS::State stzvt, double tau_max, double dtau, double dt
             // This will give the first save point after tau_last
             double tau_save_last = std::ceil(tau_last/dtau_save) * dtau_save;
             for (double tau_save = tau_save_last; tau_save <= tau_current; tau_save += dtau_save) {
-                if (tau_save != 0) {  // tau = 0 is already saved. 
+                if (tau_save != tau_init) {  // tau = tau_init is already saved. 
                     dense.calc_state(tau_save, temp);
                     double t_save = tau_save * rhs.tnorm;
                     y_to_stzvt<RHS>(temp, stzvt, rhs);
                     res.push_back(join<1, RHS::Size>({t_save}, stzvt));
                 }
             }
+            if (writer)
+                writer->write_chunk(particle_id, res);
         } 
     } while(tau < tau_max && !stop);
     // Save t = tmax
@@ -507,6 +510,10 @@ solve(RHS rhs, typename RHS::State stzvt, double tau_max, double dtau, double dt
     dense.calc_state(tau_max, y);
     y_to_stzvt<RHS>(y, stzvt, rhs);
     res.push_back(join<1, RHS::Size>({t_max}, stzvt));
+    if (writer)
+        writer->finish(particle_id, res, first_row);
+    if (checkpoint)
+        checkpoint->finish(particle_id);
 
     return std::make_tuple(res, res_hits);
 }
@@ -536,7 +543,9 @@ particle_guiding_center_boozer_perturbed_tracing(
         bool vpars_stop,
         bool forget_exact_path,
         int axis,
-        vector<double> vpars)
+        vector<double> vpars,
+        shared_ptr<TrajectoryWriter> writer,
+        int64_t particle_id)
 {
     Array2 stzt({{stz_init[0], stz_init[1], stz_init[2], 0.0}});
     perturbed_field->set_points(stzt);
@@ -571,65 +580,77 @@ particle_guiding_center_boozer_perturbed_tracing(
           perturbed_field, m, q, mu, axis, vnorm, tnorm
       );
       return solve<GuidingCenterVacuumBoozerPerturbedRHS>(rhs_class, stzvt, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, 
-            stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path);
+            stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, writer, particle_id);
   } else {
       auto rhs_class = GuidingCenterNoKBoozerPerturbedRHS(
           perturbed_field, m, q, mu, axis, vnorm, tnorm
       );
       return solve<GuidingCenterNoKBoozerPerturbedRHS>(rhs_class, stzvt, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, 
-            stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path);
+            stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, writer, particle_id);
   }
 }
 
 /**
-See trace_particles_boozer() defined in tracing.py for details on the parameters.
+Traces a single particle. The field is only evaluated through 
+BoozerMagneticField::evaluate_tracing_quantities(), which does not allocate numpy
+arrays once the field has been prepared with prepare_field_for_tracing(). This 
+allows particle_guiding_center_boozer_tracing_batch() to call this without 
+holding the GIL.
 **/
-tuple<vector<array<double, 5>>, vector<array<double, 6>>>
-particle_guiding_center_boozer_tracing(
-        shared_ptr<BoozerMagneticField> field, 
+static tuple<vector<array<double, 5>>, vector<array<double, 6>>>
+particle_guiding_center_boozer_tracing_impl(
+        shared_ptr<BoozerMagneticField> field,
         array<double, 3> stz_init,
-        double m, 
-        double q, 
-        double vtotal, 
-        double vtang, 
-        double tmax, 
-        bool vacuum, 
-        bool noK, 
+        double m,
+        double q,
+        double vtotal,
+        double vtang,
+        double tmax,
+        bool vacuum,
+        bool noK,
         vector<double> thetas,
-        vector<double> zetas, 
+        vector<double> zetas,
         vector<double> omega_thetas,
         vector<double> omega_zetas,
         vector<double> vpars,
-        vector<shared_ptr<StoppingCriterion>> stopping_criteria,  
-        double dt_save, 
+        vector<shared_ptr<StoppingCriterion>> stopping_criteria,
+        double dt_save,
         bool forget_exact_path,
         bool thetas_stop,
-        bool zetas_stop, 
-        bool vpars_stop, 
-        int axis, 
-        double abstol, 
+        bool zetas_stop,
+        bool vpars_stop,
+        int axis,
+        double abstol,
         double reltol,
         bool solveSympl,
-        bool predictor_step, 
+        bool predictor_step,
         double roottol,
-        double dt
+        double dt,
+        shared_ptr<TrajectoryWriter> writer,
+        int64_t particle_id,
+        double t_init,
+        double dt_init,
+        shared_ptr<TracingCheckpoint> checkpoint
         )
 {
-    Array2 stz({{stz_init[0], stz_init[1], stz_init[2]}});
-    field->set_points(stz);
-    double modB = field->modB()(0);
+    BoozerTracingQuantities fq;
+    field->evaluate_tracing_quantities(stz_init[0], stz_init[1], stz_init[2], vacuum, noK, fq);
+    double modB = fq.modB;
     double vperp2 = vtotal*vtotal - vtang*vtang;
     double mu = vperp2/(2*modB);
     array<double, 4> stzv;
     double vnorm, tnorm, dtau_max, dtau; 
 
     if (!solveSympl){
-        double G0 = std::abs(field->G()(0));
+        double G0 = std::abs(fq.G);
         double r0 = G0/modB;
         vnorm = vtotal; // Normalizing velocity = vtotal
         tnorm = r0*2*M_PI/vtotal; // Normalizing time = time for one toroidal revolution
         dtau_max = 0.25; // can at most do quarter of a revolution per step
         dtau = 1e-3 * dtau_max; // initial guess for first timestep, will be adjusted by adaptive timestepper
+        if (dt_init > 0) {
+            dtau = dt_init / tnorm; // last timestep of a particle that is resumed from a checkpoint
+        }
     } else {
         vnorm = 1;
         tnorm = 1; 
@@ -641,6 +662,7 @@ particle_guiding_center_boozer_tracing(
     // Normalize tmax and dt_save
     double tau_max = tmax / tnorm;
     double dtau_save = dt_save / tnorm;
+    double tau_init = t_init / tnorm;
 
     stzv[0] = stz_init[0];
     stzv[1] = stz_init[1];
@@ -650,20 +672,218 @@ particle_guiding_center_boozer_tracing(
     if (solveSympl) {
 #ifdef USE_GSL
         auto f = SymplField(field, m, q, mu, vnorm, tnorm);
-        return solve_sympl(f, stzv, tau_max, dtau, roottol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, predictor_step, dtau_save);
+        return solve_sympl(f, stzv, tau_max, dtau, roottol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, predictor_step, dtau_save, writer, particle_id, tau_init, checkpoint);
 #else
         throw std::invalid_argument("Symplectic solver not available. Please recompile with GSL support.");
 #endif
     } else {
         if (vacuum) {
           auto rhs_class = GuidingCenterVacuumBoozerRHS(field, m, q, mu, axis, vnorm, tnorm);
-          return solve<GuidingCenterVacuumBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path);
+          return solve<GuidingCenterVacuumBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, writer, particle_id, tau_init, checkpoint);
         } else if (noK) {
           auto rhs_class = GuidingCenterNoKBoozerRHS(field, m, q, mu, axis, vnorm, tnorm);
-          return solve<GuidingCenterNoKBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path);
+          return solve<GuidingCenterNoKBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, writer, particle_id, tau_init, checkpoint);
         } else {
           auto rhs_class = GuidingCenterBoozerRHS(field, m, q, mu, axis, vnorm, tnorm);
-          return solve<GuidingCenterBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path);
+          return solve<GuidingCenterBoozerRHS>(rhs_class, stzv, tau_max, dtau, dtau_max, abstol, reltol, thetas, zetas, omega_thetas, omega_zetas, stopping_criteria, dtau_save, vpars, thetas_stop, zetas_stop, vpars_stop, forget_exact_path, writer, particle_id, tau_init, checkpoint);
+        }
+    }
+}
+
+/**
+See trace_particles_boozer() defined in tracing.py for details on the parameters.
+**/
+tuple<vector<array<double, 5>>, vector<array<double, 6>>>
+particle_guiding_center_boozer_tracing(
+        shared_ptr<BoozerMagneticField> field, 
+        array<double, 3> stz_init,
+        double m, 
+        double q, 
+        double vtotal, 
+        double vtang, 
+        double tmax, 
+        bool vacuum, 
+        bool noK, 
+        vector<double> thetas,
+        vector<double> zetas, 
+        vector<double> omega_thetas,
+        vector<double> omega_zetas,
+        vector<double> vpars,
+        vector<shared_ptr<StoppingCriterion>> stopping_criteria,  
+        double dt_save, 
+        bool forget_exact_path,
+        bool thetas_stop,
+        bool zetas_stop, 
+        bool vpars_stop, 
+        int axis, 
+        double abstol, 
+        double reltol,
+        bool solveSympl,
+        bool predictor_step, 
+        double roottol,
+        double dt,
+        shared_ptr<TrajectoryWriter> writer,
+        int64_t particle_id,
+        double t_init,
+        double dt_init,
+        shared_ptr<TracingCheckpoint> checkpoint
+        )
+{
+    return particle_guiding_center_boozer_tracing_impl(
+        field, stz_init, m, q, vtotal, vtang, tmax, vacuum, noK,
+        thetas, zetas, omega_thetas, omega_zetas, vpars, stopping_criteria,
+        dt_save, forget_exact_path, thetas_stop, zetas_stop, vpars_stop, axis,
+        abstol, reltol, solveSympl, predictor_step, roottol, dt, writer, particle_id,
+        t_init, dt_init, checkpoint);
+}
+
+/**
+Evaluates the field once at (s, theta, zeta) for the chosen mode. For fields that
+build their data lazily (e.g. InterpolatedBoozerField) this makes sure that all of
+it exists, and that all internal arrays have their final shape, before the field 
+is used from a thread that does not hold the GIL.
+**/
+static void prepare_field_for_tracing(shared_ptr<BoozerMagneticField> field, double s, double theta, double zeta, bool vacuum, bool noK)
+{
+    BoozerTracingQuantities fq;
+    field->evaluate_tracing_quantities(s, theta, zeta, vacuum, noK, fq);
+}
+
+/**
+Traces a batch of particles with a single call. stz_inits is an (nparticles, 3) 
+array of initial positions, and vtotals and vtangs contain the total and parallel 
+speed of each particle. The remaining parameters are shared by all particles and 
+are passed on to particle_guiding_center_boozer_tracing(). 
+
+If nthreads > 1, the particles are distributed over nthreads OpenMP threads and
+the GIL is released while tracing. Each thread works on its own evaluation context
+of the field (see BoozerMagneticField::clone()) and its own copy of the stopping 
+criteria. This is not 
+supported by the symplectic solver. If simsoptpp was compiled without OpenMP, the
+particles are traced serially.
+**/
+tuple<vector<vector<array<double, 5>>>, vector<vector<array<double, 6>>>>
+particle_guiding_center_boozer_tracing_batch(
+        shared_ptr<BoozerMagneticField> field,
+        Array2& stz_inits,
+        double m,
+        double q,
+        vector<double> vtotals,
+        vector<double> vtangs,
+        double tmax,
+        bool vacuum,
+        bool noK,
+        vector<double> thetas,
+        vector<double> zetas,
+        vector<double> omega_thetas,
+        vector<double> omega_zetas,
+        vector<double> vpars,
+        vector<shared_ptr<StoppingCriterion>> stopping_criteria,
+        double dt_save,
+        bool forget_exact_path,
+        bool thetas_stop,
+        bool zetas_stop,
+        bool vpars_stop,
+        int axis,
+        double abstol,
+        double reltol,
+        bool solveSympl,
+        bool predictor_step,
+        double roottol,
+        double dt,
+        int nthreads,
+        shared_ptr<TrajectoryWriter> writer,
+        vector<int64_t> particle_ids,
+        vector<double> t_inits,
+        vector<double> dt_inits,
+        shared_ptr<TracingCheckpoint> checkpoint
+        )
+{
+    if (stz_inits.dimension() != 2 || (stz_inits.shape(0) > 0 && stz_inits.shape(1) != 3)) {
+        throw std::invalid_argument("stz_inits needs to have shape (nparticles, 3).");
+    }
+    int nparticles = stz_inits.shape(0);
+    if (nparticles < 0) {
+        throw std::invalid_argument("nparticles needs to be non-negative.");
+    }
+    size_t nparticles_size = static_cast<size_t>(nparticles);
+    if (vtotals.size() != nparticles_size || vtangs.size() != nparticles_size) {
+        throw std::invalid_argument("vtotals and vtangs need to have length nparticles.");
+    }
+    // By default, the particles are numbered 0, 1, ... and start at t = 0
+    if (particle_ids.empty()) {
+        for (int i = 0; i < nparticles; ++i)
+            particle_ids.push_back(i);
+    }
+    if (t_inits.empty())
+        t_inits.assign(nparticles, 0.);
+    if (dt_inits.empty())
+        dt_inits.assign(nparticles, 0.);
+    if (particle_ids.size() != nparticles_size || t_inits.size() != nparticles_size || dt_inits.size() != nparticles_size) {
+        throw std::invalid_argument("particle_ids, t_inits and dt_inits need to be empty or have length nparticles.");
+    }
+    if (nthreads < 1) {
+        throw std::invalid_argument("nthreads needs to be positive.");
+    }
+    if (nthreads > 1 && solveSympl) {
+        throw std::invalid_argument("The symplectic solver does not support nthreads > 1.");
+    }
+
+    vector<vector<array<double, 5>>> res_tys(nparticles);
+    vector<vector<array<double, 6>>> res_hits(nparticles);
+#ifdef _OPENMP
+    if (nthreads > 1 && nparticles > 0) {
+        // Everything that creates or destroys numpy arrays has to happen while we
+        // hold the GIL: building the interpolants of the original field, creating
+        // the evaluation contexts for each thread, and finally destroying them 
+        // again at the end of this scope.
+        prepare_field_for_tracing(field, stz_inits(0, 0), stz_inits(0, 1), stz_inits(0, 2), vacuum, noK);
+        vector<shared_ptr<BoozerMagneticField>> thread_fields(nthreads);
+        vector<vector<shared_ptr<StoppingCriterion>>> thread_stopping_criteria(nthreads);
+        for (int t = 0; t < nthreads; ++t) {
+            thread_fields[t] = field->clone();
+            prepare_field_for_tracing(thread_fields[t], stz_inits(0, 0), stz_inits(0, 1), stz_inits(0, 2), vacuum, noK);
+            for (auto& criterion : stopping_criteria) {
+                thread_stopping_criteria[t].push_back(criterion->clone());
+            }
         }
+
+        std::exception_ptr error = nullptr;
+        {
+            pybind11::gil_scoped_release release;
+            #pragma omp parallel for schedule(dynamic, 1) num_threads(nthreads)
+            for (int i = 0; i < nparticles; ++i) {
+                int t = omp_get_thread_num();
+                try {
+                    array<double, 3> stz_init = {stz_inits(i, 0), stz_inits(i, 1), stz_inits(i, 2)};
+                    std::tie(res_tys[i], res_hits[i]) = particle_guiding_center_boozer_tracing_impl(
+                        thread_fields[t], stz_init, m, q, vtotals[i], vtangs[i], tmax, vacuum, noK,
+                        thetas, zetas, omega_thetas, omega_zetas, vpars, thread_stopping_criteria[t],
+                        dt_save, forget_exact_path, thetas_stop, zetas_stop, vpars_stop, axis,
+                        abstol, reltol, solveSympl, predictor_step, roottol, dt, writer, particle_ids[i],
+                        t_inits[i], dt_inits[i], checkpoint);
+                } catch (...) {
+                    #pragma omp critical
+                    if (!error) {
+                        error = std::current_exception();
+                    }
+                }
+            }
+        }
+        if (error) {
+            std::rethrow_exception(error);
+        }
+        return std::make_tuple(res_tys, res_hits);
+    }
+#endif
+    for (int i = 0; i < nparticles; ++i) {
+        array<double, 3> stz_init = {stz_inits(i, 0), stz_inits(i, 1), stz_inits(i, 2)};
+        std::tie(res_tys[i], res_hits[i]) = particle_guiding_center_boozer_tracing(
+            field, stz_init, m, q, vtotals[i], vtangs[i], tmax, vacuum, noK,
+            thetas, zetas, omega_thetas, omega_zetas, vpars, stopping_criteria,
+            dt_save, forget_exact_path, thetas_stop, zetas_stop, vpars_stop, axis,
+            abstol, reltol, solveSympl, predictor_step, roottol, dt, writer, particle_ids[i],
+            t_inits[i], dt_inits[i], checkpoint);
     }
+    return std::make_tuple(res_tys, res_hits);
 }
@@ -36,7 +36,9 @@ particle_guiding_center_boozer_perturbed_tracing(
         bool vpars_stop=false,
         bool forget_exact_path=false,
         int axis=0,
-        vector<double> vpars={});
+        vector<double> vpars={},
+        shared_ptr<TrajectoryWriter> writer=nullptr,
+        int64_t particle_id=0);
 
 
 tuple<vector<std::array<double, 5>>, vector<std::array<double, 6>>>
@@ -67,5 +69,47 @@ particle_guiding_center_boozer_tracing(
         bool solveSympl=false,
         bool predictor_step=true,
         double roottol=1e-9,
-        double dt=1e-7
+        double dt=1e-7,
+        shared_ptr<TrajectoryWriter> writer=nullptr,
+        int64_t particle_id=0,
+        double t_init=0,
+        double dt_init=0,
+        shared_ptr<TracingCheckpoint> checkpoint=nullptr
+);
+
+tuple<vector<vector<std::array<double, 5>>>, vector<vector<std::array<double, 6>>>>
+particle_guiding_center_boozer_tracing_batch(
+        shared_ptr<BoozerMagneticField> field,
+        BoozerMagneticField::Array2& stz_inits,
+        double m,
+        double q,
+        vector<double> vtotals,
+        vector<double> vtangs,
+        double tmax,
+        bool vacuum,
+        bool noK,
+        vector<double> thetas={},
+        vector<double> zetas={},
+        vector<double> omega_thetas={},
+        vector<double> omega_zetas={},
+        vector<double> vpars={},
+        vector<shared_ptr<StoppingCriterion>> stopping_criteria={},
+        double dt_save=1e-6,
+        bool forget_exact_path=false,
+        bool thetas_stop=false,
+        bool zetas_stop=false,
+        bool vpars_stop=false,
+        int axis=0,
+        double abstol=1e-9,
+        double reltol=1e-9,
+        bool solveSympl=false,
+        bool predictor_step=true,
+        double roottol=1e-9,
+        double dt=1e-7,
+        int nthreads=1,
+        shared_ptr<TrajectoryWriter> writer=nullptr,
+        vector<int64_t> particle_ids={},
+        vector<double> t_inits={},
+        vector<double> dt_inits={},
+        shared_ptr<TracingCheckpoint> checkpoint=nullptr
 );
@@ -8,6 +8,16 @@
 #include <memory>
 #include <functional>
 #include <iostream>
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <cstdio>
+#include <cstdint>
+#include <chrono>
+#include <map>
+#include <mutex>
+#include <string>
+#include <stdexcept>
 
 using std::array;
 using std::shared_ptr;
@@ -18,6 +28,9 @@ class StoppingCriterion {
     public:
         // Should return true if the Criterion is satisfied.
         virtual bool operator()(int iter, double dt, double t, double x, double y, double z, double vpar=0) = 0;
+        // Returns an independent copy of the criterion. Criteria may carry
+        // state between iterations, so every tracing thread needs its own copy.
+        virtual shared_ptr<StoppingCriterion> clone() const = 0;
         virtual ~StoppingCriterion() {}
 };
 
@@ -30,6 +43,9 @@ class ZetaStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double s, double theta, double zeta, double vpar=0) override {
             return std::abs(zeta)>=2*M_PI/nfp;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<ZetaStoppingCriterion>(*this);
+        };
 };
 
 class VparStoppingCriterion : public StoppingCriterion {
@@ -41,6 +57,9 @@ class VparStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double x, double y, double z, double vpar) override {
             return std::abs(vpar)<=vpar_crit;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<VparStoppingCriterion>(*this);
+        };
 };
 
 class ToroidalTransitStoppingCriterion : public StoppingCriterion {
@@ -63,6 +82,9 @@ class ToroidalTransitStoppingCriterion : public StoppingCriterion {
             int ntransits = std::abs(std::floor((this_zeta-zeta_init)/(2*M_PI)));
             return ntransits>=max_transits;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<ToroidalTransitStoppingCriterion>(*this);
+        };
 };
 
 class MaxToroidalFluxStoppingCriterion : public StoppingCriterion {
@@ -73,6 +95,9 @@ class MaxToroidalFluxStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double s, double theta, double zeta, double vpar=0) override {
             return s>=max_s;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<MaxToroidalFluxStoppingCriterion>(*this);
+        };
 };
 
 class MinToroidalFluxStoppingCriterion : public StoppingCriterion {
@@ -83,6 +108,9 @@ class MinToroidalFluxStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double s, double theta, double zeta, double vpar=0) override {
             return s<=min_s;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<MinToroidalFluxStoppingCriterion>(*this);
+        };
 };
 
 class IterationStoppingCriterion : public StoppingCriterion {
@@ -93,6 +121,9 @@ class IterationStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double s, double theta, double zeta, double vpar=0) override {
             return iter>max_iter;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<IterationStoppingCriterion>(*this);
+        };
 };
 
 class StepSizeStoppingCriterion : public StoppingCriterion {
@@ -103,6 +134,9 @@ class StepSizeStoppingCriterion : public StoppingCriterion {
         bool operator()(int iter, double dt, double t, double s, double theta, double zeta, double vpar=0) override {
             return dt<min_dt;
         };
+        shared_ptr<StoppingCriterion> clone() const override {
+            return std::make_shared<StepSizeStoppingCriterion>(*this);
+        };
 };
 
 template<std::size_t m, std::size_t n>
@@ -118,8 +152,169 @@ array<double, m+n> join(const array<double, m>& a, const array<double, n>& b)
      return res;
 }
 
+// Upper bound on the number of trajectory rows that are reserved up front, so
+// that a very small dt_save does not allocate memory for steps that a particle
+// which is lost early never takes. Longer trajectories grow the vector as usual.
+#define MAX_RESERVED_TRAJECTORY_ROWS 4096
+
+// Reserves the rows of a trajectory that is saved every dtau_save up to tau_max,
+// plus the initial and final state, but at most max_rows rows. The rows are stored
+// contiguously, so the trajectory can later be handed to numpy as an (nrows, n)
+// array without a copy.
+template<std::size_t n>
+void reserve_trajectory(vector<array<double, n>>& res, double tau_max, double dtau_save, bool forget_exact_path,
+        std::size_t max_rows=MAX_RESERVED_TRAJECTORY_ROWS)
+{
+    static_assert(sizeof(array<double, n>) == n*sizeof(double), "trajectory rows need to be contiguous");
+    double nrows = 2;
+    if (!forget_exact_path && dtau_save > 0)
+        nrows += std::floor(tau_max/dtau_save);
+    res.reserve((std::size_t) std::min(nrows, (double) max_rows));
+}
+
+// Streams the saved states of trajectories to a binary file, so that the memory
+// used by a trajectory does not grow with tmax/dt_save. The tracers hand their
+// rows to the writer whenever chunk_rows of them have been collected, and the
+// writer appends them to the file as raw doubles in row-major order. For each
+// chunk, the particle it belongs to and its number of rows are recorded in
+// chunk_particles and chunk_lengths. The chunks of one particle are written in
+// order, but they may interleave with those of other particles if several
+// threads share the writer. See simsopt.field.tracing.load_trajectories.
+class TrajectoryWriter {
+    private:
+        FILE* file;
+        std::mutex mutex;
+
+    public:
+        const std::string filename;
+        const std::size_t chunk_rows;
+        int ncols = 0;
+        vector<int64_t> chunk_particles;
+        vector<int64_t> chunk_lengths;
+
+        TrajectoryWriter(std::string filename, std::size_t chunk_rows=4096) : filename(filename), chunk_rows(chunk_rows) {
+            if (chunk_rows < 1)
+                throw std::invalid_argument("chunk_rows needs to be positive.");
+            file = std::fopen(filename.c_str(), "wb");
+            if (!file)
+                throw std::runtime_error("Could not open " + filename + " for writing.");
+        }
+
+        ~TrajectoryWriter() {
+            close();
+        }
+
+        void close() {
+            std::lock_guard<std::mutex> lock(mutex);
+            if (file) {
+                std::fclose(file);
+                file = nullptr;
+            }
+        }
+
+        // Appends all rows to the file and clears them.
+        template<std::size_t n>
+        void write(int64_t particle, vector<array<double, n>>& rows) {
+            std::lock_guard<std::mutex> lock(mutex);
+            if (!file)
+                throw std::logic_error("The trajectory file " + filename + " has already been closed.");
+            if (ncols == 0)
+                ncols = n;
+            else if (ncols != (int) n)
+                throw std::invalid_argument("All trajectories in " + filename + " need to have the same number of columns.");
+            if (rows.empty())
+                return;
+            if (std::fwrite(rows.data(), sizeof(array<double, n>), rows.size(), file) != rows.size())
+                throw std::runtime_error("Could not write to " + filename + ".");
+            chunk_particles.push_back(particle);
+            chunk_lengths.push_back(rows.size());
+            rows.clear();
+        }
+
+        // Writes the rows once a full chunk has been collected.
+        template<std::size_t n>
+        void write_chunk(int64_t particle, vector<array<double, n>>& rows) {
+            if (rows.size() >= chunk_rows)
+                write(particle, rows);
+        }
+
+        // Writes the remaining rows of a trajectory, and leaves only its first and
+        // last row in rows, as with forget_exact_path.
+        template<std::size_t n>
+        void finish(int64_t particle, vector<array<double, n>>& rows, const array<double, n>& first) {
+            array<double, n> last = rows.back();
+            write(particle, rows);
+            rows = {first, last};
+        }
+};
+
+// Number of steps after which the tracers pass the state of a particle to the
+// TracingCheckpoint.
+#define CHECKPOINT_UPDATE_STEPS 100
+
+// Keeps the latest state of the particles that are being traced, and writes all
+// of them to a file at most every interval seconds (wall time), so that tracing
+// can be resumed from there if the process is stopped. Each row of the file holds
+// the doubles (particle, t, s, theta, zeta, vpar, dt), where dt is the last time
+// step. The file is first written under a temporary name and then renamed, so
+// that it is never left half written. See simsopt.field.tracing.trace_particles_boozer.
+class TracingCheckpoint {
+    private:
+        std::map<int64_t, array<double, 6>> states;
+        std::mutex mutex;
+        std::chrono::steady_clock::time_point last_write;
+
+        void write_locked() {
+            std::string tmp = filename + ".tmp";
+            FILE* file = std::fopen(tmp.c_str(), "wb");
+            if (!file)
+                throw std::runtime_error("Could not open " + tmp + " for writing.");
+            bool ok = true;
+            for (auto& entry : states) {
+                array<double, 7> row;
+                row[0] = entry.first;
+                std::copy(entry.second.begin(), entry.second.end(), row.begin() + 1);
+                ok = ok && std::fwrite(row.data(), sizeof(double), 7, file) == 7;
+            }
+            ok = (std::fclose(file) == 0) && ok;
+            if (!ok || std::rename(tmp.c_str(), filename.c_str()) != 0)
+                throw std::runtime_error("Could not write to " + filename + ".");
+            last_write = std::chrono::steady_clock::now();
+        }
+
+    public:
+        const std::string filename;
+        const double interval;
+
+        TracingCheckpoint(std::string filename, double interval) :
+            last_write(std::chrono::steady_clock::now()), filename(filename), interval(interval) {}
+
+        // Records the state (s, theta, zeta, vpar) of a particle at time t, and
+        // writes the file if interval seconds have passed since the last write.
+        template<std::size_t n>
+        void update(int64_t particle, double t, const array<double, n>& stzv, double dt) {
+            static_assert(n >= 4, "the state needs to start with (s, theta, zeta, vpar)");
+            std::lock_guard<std::mutex> lock(mutex);
+            states[particle] = {t, stzv[0], stzv[1], stzv[2], stzv[3], dt};
+            std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - last_write;
+            if (elapsed.count() >= interval)
+                write_locked();
+        }
+
+        // Forgets a particle once it has been traced to the end.
+        void finish(int64_t particle) {
+            std::lock_guard<std::mutex> lock(mutex);
+            states.erase(particle);
+        }
+
+        void write() {
+            std::lock_guard<std::mutex> lock(mutex);
+            write_locked();
+        }
+};
+
 template<class RHS>
-void stzvt_to_y(const array<double, RHS::Size>& stzvt, array<double, RHS::Size>& y, RHS rhs)
+void stzvt_to_y(const array<double, RHS::Size>& stzvt, array<double, RHS::Size>& y, const RHS& rhs)
 { 
     if (y.size() != 4 && y.size() != 5) {
         throw std::invalid_argument("y must have size 4 or 5.");
@@ -149,7 +344,7 @@ void stzvt_to_y(const array<double, RHS::Size>& stzvt, array<double, RHS::Size>&
 
 
 template<class RHS>
-void y_to_stzvt(const array<double, RHS::Size>& y, array<double, RHS::Size>& stzvt, RHS rhs)
+void y_to_stzvt(const array<double, RHS::Size>& y, array<double, RHS::Size>& stzvt, const RHS& rhs)
 {
     if (y.size() != 4 && y.size() != 5) {
         throw std::invalid_argument("y must have size 4 or 5.");
@@ -180,7 +375,7 @@ void y_to_stzvt(const array<double, RHS::Size>& y, array<double, RHS::Size>& stz
 }
 
 template<class RHS>
-void stzvtdot_to_ydot(const array<double, RHS::Size>& stzvtdot, const array<double, RHS::Size>& stzvt, array<double, RHS::Size>& ydot, RHS rhs)
+void stzvtdot_to_ydot(const array<double, RHS::Size>& stzvtdot, const array<double, RHS::Size>& stzvt, array<double, RHS::Size>& ydot, const RHS& rhs)
 {
     if (stzvtdot.size() != 4 && stzvtdot.size() != 5) {
         throw std::invalid_argument("stzvtdot must have size 4 or 5.");
@@ -214,31 +409,49 @@ void stzvtdot_to_ydot(const array<double, RHS::Size>& stzvtdot, const array<doub
     }
 }
 
-// Here, all time variables (tau_last, tau_current, dtau) are in normalized units, tau = t/tnorm
+// Workspace of check_stopping_criteria(), which the tracers create once per
+// trajectory and pass to every call. Apart from the scratch states, it keeps the
+// state at the end of the last step, which is the state at the start of the next
+// one, so that the dense output is only evaluated at one end of each step.
+template<class RHS>
+struct StoppingCriteriaWorkspace {
+    typename RHS::State y, stzvt, stzvt_last, stzvt_current;
+    double tau_current = std::numeric_limits<double>::quiet_NaN();
+};
+
+// Here, all time variables (tau_last, tau_current, dtau) are in normalized units, tau = t/tnorm.
+// This is called after every step, so nothing is copied or allocated unless a plane is hit.
 template<class RHS, class DENSE>
-bool check_stopping_criteria(RHS rhs, int iter, vector<array<double, RHS::Size+2>> &res_hits, DENSE dense, double tau_last, double tau_current, double dtau, 
-    double abstol, vector<double> thetas, vector<double> zetas, vector<double> omega_thetas, vector<double> omega_zetas, vector<shared_ptr<StoppingCriterion>> stopping_criteria, 
-    vector<double> vpars, bool thetas_stop, bool zetas_stop, bool vpars_stop)
+bool check_stopping_criteria(const RHS& rhs, int iter, vector<array<double, RHS::Size+2>> &res_hits, DENSE& dense, double tau_last, double tau_current, double dtau, 
+    double abstol, const vector<double>& thetas, const vector<double>& zetas, const vector<double>& omega_thetas, const vector<double>& omega_zetas,
+    const vector<shared_ptr<StoppingCriterion>>& stopping_criteria, const vector<double>& vpars, bool thetas_stop, bool zetas_stop, bool vpars_stop,
+    StoppingCriteriaWorkspace<RHS>& ws)
 {
     typedef typename RHS::State State;
     boost::math::tools::eps_tolerance<double> roottol(-int(std::log2(abstol)));
     uintmax_t rootmaxit = 200;
-    State y, stzvt, stzvt_current; 
+    State& y = ws.y;
+    State& stzvt = ws.stzvt;
+    State& stzvt_current = ws.stzvt_current;
 
     bool stop = false;
-    array<double, RHS::Size> ykeep = {};
 
     double dt = dtau * rhs.tnorm;
 
-    dense.calc_state(tau_last, y);
-    y_to_stzvt<RHS>(y, stzvt, rhs);
+    if (ws.tau_current == tau_last) {
+        ws.stzvt_last = stzvt_current;
+    } else {
+        dense.calc_state(tau_last, y);
+        y_to_stzvt<RHS>(y, ws.stzvt_last, rhs);
+    }
     double t_last = tau_last * rhs.tnorm;
-    double theta_last = stzvt[1];
-    double zeta_last = stzvt[2];
-    double vpar_last = stzvt[3];
+    double theta_last = ws.stzvt_last[1];
+    double zeta_last = ws.stzvt_last[2];
+    double vpar_last = ws.stzvt_last[3];
 
     dense.calc_state(tau_current, y);
     y_to_stzvt<RHS>(y, stzvt_current, rhs);
+    ws.tau_current = tau_current;
     double t_current = tau_current * rhs.tnorm;
     double s_current = stzvt_current[0];
     double theta_current = stzvt_current[1];
@@ -249,7 +462,7 @@ bool check_stopping_criteria(RHS rhs, int iter, vector<array<double, RHS::Size+2
     for (int i = 0; i < vpars.size(); ++i) {
         double vpar = vpars[i];
         if((vpar_last-vpar != 0) && (vpar_current-vpar != 0) && (((vpar_last-vpar > 0) ? 1 : ((vpar_last-vpar < 0) ? -1 : 0)) != ((vpar_current-vpar > 0) ? 1 : ((vpar_current-vpar < 0) ? -1 : 0)))){ // check whether vpar = vpars[i] was crossed
-            std::function<double(double)> rootfun = [&dense, &y, &vpar_last, &vpar, &stzvt, &rhs](double tau){
+            auto rootfun = [&dense, &y, &vpar, &stzvt, &rhs](double tau){
                 dense.calc_state(tau, y);
                 y_to_stzvt<RHS>(y, stzvt, rhs);
                 if (vpar == 0) {
@@ -284,7 +497,7 @@ bool check_stopping_criteria(RHS rhs, int iter, vector<array<double, RHS::Size+2
             double phase_shift = fak*2*M_PI + zeta;
             assert((phase_last <= phase_shift && phase_shift <= phase_current) || (phase_current <= phase_shift && phase_shift <= phase_last));
 
-            std::function<double(double)> rootfun = [&phase_shift, &zeta_last, &omega, &dense, &y, &rhs, &stzvt](double tau){
+            auto rootfun = [&phase_shift, &omega, &dense, &y, &rhs, &stzvt](double tau){
                 dense.calc_state(tau, y);
                 double t = tau * rhs.tnorm;
                 y_to_stzvt<RHS>(y, stzvt, rhs);
@@ -315,7 +528,7 @@ bool check_stopping_criteria(RHS rhs, int iter, vector<array<double, RHS::Size+2
             double phase_shift = fak*2*M_PI + theta;
             assert((phase_last <= phase_shift && phase_shift <= phase_current) || (phase_current <= phase_shift && phase_shift <= phase_last));
 
-            std::function<double(double)> rootfun = [&phase_shift, &theta_last, &omega, &dense, &y, &rhs, &stzvt](double tau){
+            auto rootfun = [&phase_shift, &omega, &dense, &y, &rhs, &stzvt](double tau){
                 dense.calc_state(tau, y);
                 double t = tau * rhs.tnorm;
                 y_to_stzvt<RHS>(y, stzvt, rhs);
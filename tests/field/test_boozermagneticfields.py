@@ -1,7 +1,13 @@
 from simsopt.field.boozermagneticfield import BoozerRadialInterpolant, InterpolatedBoozerField, BoozerAnalytic
-from simsoptpp import inverse_fourier_transform_odd, inverse_fourier_transform_even
+from simsopt.field.boozermagneticfield import BoozerMagneticField
+from simsopt.field.boozermagneticfield import _ModeSplines
+from simsoptpp import inverse_fourier_transform_odd, inverse_fourier_transform_even, inverse_fourier_transform_terms
 import numpy as np
 import unittest
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
 from pathlib import Path
 from scipy.io import netcdf_file
 from simsopt._core.util import align_and_pad, allocate_aligned_and_padded_array
@@ -27,6 +33,15 @@ try:
 except ImportError as e:
     comm = None
 
+class TestingBoozerMagneticField(unittest.TestCase):
+    def test_clone(self):
+        """
+        Check that fields implemented in Python do not provide evaluation contexts.
+        """
+        with self.assertRaises(RuntimeError):
+            BoozerMagneticField(0.8).clone()
+
+
 class TestingAnalytic(unittest.TestCase):
     def test_boozeranalytic(self):
         etabar = 1.1
@@ -119,8 +134,112 @@ class TestingAnalytic(unittest.TestCase):
         ba.set_K1(3.7)
         assert(ba.K1 == 3.7)
 
+    def test_boozeranalytic_modes(self):
+        """
+        Check the field with several symmetry-breaking modes against the
+        expressions in the documentation of BoozerAnalytic, including the
+        single-point path used for tracing and an evaluation context from clone().
+        """
+        etabar, B0, N, G0, psi0, iota0 = 1.1, 1.2, 2, 1.3, 0.8, 0.4
+        Bbar, I0, G1, I1, K1, iota1 = 1.5, 0.1, 0.2, 0.3, 0.4, 0.5
+        B0z = np.array([0.01, 0.02])
+        n = np.array([1, -2])
+        m = np.array([2, 3])
+        ba = BoozerAnalytic(etabar, B0, N, G0, psi0, iota0, Bbar=Bbar, I0=I0, G1=G1, I1=I1,
+                            K1=K1, iota1=iota1, B0z=B0z, n=n, m=m)
+        assert ba.field_type == ""
+
+        np.random.seed(0)
+        points = np.random.uniform(size=(20, 3))
+        points[:, 0] = 0.1 + 0.8*points[:, 0]
+        points[:, 1:] *= 2*np.pi
+        s, thetas, zetas = points[:, 0], points[:, 1], points[:, 2]
+        r = np.sqrt(2*s*psi0/Bbar)
+        angles = m[:, None]*thetas[None, :] - n[:, None]*N*zetas[None, :]
+        expected = {
+            'modB': B0*(1 + etabar*r*np.cos(thetas - N*zetas)) + np.sum(B0z[:, None]*np.cos(angles), axis=0),
+            'dmodBds': B0*etabar*0.5*r/s*np.cos(thetas - N*zetas),
+            'dmodBdtheta': -B0*etabar*r*np.sin(thetas - N*zetas) - np.sum((B0z*m)[:, None]*np.sin(angles), axis=0),
+            'dmodBdzeta': N*B0*etabar*r*np.sin(thetas - N*zetas) + np.sum((B0z*n*N)[:, None]*np.sin(angles), axis=0),
+            'G': G0 + G1*s,
+            'I': I0 + I1*s,
+            'iota': iota0 + iota1*s,
+            'psip': psi0*(s*iota0 + s**2*iota1/2),
+            'K': K1*r*np.sin(thetas - N*zetas),
+            'dKdtheta': K1*r*np.cos(thetas - N*zetas),
+            'dKdzeta': -N*K1*r*np.cos(thetas - N*zetas),
+        }
+
+        context = ba.clone()
+        for field in [ba, context]:
+            field.set_points(points)
+            for name, values in expected.items():
+                np.testing.assert_allclose(getattr(field, name)()[:, 0], values, rtol=1e-12)
+            np.testing.assert_allclose(field.modB_derivs()[:, 1], expected['dmodBdtheta'], rtol=1e-12)
+            np.testing.assert_allclose(field.K_derivs()[:, 1], expected['dKdzeta'], rtol=1e-12)
+            for i in range(points.shape[0]):
+                q = field.evaluate_tracing_quantities(*points[i, :], vacuum=False, noK=False)
+                for name in ['modB', 'dmodBds', 'dmodBdtheta', 'dmodBdzeta', 'G', 'I', 'iota', 'K', 'dKdtheta', 'dKdzeta']:
+                    np.testing.assert_allclose(getattr(q, name), expected[name][i], rtol=1e-12)
+                assert q.dGds == G1 and q.dIds == I1
+
+        # Changing a parameter does not affect the evaluation context
+        ba.set_B0z([0.0, 0.0])
+        context.set_points(points)
+        np.testing.assert_allclose(context.modB()[:, 0], expected['modB'], rtol=1e-12)
+        ba.set_K1(0.)
+        assert ba.field_type == "nok"
+        with self.assertRaises(ValueError):
+            ba.set_B0z([0.1])
+
 
 class TestingFiniteBeta(unittest.TestCase):
+    def test_booz_cache(self):
+        """
+        Check that the booz_xform transformation of a wout file is stored in the
+        cache directory once and reused, and gives the same field.
+        """
+        points = np.array([[0.3, 0.2, 0.1], [0.6, 1.5, 0.7], [0.9, 4.0, 2.0]])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            modB = []
+            for mpol in [8, 8, 6]:
+                bri = BoozerRadialInterpolant(filename_mhd_wout, 3, mpol=mpol, ntor=6, no_K=True,
+                                              write_boozmn=False, booz_cache_dir=tmpdir)
+                bri.set_points(points)
+                modB.append(bri.modB())
+            files = sorted(os.listdir(tmpdir))
+            assert len(files) == 2
+            assert all(f.startswith("boozmn_") and f.endswith(".nc") for f in files)
+            np.testing.assert_allclose(modB[1], modB[0], rtol=1e-14, atol=1e-14)
+
+    def test_K_cache(self):
+        """
+        Check that the harmonics of K are written next to the boozmn file and
+        reused without computing them again, and that they agree with the ones
+        computed without the cache.
+        """
+        points = np.array([[0.3, 0.2, 0.1], [0.6, 1.5, 0.7], [0.9, 4.0, 2.0]])
+        for filename in [filename_mhd, filename_mhd_lasym]:
+            bri = BoozerRadialInterpolant(filename, 3, mpol=5, ntor=5)
+            bri.set_points(points)
+            K = bri.K_derivs()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                booz_path = os.path.join(tmpdir, os.path.basename(filename))
+                shutil.copy(filename, booz_path)
+                K_path = os.path.splitext(booz_path)[0] + "_K.npz"
+                for i in range(2):
+                    with patch.object(BoozerRadialInterpolant, "_compute_kmns_kmnc", autospec=True,
+                                      side_effect=BoozerRadialInterpolant._compute_kmns_kmnc) as compute:
+                        bri = BoozerRadialInterpolant(booz_path, 3, mpol=5, ntor=5, K_cache=True)
+                    assert compute.call_count == (1 if i == 0 else 0)
+                    assert os.path.exists(K_path)
+                    if i == 0:
+                        mtime = os.stat(K_path).st_mtime_ns
+                    else:
+                        assert os.stat(K_path).st_mtime_ns == mtime
+                    bri.set_points(points)
+                    np.testing.assert_allclose(bri.K_derivs(), K, rtol=1e-13, atol=1e-13)
+
     def test_boozerradialinterpolant_finite_beta(self):
         """
         This first loop tests a finite-beta equilibria
@@ -474,6 +593,38 @@ class TestingFiniteBeta(unittest.TestCase):
                 assert np.allclose(bri.modB_derivs()[:, 1], bri.dmodBdtheta()[:, 0])
                 assert np.allclose(bri.modB_derivs()[:, 2], bri.dmodBdzeta()[:, 0])
 
+    @unittest.skipIf(comm is None, "mpi4py not found")
+    def test_bcast_state(self):
+        """
+        Check that the splines broadcast from rank 0 in one buffer agree with the
+        ones computed without a communicator.
+        """
+        for filename in [filename_mhd, filename_mhd_lasym]:
+            bri = BoozerRadialInterpolant(filename, 3, mpol=5, ntor=5)
+            bri_comm = BoozerRadialInterpolant(filename, 3, mpol=5, ntor=5, comm=comm)
+            assert bri_comm.nfp == bri.nfp and bri_comm.asym == bri.asym and bri_comm.psi0 == bri.psi0
+            np.testing.assert_array_equal(bri_comm.xm_b, bri.xm_b)
+            np.testing.assert_array_equal(bri_comm.s_half_ext, bri.s_half_ext)
+            s = np.linspace(0.05, 0.95, 7)
+            for name in ["psip_spline", "G_spline", "iota_spline", "diotads_spline"]:
+                np.testing.assert_allclose(getattr(bri_comm, name)(s), getattr(bri, name)(s), rtol=1e-14, atol=1e-14)
+            for name in ["bmnc_splines", "rmnc_splines", "numns_splines", "kmns_splines", "mn_factor_splines"]:
+                np.testing.assert_allclose(getattr(bri_comm, name)(s), getattr(bri, name)(s), rtol=1e-13, atol=1e-13)
+            if bri.asym:
+                np.testing.assert_allclose(bri_comm.kmnc_splines(s), bri.kmnc_splines(s), rtol=1e-13, atol=1e-13)
+
+            # The broadcast harmonics of K, including kmnc, give the same field
+            np.random.seed(7)
+            points = np.random.uniform(size=(10, 3))
+            points[:, 1:] *= 2*np.pi
+            quantities = ["K", "dKdtheta", "dKdzeta", "modB", "R"]
+            bri.set_points(points)
+            bri_comm.set_points(points)
+            expected = bri.evaluate(quantities)
+            values = bri_comm.evaluate(quantities)
+            for quantity in quantities:
+                np.testing.assert_allclose(values[quantity], expected[quantity], rtol=1e-12, atol=1e-12)
+
     def test_interpolatedboozerfield_sym(self):
         """
         Here we perform 3D interpolation on a random set of points. Compare
@@ -824,6 +975,302 @@ class TestingFiniteBeta(unittest.TestCase):
             old_err_K = err_K
 
 
+    def test_interpolatedboozerfield_clone(self):
+        """
+        Check that an evaluation context obtained from clone() reproduces the
+        values of the original field, and that setting its points does not
+        change the points of the original field.
+        """
+        ba = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        bsh = InterpolatedBoozerField(ba, 3, [0, 1, 8], [0, 2*np.pi, 8], [0, 2*np.pi, 8],
+                                      True, nfp=1, stellsym=False)
+
+        np.random.seed(3)
+        points = np.random.uniform(size=(10, 3))
+        points[:, 1:] *= 2*np.pi
+        bsh.set_points(points)
+        modB = bsh.modB()
+        modB_derivs = bsh.modB_derivs()
+        G = bsh.G()
+
+        context = bsh.clone()
+        context.set_points(np.ascontiguousarray(points[::-1, :]))
+        np.testing.assert_allclose(context.modB(), modB[::-1, :])
+        np.testing.assert_allclose(context.modB_derivs(), modB_derivs[::-1, :])
+        np.testing.assert_allclose(context.G(), G[::-1, :])
+        np.testing.assert_allclose(bsh.get_points(), points)
+        np.testing.assert_allclose(bsh.modB(), modB)
+
+        # The analytic field provides its own evaluation contexts
+        ba.set_points(points)
+        ba_context = ba.clone()
+        ba_context.set_points(np.ascontiguousarray(points[::-1, :]))
+        np.testing.assert_allclose(ba_context.modB(), ba.modB()[::-1, :])
+        np.testing.assert_allclose(ba.get_points(), points)
+
+
+    def test_interpolatedboozerfield_save_load(self):
+        """
+        Check that interpolation tables saved to a file reproduce the original
+        field when loaded, with and without memory mapping, and that they are
+        rejected by a field with a different grid.
+        """
+        ba = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        grid = ([0, 1, 8], [0, 2*np.pi, 8], [0, 2*np.pi, 8])
+        bsh = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False)
+
+        np.random.seed(5)
+        points = np.random.uniform(size=(10, 3))
+        points[:, 1:] *= 2*np.pi
+        bsh.set_points(points)
+        expected = [bsh.modB(), bsh.modB_derivs(), bsh.G(), bsh.iota(), bsh.psip()]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tables.bin")
+            bsh.save(path)
+            for mmap in [True, False]:
+                loaded = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False, initialize=["R"])
+                loaded.load(path, mmap=mmap)
+                assert loaded.status_modB and loaded.status_modB_derivs and loaded.status_G
+                loaded.set_points(points)
+                for value, expected_value in zip([loaded.modB(), loaded.modB_derivs(), loaded.G(),
+                                                  loaded.iota(), loaded.psip()], expected):
+                    np.testing.assert_allclose(value, expected_value, rtol=0, atol=0)
+                del loaded
+
+            # The file is used by the constructor if the tables match, and written otherwise
+            cached = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False, tables_path=path)
+            cached.set_points(points)
+            np.testing.assert_allclose(cached.modB(), expected[0], rtol=0, atol=0)
+            new_path = os.path.join(tmpdir, "new_tables.bin")
+            InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False, tables_path=new_path)
+            assert os.path.exists(new_path)
+
+            other = InterpolatedBoozerField(ba, 3, [0, 1, 4], grid[1], grid[2], True, nfp=1, stellsym=False,
+                                            initialize=["R"])
+            with self.assertRaises(ValueError):
+                other.load(path)
+
+    def test_interpolatedboozerfield_cache_key(self):
+        """
+        Check that the cache key depends on all the data of the underlying field,
+        including quantities that the tables of modB do not depend on.
+        """
+        grid = ([0, 1, 4], [0, 2*np.pi, 4], [0, 2*np.pi, 4])
+
+        def key(field):
+            return InterpolatedBoozerField(field, 1, *grid, True, nfp=1, stellsym=False,
+                                           initialize=["R"]).cache_key()
+
+        ba = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0, I0=0.1, K1=0.3)
+        assert key(ba) == key(BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0, I0=0.1, K1=0.3))
+        assert key(ba) != key(BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0, I0=0.1, K1=0.5))
+
+        bri = BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, comm=comm)
+        assert key(bri) == key(BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, comm=comm))
+        assert key(bri) != key(BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, no_K=True, comm=comm))
+        assert key(bri) != key(BoozerRadialInterpolant(filename_mhd_lasym, 3, mpol=5, ntor=5, comm=comm))
+        # Only the radial interpolation of R, Z and nu differs
+        other = BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, comm=comm)
+        other.rmnc_splines = _ModeSplines(None, other.rmnc_splines.knots, 1.01*other.rmnc_splines.coefs,
+                                          other.rmnc_splines.degree)
+        assert key(bri) != key(other)
+
+    @unittest.skipIf(comm is None, "mpi4py not found")
+    def test_interpolatedboozerfield_shared_memory(self):
+        """
+        Check that tables placed in MPI shared memory reproduce the field with
+        private tables.
+        """
+        ba = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        grid = ([0, 1, 8], [0, 2*np.pi, 8], [0, 2*np.pi, 8])
+        bsh = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False)
+        bsh_shared = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False,
+                                             shared_memory_comm=comm)
+        assert bsh_shared.status_modB and bsh_shared.status_modB_derivs and bsh_shared.status_G
+
+        np.random.seed(6)
+        points = np.random.uniform(size=(10, 3))
+        points[:, 1:] *= 2*np.pi
+        for field in [bsh, bsh_shared]:
+            field.set_points(points)
+        np.testing.assert_allclose(bsh_shared.modB(), bsh.modB(), rtol=0, atol=0)
+        np.testing.assert_allclose(bsh_shared.modB_derivs(), bsh.modB_derivs(), rtol=0, atol=0)
+        np.testing.assert_allclose(bsh_shared.G(), bsh.G(), rtol=0, atol=0)
+        np.testing.assert_allclose(bsh_shared.iota(), bsh.iota(), rtol=0, atol=0)
+
+        # After the shared memory is freed, the field uses private copies
+        bsh_shared.close()
+        bsh_shared.set_points(points)
+        np.testing.assert_allclose(bsh_shared.modB(), bsh.modB(), rtol=0, atol=0)
+        np.testing.assert_allclose(bsh_shared.G(), bsh.G(), rtol=0, atol=0)
+
+        # The tables are only loaded if all ranks of the node can load them
+        tmpdir = tempfile.mkdtemp() if comm.rank == 0 else None
+        tmpdir = comm.bcast(tmpdir, root=0)
+        try:
+            path = os.path.join(tmpdir, "tables.bin")
+            if comm.rank == 0:
+                bsh.save(path)
+            comm.Barrier()
+            tables_path = path if comm.rank == 0 else os.path.join(tmpdir, f"missing_{comm.rank}.bin")
+            bsh_shared = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False,
+                                                 shared_memory_comm=comm, tables_path=tables_path)
+            bsh_shared.set_points(points)
+            np.testing.assert_allclose(bsh_shared.modB(), bsh.modB(), rtol=0, atol=0)
+            bsh_shared.close()
+            comm.Barrier()
+        finally:
+            if comm.rank == 0:
+                shutil.rmtree(tmpdir)
+
+        # The ranks of the node build different tables of a field that splits its
+        # Fourier modes over the same communicator, also with more ranks than tables.
+        bri = BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, comm=comm)
+        nfp = bri.nfp
+        grid = ([0.1, 0.9, 6], [0, np.pi, 6], [0, 2*np.pi/nfp, 6])
+        for initialize in [["modB", "modB_derivs", "K", "K_derivs", "G"], ["modB"]]:
+            bsh = InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True, initialize=initialize)
+            bsh_shared = InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True,
+                                                 initialize=initialize, shared_memory_comm=comm)
+            assert bri.comm is comm
+            for name in initialize:
+                if name == "G":
+                    continue
+                np.testing.assert_allclose(bsh_shared.get_interpolant(name).get_local_vals(),
+                                           bsh.get_interpolant(name).get_local_vals(), rtol=1e-13, atol=1e-13)
+            bsh.set_points(points)
+            bsh_shared.set_points(points)
+            np.testing.assert_allclose(bsh_shared.G(), bsh.G(), rtol=1e-13, atol=1e-13)
+
+    @unittest.skipIf(comm is None, "mpi4py not found")
+    def test_interpolatedboozerfield_comm(self):
+        """
+        Check that tables built together by the ranks of a communicator are the
+        same as tables built on a single rank, also when the underlying field
+        splits its Fourier modes over the same communicator.
+        """
+        bri = BoozerRadialInterpolant(filename_mhd, 3, mpol=5, ntor=5, comm=comm)
+        nfp = bri.nfp
+        grid = ([0.1, 0.9, 6], [0, np.pi, 6], [0, 2*np.pi/nfp, 6])
+        bsh = InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True)
+        bsh_comm = InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True,
+                                           comm=comm)
+        assert bri.comm is comm
+        assert bsh_comm.status_modB and bsh_comm.status_K_derivs and bsh_comm.status_G
+        for name in ["modB", "modB_derivs", "K", "K_derivs"]:
+            np.testing.assert_allclose(bsh_comm.get_interpolant(name).get_local_vals(),
+                                       bsh.get_interpolant(name).get_local_vals(),
+                                       rtol=1e-12, atol=1e-12)
+
+        # The tables are saved by rank 0 alone, also if the cache key has to be
+        # computed from the values of the field, and loaded by all ranks.
+        bri.content_hash = lambda: None
+        tmpdir = tempfile.mkdtemp() if comm.rank == 0 else None
+        tmpdir = comm.bcast(tmpdir, root=0)
+        try:
+            path = os.path.join(tmpdir, "tables.bin")
+            InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True, comm=comm,
+                                    tables_path=path)
+            comm.Barrier()
+            assert os.path.exists(path)
+            if comm.rank == 0:
+                assert bsh_comm.cache_key() == bsh.cache_key()
+            loaded = InterpolatedBoozerField(bri, 3, *grid, True, nfp=nfp, stellsym=True, comm=comm,
+                                             initialize=["R"], tables_path=path)
+            for name in ["modB", "modB_derivs", "K", "K_derivs"]:
+                np.testing.assert_allclose(loaded.get_interpolant(name).get_local_vals(),
+                                           bsh.get_interpolant(name).get_local_vals(),
+                                           rtol=1e-12, atol=1e-12)
+            del loaded
+            comm.Barrier()
+        finally:
+            if comm.rank == 0:
+                shutil.rmtree(tmpdir)
+
+    def test_initialize_tracing(self):
+        """
+        Check that the interpolant of the packed tracing quantities can be built
+        when the field is created, serially, together over a communicator and in
+        shared memory, and that it agrees with the one that is built at the start of
+        tracing if packing is enabled later.
+        """
+        ba = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0, I0=0.1, G1=0.2, I1=0.3, K1=0.4)
+        grid = ([0, 1, 6], [0, 2*np.pi, 6], [0, 2*np.pi, 6])
+        bsh_lazy = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False)
+        assert bsh_lazy.get_interpolant("tracing") is None
+        bsh_lazy.pack_tracing_quantities = True
+        point = [0.4, 1.3, 2.1]
+        expected = bsh_lazy.evaluate_tracing_quantities(*point, vacuum=False, noK=False)
+
+        for kwargs in [{}, {"comm": comm}, {"shared_memory_comm": comm}, {"initialize": []}]:
+            if ("comm" in kwargs or "shared_memory_comm" in kwargs) and comm is None:
+                continue
+            if "initialize" not in kwargs:
+                kwargs["initialize"] = ["tracing", "psip", "G", "I", "iota", "dGds", "dIds"]
+            # With packing, the packed interpolant is also built by default
+            bsh = InterpolatedBoozerField(ba, 3, *grid, True, nfp=1, stellsym=False,
+                                          pack_tracing_quantities=True, **kwargs)
+            interp = bsh.get_interpolant("tracing")
+            assert interp is not None and interp.value_size == 7
+            np.testing.assert_allclose(interp.get_local_vals(), bsh_lazy.get_interpolant("tracing").get_local_vals(),
+                                       rtol=0, atol=0)
+            q = bsh.evaluate_tracing_quantities(*point, vacuum=False, noK=False)
+            for name in ["modB", "dmodBds", "dmodBdtheta", "dmodBdzeta", "G", "I", "iota", "K", "dKdtheta", "dKdzeta"]:
+                assert getattr(q, name) == getattr(expected, name)
+
+    def test_evaluate_tracing_quantities(self):
+        """
+        Check that evaluate_tracing_quantities agrees with the individual
+        accessors, both for the default implementation (BoozerRadialInterpolant)
+        and for the single-point path of InterpolatedBoozerField, with and
+        without packing the quantities into a single interpolant, including
+        points where stellarator symmetry is exploited.
+        """
+        order = 3
+        bri = BoozerRadialInterpolant(filename_mhd, order, mpol=10, ntor=10, comm=comm)
+        nfp = bri.nfp
+        bsh = InterpolatedBoozerField(
+            bri, 3, [0.1, 0.9, 8], [0, np.pi, 8], [0, 2*np.pi/nfp, 8],
+            True, nfp=nfp, stellsym=True)
+        bsh_packed = InterpolatedBoozerField(
+            bri, 3, [0.1, 0.9, 8], [0, np.pi, 8], [0, 2*np.pi/nfp, 8],
+            True, nfp=nfp, stellsym=True, pack_tracing_quantities=True)
+        assert bsh_packed.pack_tracing_quantities
+        assert not bsh_packed.status_modB and not bsh_packed.status_K
+
+        np.random.seed(4)
+        points = np.random.uniform(size=(5, 3))
+        points[:, 0] = 0.2 + 0.6*points[:, 0]
+        points[:, 1] = -2*np.pi + 6*np.pi*points[:, 1]
+        points[:, 2] = -2*np.pi + 6*np.pi*points[:, 2]
+
+        for field in [bri, bsh, bsh_packed]:
+            field.set_points(points)
+            expected = {
+                'modB': field.modB()[:, 0],
+                'dmodBds': field.modB_derivs()[:, 0],
+                'dmodBdtheta': field.modB_derivs()[:, 1],
+                'dmodBdzeta': field.modB_derivs()[:, 2],
+                'G': field.G()[:, 0],
+                'iota': field.iota()[:, 0],
+                'I': field.I()[:, 0],
+                'dGds': field.dGds()[:, 0],
+                'dIds': field.dIds()[:, 0],
+                'K': field.K()[:, 0],
+                'dKdtheta': field.K_derivs()[:, 0],
+                'dKdzeta': field.K_derivs()[:, 1],
+            }
+            for i in range(points.shape[0]):
+                q = field.evaluate_tracing_quantities(*points[i, :], vacuum=False, noK=False)
+                for name, values in expected.items():
+                    np.testing.assert_allclose(getattr(q, name), values[i], rtol=1e-10, atol=1e-12)
+                # Quantities that are not needed in vacuum mode are not evaluated
+                q = field.evaluate_tracing_quantities(*points[i, :], vacuum=True, noK=False)
+                np.testing.assert_allclose(q.modB, expected['modB'][i], rtol=1e-12)
+                assert q.I == 0 and q.K == 0
+
+
 class TestingInverseFourier(unittest.TestCase):
     def test_inverse_fourier(self):
         thetas = np.linspace(0,2*np.pi, 131)
@@ -895,5 +1342,162 @@ class TestingInverseFourier(unittest.TestCase):
                     assert np.allclose(even_K[i], even_output[0], rtol=1e-12, atol=1e-11)
                     assert np.allclose(odd_K[i], odd_output[0], rtol=1e-12, atol=1e-11)
 
+    def test_inverse_fourier_terms(self):
+        """
+        Check that several inverse Fourier transforms with shared sin and cos tables
+        agree with numpy, for coefficients given at a few radii.
+        """
+        np.random.seed(1)
+        num_points = 301
+        thetas = np.random.uniform(0, 2*np.pi, num_points)
+        zetas = np.random.uniform(0, 2*np.pi, num_points)
+        s_idx = np.random.randint(0, 4, num_points).astype(np.int64)
+        mpol, ntor, nfp = 7, 5, 3
+        xm = np.repeat(np.array(range(mpol)), ntor*2+1)[ntor:]
+        xn = np.tile(np.array(range(-ntor*nfp, ntor*nfp+1, nfp)), mpol)[ntor:]
+        coefs = np.random.uniform(-1, 1, (3, 4, len(xm)))
+        odd = [0, 1, 1]
+        outputs = [0, 0, 1]
+        angles = np.outer(thetas, xm) - np.outer(zetas, xn)
+        expected = np.zeros((2, num_points))
+        for it in range(3):
+            trig = np.sin(angles) if odd[it] else np.cos(angles)
+            expected[outputs[it]] += np.sum(coefs[it, s_idx, :] * trig, axis=1)
+
+        xm = xm.astype(np.float64)
+        xn = xn.astype(np.float64)
+        output = np.zeros((2, num_points))
+        inverse_fourier_transform_terms(output, coefs, odd, outputs, xm, xn, thetas, zetas, s_idx, nfp)
+        np.testing.assert_allclose(output, expected, rtol=1e-12, atol=1e-11)
+
+        with self.assertRaises(ValueError):
+            inverse_fourier_transform_terms(output, coefs, odd, [0, 0, 2], xm, xn, thetas, zetas, s_idx, nfp)
+        with self.assertRaises(ValueError):
+            inverse_fourier_transform_terms(output, coefs, odd, outputs, xm, xn + 1, thetas, zetas, s_idx, nfp)
+
+
+class TestingFusedEvaluation(unittest.TestCase):
+    def test_evaluate(self):
+        """
+        Check that evaluating several quantities in one pass agrees with the
+        Fourier series evaluated in numpy, and with finite differences for the
+        derivatives, also for a stellarator asymmetric field.
+        """
+        np.random.seed(2)
+        npoints = 20
+        s = np.random.uniform(0.2, 0.8, npoints)
+        s[5:10] = s[0]
+        thetas = np.random.uniform(0, 2*np.pi, npoints)
+        zetas = np.random.uniform(0, 2*np.pi, npoints)
+        points = np.ascontiguousarray(np.stack([s, thetas, zetas], axis=1))
+        for filename in [filename_mhd, filename_mhd_lasym]:
+            bri = BoozerRadialInterpolant(filename, 3, mpol=5, ntor=5, comm=comm)
+            bri.set_points(points)
+            names = ["modB", "dmodBdtheta", "dmodBdzeta", "dmodBds", "R", "dRdtheta", "dZds", "nu", "K", "dKdzeta"]
+            values = bri.evaluate(names)
+
+            angles = np.outer(bri.xm_b, thetas) - np.outer(bri.xn_b, zetas)
+            mn_factor = bri.mn_factor_splines(s)
+            d_mn_factor = bri.d_mn_factor_splines(s)
+            xm = bri.xm_b[:, None]
+            xn = bri.xn_b[:, None]
+            harmonics = {"modB": ["bmnc", "bmns"], "R": ["rmnc", "rmns"], "Z": ["zmns", "zmnc"],
+                         "nu": ["numns", "numnc"], "K": ["kmns", "kmnc"]}
+
+            def series(family, deriv):
+                # The Fourier series of the quantity summed in numpy from the radial
+                # splines, independently of the fused evaluation.
+                total = np.zeros(npoints)
+                for harmonic in harmonics[family][:2 if bri.asym else 1]:
+                    coefs = getattr(bri, harmonic + "_splines")(s) / mn_factor
+                    if deriv == "s":
+                        coefs = (getattr(bri, "d" + harmonic + "ds_splines")(s) - coefs * d_mn_factor) / mn_factor
+                    if harmonic.endswith("s"):
+                        basis, dbasis = np.sin(angles), np.cos(angles)
+                    else:
+                        basis, dbasis = np.cos(angles), -np.sin(angles)
+                    if deriv == "theta":
+                        total += np.sum(xm * coefs * dbasis, axis=0)
+                    elif deriv == "zeta":
+                        total -= np.sum(xn * coefs * dbasis, axis=0)
+                    else:
+                        total += np.sum(coefs * basis, axis=0)
+                return total
+
+            expected = {
+                "modB": series("modB", None), "dmodBdtheta": series("modB", "theta"),
+                "dmodBdzeta": series("modB", "zeta"), "dmodBds": series("modB", "s"),
+                "R": series("R", None), "dRdtheta": series("R", "theta"), "dZds": series("Z", "s"),
+                "nu": series("nu", None), "K": series("K", None), "dKdzeta": series("K", "zeta"),
+            }
+            for name in names:
+                atol = 1e-12 * np.max(np.abs(expected[name]))
+                np.testing.assert_allclose(values[name], expected[name], rtol=1e-12, atol=atol)
+                np.testing.assert_allclose(getattr(bri, name)()[:, 0], expected[name], rtol=1e-12, atol=atol)
+
+            # The radial derivatives are given by separate splines, which are fitted
+            # to finite differences unless rescale=True, so only the angular
+            # derivatives are compared with finite differences.
+            eps = 1e-6
+            for idx, suffix in [(1, "dtheta"), (2, "dzeta")]:
+                for name in ["modB", "R", "Z", "nu"]:
+                    dpoints = points.copy()
+                    dpoints[:, idx] += eps
+                    bri.set_points(dpoints)
+                    plus = bri.evaluate([name])[name]
+                    dpoints[:, idx] -= 2 * eps
+                    bri.set_points(dpoints)
+                    minus = bri.evaluate([name])[name]
+                    bri.set_points(points)
+                    deriv = bri.evaluate(["d" + name + suffix])["d" + name + suffix]
+                    np.testing.assert_allclose(deriv, (plus - minus) / (2 * eps), rtol=1e-5, atol=1e-5)
+
+            with self.assertRaises(ValueError):
+                bri.evaluate(["psip"])
+
+    def test_evaluate_grid(self):
+        """
+        Check that evaluating on a tensor grid with FFTs agrees with the evaluation
+        at scattered points, also for grids that do not resolve all modes.
+        """
+        s = np.array([0.25, 0.5, 0.75])
+        names = ["modB", "dmodBdtheta", "dmodBds", "R", "dZdzeta", "nu", "K"]
+        for filename in [filename_mhd, filename_mhd_lasym]:
+            bri = BoozerRadialInterpolant(filename, 3, mpol=5, ntor=5, comm=comm)
+            for ntheta, nzeta in [(16, 12), (5, 3)]:
+                values = bri.evaluate_grid(names, s, ntheta, nzeta)
+                thetas = np.linspace(0, 2 * np.pi, ntheta, endpoint=False)
+                zetas = np.linspace(0, 2 * np.pi / bri.nfp, nzeta, endpoint=False)
+                ss, tt, zz = np.meshgrid(s, thetas, zetas, indexing="ij")
+                bri.set_points(np.ascontiguousarray(np.stack([ss.ravel(), tt.ravel(), zz.ravel()], axis=1)))
+                expected = bri.evaluate(names)
+                for name in names:
+                    assert values[name].shape == (len(s), ntheta, nzeta)
+                    np.testing.assert_allclose(values[name].ravel(), expected[name], rtol=1e-10, atol=1e-10)
+
+
+class TestingModeSplines(unittest.TestCase):
+    def test_mode_splines(self):
+        """
+        Check that evaluating the splines of all modes together agrees with scipy,
+        including their derivatives and extrapolation beyond the knots.
+        """
+        np.random.seed(0)
+        x = np.linspace(0.05, 0.95, 12)
+        s = np.concatenate((np.random.uniform(-0.1, 1.1, 50), x, [0.05, 0.95]))
+        for order in range(1, 6):
+            splines = [InterpolatedUnivariateSpline(x, np.random.uniform(-1, 1, len(x)), k=order)
+                       for _ in range(7)]
+            for family in [splines, [spline.derivative() for spline in splines]]:
+                mode_splines = _ModeSplines(family)
+                assert len(mode_splines) == 7
+                expected = np.array([spline(s) for spline in family])
+                np.testing.assert_allclose(mode_splines(s), expected, rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(mode_splines[2:5](s), expected[2:5], rtol=1e-12, atol=1e-12)
+                np.testing.assert_allclose(mode_splines[3](s), expected[3], rtol=1e-12, atol=1e-12)
+        with self.assertRaises(ValueError):
+            _ModeSplines([InterpolatedUnivariateSpline(x, x, k=3), InterpolatedUnivariateSpline(x, x, k=2)])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -63,6 +63,87 @@ class Testing(unittest.TestCase):
                 with self.subTest(dim=dim, degree=degree):
                     self.subtest_regular_grid_interpolant_exact(dim, degree)
 
+    def test_regular_grid_interpolant_1d_exact(self):
+        """
+        Check that the 1D interpolant reproduces vector valued polynomials of
+        its degree exactly, and only uses the first column of the points.
+        """
+        np.random.seed(0)
+        xran = (0.1, 1.0, 12)
+        for dim in [1, 3, 7]:
+            for degree in [1, 2, 3, 4]:
+                with self.subTest(dim=dim, degree=degree):
+                    coeffs = np.random.standard_normal(size=(degree+1, dim))
+
+                    def fun(x, flatten=True):
+                        x = np.asarray(x)
+                        res = sum([coeffs[i, :] * x[:, None]**i for i in range(degree+1)])
+                        return np.ascontiguousarray(res).flatten() if flatten else res
+
+                    rule = sopp.UniformInterpolationRule(degree)
+                    interpolant = sopp.RegularGridInterpolant1D(rule, xran, dim, True)
+                    interpolant.interpolate_batch(fun)
+
+                    nsamples = 100
+                    xyz = np.random.uniform(low=xran[0], high=xran[1], size=(nsamples, 3))
+                    fhx = np.zeros((nsamples, dim))
+                    interpolant.evaluate_batch(xyz, fhx)
+                    assert np.allclose(fun(xyz[:, 0], flatten=False), fhx, atol=1e-12, rtol=1e-12)
+                    assert np.allclose(interpolant.evaluate(xyz[0, 0]), fhx[0, :], atol=1e-14, rtol=1e-14)
+
+    def test_specialized_kernels(self):
+        """
+        Check that the kernels specialized for degrees 1 to 5 agree with the
+        kernel for arbitrary degree.
+        """
+        np.random.seed(0)
+        xran = (1.0, 4.0, 8)
+        yran = (1.1, 3.9, 6)
+        zran = (1.2, 3.8, 7)
+        nsamples = 100
+        xyz = np.asarray([np.random.uniform(low=ran[0], high=ran[1], size=(nsamples, ))
+                          for ran in [xran, yran, zran]]).T.copy()
+        for dim in [1, 4, 7]:
+            for degree in [1, 2, 3, 4, 5]:
+                with self.subTest(dim=dim, degree=degree):
+                    fun = get_random_polynomial(dim, degree+1)
+                    rule = sopp.ChebyshevInterpolationRule(degree)
+                    interpolant = sopp.RegularGridInterpolant3D(rule, xran, yran, zran, dim, True)
+                    interpolant.interpolate_batch(fun)
+                    assert interpolant.specialized_kernels
+                    fh_specialized = np.zeros((nsamples, dim))
+                    interpolant.evaluate_batch(xyz, fh_specialized)
+                    interpolant.specialized_kernels = False
+                    fh_generic = np.zeros((nsamples, dim))
+                    interpolant.evaluate_batch(xyz, fh_generic)
+                    assert np.allclose(fh_specialized, fh_generic, atol=1e-12, rtol=1e-12)
+
+    def test_evaluate_dofs_in_parts(self):
+        """
+        Check that building the interpolant from the function values at the dofs,
+        evaluated in several parts, gives the same interpolant as interpolate_batch.
+        """
+        np.random.seed(0)
+        xran = (1.0, 4.0, 8)
+        yran = (1.1, 3.9, 6)
+        zran = (1.2, 3.8, 7)
+        fun = get_random_polynomial(3, 4)
+        rule = sopp.UniformInterpolationRule(3)
+        interpolant = sopp.RegularGridInterpolant3D(rule, xran, yran, zran, 3, True)
+        interpolant.interpolate_batch(fun)
+        interpolant_parts = sopp.RegularGridInterpolant3D(rule, xran, yran, zran, 3, True)
+        n = interpolant_parts.dof_count
+        bounds = [0, n//3, n//3, 2*n//3, n]
+        vals = np.concatenate([interpolant_parts.evaluate_dofs(fun, first, last)
+                               for first, last in zip(bounds[:-1], bounds[1:])])
+        assert vals.size == 3*n
+        interpolant_parts.set_dof_values(vals)
+        assert np.array_equal(interpolant_parts.get_local_vals(), interpolant.get_local_vals())
+        with assert_raises(ValueError):
+            interpolant_parts.set_dof_values(vals[:-1])
+        with assert_raises(ValueError):
+            interpolant_parts.evaluate_dofs(fun, 0, n+1)
+
     def test_out_of_bounds(self):
         """
         Check that the interpolant behaves correctly when evaluated outside of
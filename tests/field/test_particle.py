@@ -1,17 +1,49 @@
+import simsoptpp as sopp
 from simsopt.util.constants import PROTON_MASS, ELEMENTARY_CHARGE, ONE_EV
 from simsopt.field.boozermagneticfield import BoozerAnalytic, BoozerRadialInterpolant, InterpolatedBoozerField
 from simsopt.field.tracing import \
     trace_particles_boozer, \
     MinToroidalFluxStoppingCriterion, MaxToroidalFluxStoppingCriterion, ToroidalTransitStoppingCriterion, \
-    compute_poloidal_transits, compute_toroidal_transits, compute_resonances
+    compute_poloidal_transits, compute_toroidal_transits, compute_resonances, \
+    RaggedArray, TracingResult, load_trajectories
+from simsopt.field.trajectory_helpers import compute_loss_fraction
+from simsopt._core.util import parallel_loop_chunks, gather_rows
 import numpy as np
 import unittest
 import logging
+import os
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 from booz_xform import Booz_xform
 
 logging.basicConfig()
 
+try:
+    from mpi4py import MPI
+    comm = MPI.COMM_WORLD
+except ImportError as e:
+    comm = None
+
+
+@contextmanager
+def shared_temporary_directory(comm):
+    """
+    A temporary directory that is created by rank 0 of ``comm`` and removed by it
+    once all ranks are done with it.
+    """
+    tmp = tempfile.TemporaryDirectory() if comm is None or comm.rank == 0 else None
+    tmpdir = None if tmp is None else tmp.name
+    if comm is not None:
+        tmpdir = comm.bcast(tmpdir, root=0)
+    try:
+        yield tmpdir
+    finally:
+        if comm is not None:
+            comm.Barrier()
+        if tmp is not None:
+            tmp.cleanup()
+
 
 class BoozerGuidingCenterTracingTesting(unittest.TestCase):
 
@@ -62,9 +94,11 @@ class BoozerGuidingCenterTracingTesting(unittest.TestCase):
                 field = InterpolatedBoozerField(field_vac, degree, srange, thetarange, zetarange, True, 
                     nfp=nfp, stellsym=True)
 
-                # Check that only ["modB","psip","G","iota","modB_derivs"] are initialized
+                # Check that only ["modB","psip","G","iota","modB_derivs"] are initialized. The flux
+                # functions share one radial interpolant, so I, dGds and dIds are available as well.
                 assert (field.status_modB and field.status_psip and field.status_G and field.status_iota and field.modB_derivs)
-                assert (not field.status_I and not field.status_dGds and not field.status_dIds and not field.status_K and not field.status_K_derivs)
+                assert (field.status_I and field.status_dGds and field.status_dIds)
+                assert (not field.status_K and not field.status_K_derivs)
             else:
                 field = field_vac
 
@@ -472,6 +506,317 @@ class BoozerGuidingCenterTracingTesting(unittest.TestCase):
                 assert np.all(gc_tys[i][0:-1, 1] > 0.4)
                 assert np.all(gc_tys[i][0:-1, 1] < 0.6)
 
+    def test_tracing_result(self):
+        """
+        Trace particles with ragged=True and check that the TracingResult agrees
+        with the lists of arrays, also in the post-processing functions.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        m = PROTON_MASS
+        q = ELEMENTARY_CHARGE
+        Ekin = 100000.*ONE_EV
+        vpar = np.sqrt(2*Ekin/m)
+
+        Nparticles = 10
+        np.random.seed(1)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vpar*np.random.uniform(size=(Nparticles, 1))
+        kwargs = dict(tmax=1e-5, mass=m, charge=q, Ekin=Ekin, zetas=[0], mode='gc_vac', tol=1e-10,
+                      stopping_criteria=[MinToroidalFluxStoppingCriterion(0.4), MaxToroidalFluxStoppingCriterion(0.6)])
+        res_tys, res_hits = trace_particles_boozer(bsh, stz_inits, vpar_inits, **kwargs)
+        result = trace_particles_boozer(bsh, stz_inits, vpar_inits, ragged=True, **kwargs)
+        assert isinstance(result, TracingResult)
+        ragged_tys, ragged_hits = result
+        assert isinstance(ragged_tys, RaggedArray) and len(ragged_tys) == Nparticles
+
+        for i in range(Nparticles):
+            np.testing.assert_allclose(ragged_tys[i], res_tys[i])
+            np.testing.assert_allclose(ragged_hits[i], res_hits[i].reshape(-1, 6))
+        np.testing.assert_allclose(result.final_state(), np.array([ty[-1] for ty in res_tys]))
+        for i in range(Nparticles):
+            stopped = res_hits[i].reshape(-1, 6)[:, 1] < 0
+            expected = res_hits[i].reshape(-1, 6)[stopped, 0].min() if np.any(stopped) else np.inf
+            assert result.loss_times()[i] == expected
+        idxs, owners = result.hit_indices()
+        assert len(idxs) == sum(len(h) for h in res_hits)
+        np.testing.assert_array_equal(owners, np.repeat(np.arange(Nparticles), [len(h) for h in res_hits]))
+
+        np.testing.assert_allclose(compute_toroidal_transits(ragged_tys), compute_toroidal_transits(res_tys))
+        np.testing.assert_allclose(compute_poloidal_transits(ragged_tys), compute_poloidal_transits(res_tys))
+        np.testing.assert_allclose(compute_loss_fraction(ragged_tys, tmax=1e-5)[1],
+                                   compute_loss_fraction(res_tys, tmax=1e-5)[1])
+
+        # Empty arrays and views of the flat data
+        ragged = RaggedArray.from_list([np.ones((2, 3)), np.zeros((0,)), 2*np.ones((1, 3))], 3)
+        np.testing.assert_array_equal(ragged.lengths, [2, 0, 1])
+        assert ragged[1].shape == (0, 3)
+        assert np.all(np.isnan(ragged.last_rows()[1]))
+        np.testing.assert_array_equal(ragged[-1], 2*np.ones((1, 3)))
+        ragged[0][0, 0] = 5
+        assert ragged.data[0, 0] == 5
+
+    def test_dynamic_schedule(self):
+        """
+        Check that tracing with schedule="dynamic" gives the same results, in the
+        same order, as the static distribution of the particles.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        Ekin = 100000.*ONE_EV
+        vpar = np.sqrt(2*Ekin/PROTON_MASS)
+
+        Nparticles = 7
+        np.random.seed(2)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vpar*np.random.uniform(size=(Nparticles, 1))
+        kwargs = dict(tmax=1e-5, mass=PROTON_MASS, charge=ELEMENTARY_CHARGE, Ekin=Ekin, zetas=[0], mode='gc_vac',
+                      stopping_criteria=[MinToroidalFluxStoppingCriterion(0.4), MaxToroidalFluxStoppingCriterion(0.6)],
+                      comm=comm)
+        res_tys, res_hits = trace_particles_boozer(bsh, stz_inits, vpar_inits, **kwargs)
+        for ragged in [False, True]:
+            dyn_tys, dyn_hits = trace_particles_boozer(bsh, stz_inits, vpar_inits, schedule="dynamic",
+                                                       chunk_size=3, ragged=ragged, **kwargs)
+            assert len(dyn_tys) == Nparticles
+            for i in range(Nparticles):
+                np.testing.assert_allclose(dyn_tys[i], res_tys[i])
+                np.testing.assert_allclose(np.reshape(dyn_hits[i], (-1, 6)), np.reshape(res_hits[i], (-1, 6)))
+
+        chunks = list(parallel_loop_chunks(None, 7, 3))
+        assert chunks == [(0, 3), (3, 6), (6, 7)]
+        if comm is not None and comm.size > 1:
+            # Rank 0 hands out the chunks, and each chunk is taken by one rank
+            chunks = list(parallel_loop_chunks(comm, 23, 2))
+            if comm.rank == 0:
+                assert chunks == []
+            taken = sorted(sum(comm.allgather(chunks), []))
+            assert taken == [(i, min(i + 2, 23)) for i in range(0, 23, 2)]
+
+        ragged = RaggedArray.from_list([np.ones((2, 2)), np.zeros((0, 2)), 3*np.ones((1, 2))], 2)
+        taken = ragged.take([2, 0, 1])
+        np.testing.assert_array_equal(taken.lengths, [1, 2, 0])
+        np.testing.assert_array_equal(taken[0], 3*np.ones((1, 2)))
+        np.testing.assert_array_equal(taken[1], np.ones((2, 2)))
+
+    def test_gather_modes(self):
+        """
+        Check that the results of gather="root" and of the per-rank shards written
+        with gather="none" agree with the default gather="all".
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        Ekin = 100000.*ONE_EV
+        vpar = np.sqrt(2*Ekin/PROTON_MASS)
+
+        Nparticles = 5
+        np.random.seed(3)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vpar*np.random.uniform(size=(Nparticles, 1))
+        kwargs = dict(tmax=1e-5, mass=PROTON_MASS, charge=ELEMENTARY_CHARGE, Ekin=Ekin, zetas=[0], mode='gc_vac',
+                      stopping_criteria=[MinToroidalFluxStoppingCriterion(0.4), MaxToroidalFluxStoppingCriterion(0.6)],
+                      comm=comm, ragged=True)
+        result = trace_particles_boozer(bsh, stz_inits, vpar_inits, **kwargs)
+        rank = 0 if comm is None else comm.rank
+
+        root = trace_particles_boozer(bsh, stz_inits, vpar_inits, gather="root", **kwargs)
+        if rank == 0:
+            np.testing.assert_array_equal(root.res_tys.data, result.res_tys.data)
+            np.testing.assert_array_equal(root.res_hits.data, result.res_hits.data)
+        else:
+            assert len(root) == 0
+
+        with shared_temporary_directory(comm) as tmpdir:
+            shard_path = os.path.join(tmpdir, "tracing")
+            local = trace_particles_boozer(bsh, stz_inits, vpar_inits, gather="none", shard_path=shard_path, **kwargs)
+            for i, idx in enumerate(local.indices):
+                np.testing.assert_array_equal(local.res_tys[i], result.res_tys[idx])
+            if comm is not None:
+                comm.Barrier()
+            shards = TracingResult.load_shards(shard_path)
+            np.testing.assert_array_equal(shards.indices, np.arange(Nparticles))
+            np.testing.assert_array_equal(shards.res_tys.offsets, result.res_tys.offsets)
+            np.testing.assert_array_equal(shards.res_tys.data, result.res_tys.data)
+            np.testing.assert_array_equal(shards.res_hits.data, result.res_hits.data)
+
+        rows = np.arange(6.).reshape(3, 2)
+        assert gather_rows(None, rows) is rows
+
+    def test_stream_trajectories(self):
+        """
+        Check that the trajectories streamed to disk with stream_path, in several
+        chunks per particle, agree with the trajectories returned in memory.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        Ekin = 100000.*ONE_EV
+        vpar = np.sqrt(2*Ekin/PROTON_MASS)
+
+        Nparticles = 4
+        np.random.seed(4)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vpar*np.random.uniform(size=(Nparticles, 1))
+        kwargs = dict(tmax=1e-4, dt_save=1e-8, mass=PROTON_MASS, charge=ELEMENTARY_CHARGE, Ekin=Ekin, zetas=[0],
+                      mode='gc_vac', stopping_criteria=[MinToroidalFluxStoppingCriterion(0.4), MaxToroidalFluxStoppingCriterion(0.6)],
+                      comm=comm, nthreads=2)
+        res_tys, res_hits = trace_particles_boozer(bsh, stz_inits, vpar_inits, **kwargs)
+
+        rank = 0 if comm is None else comm.rank
+        with shared_temporary_directory(comm) as tmpdir:
+            stream_path = os.path.join(tmpdir, "trajectories")
+            stream_tys, stream_hits = trace_particles_boozer(bsh, stz_inits, vpar_inits, stream_path=stream_path, **kwargs)
+            if comm is not None:
+                comm.Barrier()
+            trajectories, indices = load_trajectories(stream_path)
+            np.testing.assert_array_equal(indices, np.arange(Nparticles))
+            for i in range(Nparticles):
+                np.testing.assert_allclose(trajectories[i], res_tys[i])
+                np.testing.assert_allclose(stream_tys[i], res_tys[i][[0, -1], :])
+                np.testing.assert_allclose(stream_hits[i], res_hits[i])
+
+            local, local_indices = load_trajectories(stream_path, rank=rank)
+            for i, idx in enumerate(local_indices):
+                np.testing.assert_array_equal(local[i], trajectories[idx])
+
+    def test_checkpoint_resume(self):
+        """
+        Resume tracing from a checkpoint in which some particles are finished and
+        one is in flight, with two states in the files of different ranks, and
+        compare with tracing all particles at once.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        Ekin = 100000.*ONE_EV
+        vpar = np.sqrt(2*Ekin/PROTON_MASS)
+
+        Nparticles = 5
+        np.random.seed(5)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vpar*np.random.uniform(size=(Nparticles, 1))
+        kwargs = dict(tmax=1e-5, mass=PROTON_MASS, charge=ELEMENTARY_CHARGE, Ekin=Ekin, zetas=[0], mode='gc_vac',
+                      stopping_criteria=[MinToroidalFluxStoppingCriterion(0.4), MaxToroidalFluxStoppingCriterion(0.6)],
+                      comm=comm, ragged=True)
+        result = trace_particles_boozer(bsh, stz_inits, vpar_inits, **kwargs)
+
+        rank = 0 if comm is None else comm.rank
+        with shared_temporary_directory(comm) as tmpdir:
+            checkpoint_path = os.path.join(tmpdir, "checkpoint")
+
+            # Without a checkpoint, resume traces all particles and writes one
+            resumed = trace_particles_boozer(bsh, stz_inits, vpar_inits, checkpoint_path=checkpoint_path,
+                                             resume=True, **kwargs)
+            np.testing.assert_array_equal(resumed.res_tys.data, result.res_tys.data)
+            # With a complete checkpoint, nothing is traced again
+            resumed = trace_particles_boozer(bsh, stz_inits, vpar_inits, checkpoint_path=checkpoint_path,
+                                             resume=True, **kwargs)
+            np.testing.assert_array_equal(resumed.res_tys.data, result.res_tys.data)
+            np.testing.assert_array_equal(resumed.res_hits.data, result.res_hits.data)
+
+            # Particles 0 and 3 are finished, and particle 1 is in flight. An
+            # older state of particle 1 is left in the file of another rank.
+            if comm is not None:
+                comm.Barrier()
+            state = result.res_tys[1][len(result.res_tys[1]) // 2]
+            stale = result.res_tys[1][len(result.res_tys[1]) // 4]
+            if rank == 0:
+                for filename in os.listdir(tmpdir):
+                    os.remove(os.path.join(tmpdir, filename))
+                result.take([0, 3]).save(checkpoint_path + "_0.npz", nranks=2)
+                np.array([[1, *state, 0.]]).tofile(checkpoint_path + "_0_inflight.bin")
+                np.array([[1, *stale, 0.]]).tofile(checkpoint_path + "_1_inflight.bin")
+            if comm is not None:
+                comm.Barrier()
+            resumed = trace_particles_boozer(bsh, stz_inits, vpar_inits, checkpoint_path=checkpoint_path,
+                                             resume=True, **kwargs)
+            np.testing.assert_array_equal(resumed.indices, np.arange(Nparticles))
+            for i in [0, 2, 3, 4]:
+                np.testing.assert_allclose(resumed.res_tys[i], result.res_tys[i])
+                np.testing.assert_allclose(resumed.res_hits[i], result.res_hits[i])
+            np.testing.assert_allclose(resumed.res_tys[1][0], state)
+            np.testing.assert_allclose(resumed.res_tys[1][-1], result.res_tys[1][-1], rtol=1e-5, atol=1e-8)
+
+        with self.assertRaises(ValueError):
+            trace_particles_boozer(bsh, stz_inits, vpar_inits, resume=True, **kwargs)
+
+    def test_tracing_batch(self):
+        """
+        Trace particles with particle_guiding_center_boozer_tracing_batch and
+        check that the result agrees with tracing each particle individually.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+
+        m = PROTON_MASS
+        q = ELEMENTARY_CHARGE
+        tmax = 1e-5
+        Ekin = 100000.*ONE_EV
+        vtotal = np.sqrt(2*Ekin/m)
+
+        Nparticles = 5
+        np.random.seed(1)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vtotal*np.random.uniform(size=(Nparticles,))
+        vtotals = vtotal*np.ones((Nparticles,))
+        stopping_criteria = [MinToroidalFluxStoppingCriterion(0.01), MaxToroidalFluxStoppingCriterion(0.99)]
+
+        res_tys, res_hits = sopp.particle_guiding_center_boozer_tracing_batch(
+            bsh, stz_inits, m, q, vtotals, vpar_inits, tmax, vacuum=True, noK=False,
+            zetas=[0], stopping_criteria=stopping_criteria, axis=2)
+        assert len(res_tys) == Nparticles
+        assert len(res_hits) == Nparticles
+
+        for i in range(Nparticles):
+            res_ty, res_hit = sopp.particle_guiding_center_boozer_tracing(
+                bsh, stz_inits[i, :], m, q, vtotal, vpar_inits[i], tmax, vacuum=True, noK=False,
+                zetas=[0], stopping_criteria=stopping_criteria, axis=2)
+            # The results are returned as contiguous arrays, also without hits
+            assert isinstance(res_ty, np.ndarray) and res_ty.flags.c_contiguous
+            assert res_ty.shape[1] == 5 and res_ty.shape[0] >= 2
+            assert isinstance(res_hits[i], np.ndarray) and res_hits[i].shape[1] == 6
+            np.testing.assert_allclose(np.asarray(res_tys[i]), np.asarray(res_ty))
+            np.testing.assert_allclose(np.asarray(res_hits[i]).reshape(-1, 6), np.asarray(res_hit).reshape(-1, 6))
+
+        with self.assertRaises(ValueError):
+            sopp.particle_guiding_center_boozer_tracing_batch(
+                bsh, stz_inits, m, q, vtotals[:-1], vpar_inits, tmax, vacuum=True, noK=False)
+
+    def test_tracing_batch_threads(self):
+        """
+        Trace particles in an InterpolatedBoozerField with several threads and
+        check that the result agrees with tracing them on a single thread.
+        """
+        bsh = BoozerAnalytic(1.0, 1.0, 4, 1.1, 0.8, 1.0)
+        field = InterpolatedBoozerField(bsh, 3, (0, 1, 8), (0, 2*np.pi, 8), (0, 2*np.pi, 8),
+                                        True, nfp=1, stellsym=False)
+
+        m = PROTON_MASS
+        q = ELEMENTARY_CHARGE
+        tmax = 1e-5
+        Ekin = 100000.*ONE_EV
+        vtotal = np.sqrt(2*Ekin/m)
+
+        Nparticles = 8
+        np.random.seed(1)
+        stz_inits = np.random.uniform(size=(Nparticles, 3))
+        stz_inits[:, 0] = 0.4 + 0.2*stz_inits[:, 0]
+        vpar_inits = vtotal*np.random.uniform(size=(Nparticles,))
+        vtotals = vtotal*np.ones((Nparticles,))
+        stopping_criteria = [MinToroidalFluxStoppingCriterion(0.01), MaxToroidalFluxStoppingCriterion(0.99)]
+
+        results = []
+        for nthreads in [1, 2]:
+            results.append(sopp.particle_guiding_center_boozer_tracing_batch(
+                field, stz_inits, m, q, vtotals, vpar_inits, tmax, vacuum=True, noK=False,
+                zetas=[0], stopping_criteria=stopping_criteria, axis=2, nthreads=nthreads))
+        for i in range(Nparticles):
+            np.testing.assert_allclose(np.asarray(results[0][0][i]), np.asarray(results[1][0][i]))
+            np.testing.assert_allclose(np.asarray(results[0][1][i]).reshape(-1, 6),
+                                       np.asarray(results[1][1][i]).reshape(-1, 6))
+
+        with self.assertRaises(ValueError):
+            sopp.particle_guiding_center_boozer_tracing_batch(
+                field, stz_inits, m, q, vtotals, vpar_inits, tmax, vacuum=True, noK=False,
+                solveSympl=True, nthreads=2)
+
     def test_compute_resonances(self):
         """
         Compute particle resonances for low energy particles in a BoozerAnalytic